@@ -3,6 +3,7 @@ Collectors package for fetching content from various sources.
 """
 from .base_collector import BaseCollector
 from .url_collector import URLCollector
-from .document_collector import DocumentCollector
+from .document_collector import DocumentCollector, DocumentJobs
+from .response_cache import ResponseCache
 
-__all__ = ['BaseCollector', 'URLCollector', 'DocumentCollector']
+__all__ = ['BaseCollector', 'URLCollector', 'DocumentCollector', 'DocumentJobs', 'ResponseCache']
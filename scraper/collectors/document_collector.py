@@ -1,11 +1,86 @@
 """
 Document collector for local files (PDFs, text files, etc.).
 """
+import hashlib
 import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple, Union
 from .base_collector import BaseCollector
-import pdfplumber
+from .pdf_backends import PDFReader, available_backend
+
+
+def _pdf_metadata(reader: PDFReader, location: str) -> Dict[str, Any]:
+    """Read the document metadata and page count of an open PDF."""
+    metadata = {'path': location, 'type': 'pdf'}
+    
+    info = reader.metadata
+    if info:
+        if info.get('Title'):
+            metadata['title_from_pdf'] = info['Title']
+        if info.get('Author'):
+            metadata['author'] = info['Author']
+        if info.get('Subject'):
+            metadata['subject'] = info['Subject']
+    
+    metadata['pages'] = reader.page_count
+    return metadata
+
+
+def _read_pdf_info(location: str, backend: str) -> Dict[str, Any]:
+    """Read a PDF's metadata without extracting any text."""
+    with PDFReader(location, backend) as reader:
+        return _pdf_metadata(reader, location)
+
+
+def _extract_pdf_pages(location: str, start: int, end: int, backend: str,
+                       part_path: Optional[str] = None) -> Union[List[str], str]:
+    """
+    Extract the text of pages [start, end) of a PDF in a worker process.
+    
+    With a part_path, the pages are written to that file as they are
+    extracted, for _iter_part_pages() to read back, and the path is returned
+    instead of the page texts.
+    """
+    with PDFReader(location, backend) as reader:
+        if part_path is None:
+            return list(reader.iter_page_texts(start, end))
+        
+        with open(part_path, 'w', encoding='utf-8', newline='\n') as f:
+            for text in reader.iter_page_texts(start, end):
+                f.write(f'{len(text)}\n')
+                f.write(text)
+        return part_path
+
+
+def _iter_part_pages(part_paths: List[str]) -> Iterator[str]:
+    """Read back the page texts written by _extract_pdf_pages(), deleting each file once read."""
+    for part_path in part_paths:
+        try:
+            with open(part_path, 'r', encoding='utf-8', newline='\n') as f:
+                for length in iter(f.readline, ''):
+                    yield f.read(int(length))
+        finally:
+            _remove_file(part_path)
+
+
+def _remove_file(path: str):
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _collect_document(location: str, spill_dir: Optional[str],
+                      memory_budget: Optional[int], backend: str) -> Dict[str, Any]:
+    """Collect a whole document in a worker process."""
+    collector = DocumentCollector(
+        spill_dir=spill_dir,
+        memory_budget=memory_budget,
+        pdf_backend=backend
+    )
+    return collector.collect(location)
 
 
 class DocumentCollector(BaseCollector):
@@ -13,6 +88,26 @@ class DocumentCollector(BaseCollector):
     
     SUPPORTED_EXTENSIONS = {'.pdf', '.txt', '.md', '.markdown'}
     
+    def __init__(self, workers: int = 1, pages_per_task: int = 50,
+                 spill_dir: Optional[str] = None, memory_budget: Optional[int] = None,
+                 pdf_backend: str = 'auto'):
+        """
+        Initialize document collector.
+        
+        Args:
+            workers: Number of worker processes used by iter_collect()
+            pages_per_task: Page range size large PDFs are split into
+            spill_dir: Directory PDF text exceeding memory_budget is written to
+            memory_budget: Maximum characters of PDF text kept in memory
+            pdf_backend: PDF text engine: 'auto' (pdfium when installed,
+                with per-page pdfplumber fallback), 'pdfium' or 'pdfplumber'
+        """
+        self.workers = max(1, workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.spill_dir = spill_dir
+        self.memory_budget = memory_budget if spill_dir else None
+        self.pdf_backend = available_backend(pdf_backend)
+    
     def can_handle(self, location: str) -> bool:
         """Check if this is a supported document."""
         path = Path(location)
@@ -50,55 +145,183 @@ class DocumentCollector(BaseCollector):
                 'metadata': {'error': 'Unsupported file type', 'path': str(path)}
             }
     
+    def iter_collect(self, locations: List[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Collect several documents, in parallel when more than one worker is set.
+        
+        Documents are spread across a process pool and PDFs longer than
+        pages_per_task are further split into page ranges. Pages are
+        reassembled in order, so every result is identical to collect().
+        
+        Args:
+            locations: File paths
+            
+        Yields:
+            (index into locations, collected data) as each document completes
+        """
+        if self.workers == 1:
+            for i, location in enumerate(locations):
+                yield i, self.collect(location)
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            jobs = self.submit(executor, locations)
+            for future in as_completed(list(jobs.futures)):
+                collected = jobs.complete(future)
+                if collected is not None:
+                    yield collected
+    
+    def submit(self, executor: Executor, locations: List[str]) -> 'DocumentJobs':
+        """
+        Submit documents to a process pool, like iter_collect() does.
+        
+        Lets a caller wait on the documents together with other work;
+        every future in the returned jobs has to be passed to their
+        complete() once it is done.
+        
+        Args:
+            executor: Process pool the documents are extracted in
+            locations: File paths
+            
+        Returns:
+            The submitted jobs
+        """
+        jobs = DocumentJobs(self, locations)
+        
+        for i, location in enumerate(locations):
+            path = Path(location)
+            page_count = 0
+            if path.suffix.lower() == '.pdf' and path.exists():
+                try:
+                    jobs.pdf_info[i] = _read_pdf_info(str(path), self.pdf_backend)
+                    page_count = jobs.pdf_info[i]['pages']
+                except Exception:
+                    # Let collect() produce the usual error result
+                    page_count = 0
+            
+            if page_count <= self.pages_per_task:
+                jobs.pdf_info.pop(i, None)
+                future = executor.submit(
+                    _collect_document, location, self.spill_dir, self.memory_budget,
+                    self.pdf_backend
+                )
+                jobs.futures[future] = (i, None)
+                continue
+            
+            # With a memory budget, page ranges are written to part files as
+            # they are extracted instead of being held until the PDF is complete
+            ranges = range(0, page_count, self.pages_per_task)
+            jobs.pdf_parts[i] = [None] * len(ranges)
+            for part, start in enumerate(ranges):
+                part_path = None
+                if self.memory_budget is not None:
+                    part_path = f'{self._spill_path(path)}.part{part}'
+                future = executor.submit(
+                    _extract_pdf_pages, str(path), start, start + self.pages_per_task,
+                    self.pdf_backend, part_path
+                )
+                jobs.futures[future] = (i, part)
+        
+        return jobs
+    
     def _collect_pdf(self, path: Path) -> Dict[str, Any]:
         """Collect content from PDF."""
         try:
-            content_parts = []
-            metadata = {'path': str(path), 'type': 'pdf'}
-            
-            with pdfplumber.open(path) as pdf:
+            with PDFReader(str(path), self.pdf_backend) as reader:
                 # Get metadata from PDF
-                if pdf.metadata:
-                    if pdf.metadata.get('Title'):
-                        metadata['title_from_pdf'] = pdf.metadata['Title']
-                    if pdf.metadata.get('Author'):
-                        metadata['author'] = pdf.metadata['Author']
-                    if pdf.metadata.get('Subject'):
-                        metadata['subject'] = pdf.metadata['Subject']
-                
-                metadata['pages'] = len(pdf.pages)
+                metadata = _pdf_metadata(reader, str(path))
                 
-                # Extract text from all pages
-                for i, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if text:
-                        content_parts.append(text)
-            
-            content = '\n\n'.join(content_parts)
-            
-            # Try to extract title from first page if not in metadata
-            title = metadata.get('title_from_pdf', path.stem)
-            if not metadata.get('title_from_pdf') and content:
-                # Use first line or first significant text as title
-                lines = content.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if len(line) > 10 and len(line) < 200:
-                        title = line
-                        break
-            
-            return {
-                'content': content,
-                'title': title,
-                'metadata': metadata
-            }
+                # Extract text from all pages, one page at a time
+                return self._pdf_result(path, metadata, reader.iter_page_texts())
             
         except Exception as e:
-            return {
-                'content': f'Error reading PDF: {str(e)}',
-                'title': path.name,
-                'metadata': {'error': str(e), 'path': str(path)}
-            }
+            return self._error_result(path, f'Error reading PDF: {str(e)}', str(e))
+    
+    def _pdf_result(self, path: Path, metadata: Dict[str, Any],
+                    page_texts: Iterable[str]) -> Dict[str, Any]:
+        """
+        Assemble the collected data of a PDF from its page texts.
+        
+        When a memory budget is set and the text outgrows it, the full text is
+        written to a spill file instead: 'content' then only holds the first
+        memory_budget characters and 'content_path' points at the full text.
+        """
+        content_path = None
+        content = None
+        
+        if self.memory_budget is None:
+            content = '\n\n'.join(page_texts)
+        else:
+            content, content_path = self._join_with_spill(path, page_texts)
+        
+        # Try to extract title from first page if not in metadata
+        title = metadata.get('title_from_pdf', path.stem)
+        if not metadata.get('title_from_pdf') and content:
+            # Use first line or first significant text as title
+            lines = content.split('\n')
+            for line in lines:
+                line = line.strip()
+                if len(line) > 10 and len(line) < 200:
+                    title = line
+                    break
+        
+        result = {
+            'content': content,
+            'title': title,
+            'metadata': metadata
+        }
+        if content_path:
+            result['content_path'] = content_path
+        return result
+    
+    def _join_with_spill(self, path: Path, page_texts: Iterable[str]) -> Tuple[str, Optional[str]]:
+        """
+        Join page texts, spilling them to disk once they exceed the memory budget.
+        
+        Returns:
+            (content or its preview, spill file path or None)
+        """
+        parts: List[str] = []
+        size = 0
+        spill = None
+        spill_path = None
+        
+        try:
+            for text in page_texts:
+                if spill:
+                    spill.write('\n\n')
+                    spill.write(text)
+                    continue
+                
+                parts.append(text)
+                size += len(text) + 2
+                if size > self.memory_budget:
+                    spill_path = self._spill_path(path)
+                    spill = open(spill_path, 'w', encoding='utf-8', newline='\n')
+                    spill.write('\n\n'.join(parts))
+                    parts = []
+        finally:
+            if spill:
+                spill.close()
+        
+        if spill_path:
+            with open(spill_path, 'r', encoding='utf-8', newline='\n') as f:
+                return f.read(self.memory_budget), spill_path
+        return '\n\n'.join(parts), None
+    
+    def _spill_path(self, path: Path) -> str:
+        """Get the spill file of a document, stable across runs."""
+        Path(self.spill_dir).mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(str(path.resolve()).encode('utf-8')).hexdigest()[:16]
+        return str(Path(self.spill_dir) / f'{path.stem}-{key}.txt')
+    
+    def _error_result(self, path: Path, content: str, error: str) -> Dict[str, Any]:
+        """Build the result returned when a document cannot be read."""
+        return {
+            'content': content,
+            'title': path.name,
+            'metadata': {'error': error, 'path': str(path)}
+        }
     
     def _collect_text(self, path: Path) -> Dict[str, Any]:
         """Collect content from text file."""
@@ -150,3 +373,63 @@ class DocumentCollector(BaseCollector):
                 'title': path.name,
                 'metadata': {'error': str(e), 'path': str(path)}
             }
+
+
+class DocumentJobs:
+    """Documents submitted to a process pool by DocumentCollector.submit()."""
+    
+    def __init__(self, collector: DocumentCollector, locations: List[str]):
+        """
+        Initialize the jobs.
+        
+        Args:
+            collector: Collector the documents were submitted by
+            locations: File paths
+        """
+        self.collector = collector
+        self.locations = locations
+        # (index into locations, page range part or None for a whole document)
+        self.futures: Dict[Future, Tuple[int, Optional[int]]] = {}
+        self.pdf_parts: Dict[int, List[Any]] = {}
+        self.pdf_info: Dict[int, Dict[str, Any]] = {}
+        self._failed = set()
+    
+    def complete(self, future: Future) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Take the result of a finished future.
+        
+        Args:
+            future: One of the futures, once it is done
+            
+        Returns:
+            (index into locations, collected data) if the future completed
+            its document, None if other page ranges are still outstanding
+        """
+        i, part = self.futures.pop(future)
+        if part is None:
+            return i, future.result()
+        
+        if i in self._failed:
+            if not future.exception() and isinstance(future.result(), str):
+                _remove_file(future.result())
+            return None
+        
+        path = Path(self.locations[i])
+        try:
+            self.pdf_parts[i][part] = future.result()
+        except Exception as e:
+            self._failed.add(i)
+            for result in self.pdf_parts.pop(i):
+                if isinstance(result, str):
+                    _remove_file(result)
+            self.pdf_info.pop(i)
+            return i, self.collector._error_result(path, f'Error reading PDF: {str(e)}', str(e))
+        
+        if any(result is None for result in self.pdf_parts[i]):
+            return None
+        parts = self.pdf_parts.pop(i)
+        if self.collector.memory_budget is not None:
+            page_texts = _iter_part_pages(parts)
+        else:
+            page_texts = (text for texts in parts for text in texts)
+        return i, self.collector._pdf_result(path, self.pdf_info.pop(i), page_texts)
@@ -0,0 +1,284 @@
+"""
+HTML title, content and metadata extraction straight from the lxml tree.
+
+BeautifulSoup builds its own tree from lxml's parser events, after which
+URLCollector removes page chrome, runs five CSS selectors in turn and calls
+get_text on every heading, paragraph and list item. Here the page is parsed
+by lxml with the same settings and encodings, and everything is read in a
+single walk over lxml's tree, giving the same title, content and metadata
+as URLCollector's BeautifulSoup methods.
+"""
+import re
+from typing import Any, Dict, List, Optional
+from bs4.dammit import EncodingDetector
+from lxml import etree
+
+
+BACKENDS = ('lxml', 'bs4')
+
+# Subtrees dropped before the content and metadata are read
+_REMOVED_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header'])
+
+# BeautifulSoup gives strings inside these tags their own classes, which
+# get_text leaves out
+_STRING_CONTAINER_TAGS = frozenset(['rt', 'rp', 'style', 'script', 'template'])
+
+# Tags inside which BeautifulSoup keeps whitespace-only strings as they are
+_PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+
+# Tags whose text makes up the content, with their heading level (0 for none)
+_CONTENT_TAGS = {
+    'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6,
+    'p': 0, 'li': 0, 'blockquote': 0,
+}
+
+# Main content containers, in the order they are looked for:
+# article, main, [role="main"], .post-content, .article-content
+_CONTAINERS = 5
+
+# How soupsieve matches [role="main"]
+_MAIN_ROLE = re.compile(r'^main$', re.DOTALL)
+
+# How BeautifulSoup splits class attributes
+_NONWHITESPACE = re.compile(r'\S+')
+
+_ASCII_SPACES = ' \n\t\f\r'
+
+# A doctype inside the page ends a string for BeautifulSoup but leaves no
+# trace in lxml's tree. Only one in the prolog (after a BOM, whitespace,
+# comments and an XML declaration) is safe to ignore.
+_PROLOG = re.compile(rb'(?:\xef\xbb\xbf)?(?:\s|<!--(?!-?>).*?-->|<\?.*?>)*(?:<!doctype)?',
+                     re.IGNORECASE | re.DOTALL)
+_DOCTYPE = re.compile(rb'<!doctype', re.IGNORECASE)
+
+_META_FIELDS = (
+    ('name', 'author', 'author'),
+    ('name', 'description', 'description'),
+    ('property', 'article:published_time', 'published_date'),
+)
+
+
+class _Span:
+    """Where an element's descendants are in the walk: element order and string positions."""
+    __slots__ = ('tag', 'order', 'last_order', 'all_start', 'all_end', 'kept_start', 'kept_end')
+
+    def __init__(self, tag: str, order: int, all_start: int, kept_start: int):
+        self.tag = tag
+        self.order = order
+        self.last_order = order
+        self.all_start = all_start
+        self.all_end = all_start
+        self.kept_start = kept_start
+        self.kept_end = kept_start
+
+
+def parse(body: bytes) -> Optional[etree._Element]:
+    """
+    Parse an HTML page the way BeautifulSoup's lxml builder does.
+
+    Each encoding BeautifulSoup would try is tried in the same order until
+    lxml accepts the page.
+
+    Args:
+        body: Raw page bytes
+
+    Returns:
+        Root element, or None if no encoding works or the page is empty
+    """
+    detector = EncodingDetector(body, is_html=True)
+    for encoding in detector.encodings:
+        try:
+            parser = etree.HTMLParser(recover=True, encoding=encoding)
+            parser.feed(detector.markup)
+            return parser.close()
+        except (UnicodeDecodeError, LookupError, etree.ParserError):
+            continue
+        except etree.XMLSyntaxError:
+            return None
+    return None
+
+
+def _walk(root: etree._Element):
+    """Yield iterwalk events of every top-level element in document order."""
+    # Content after </html> is parsed into another top-level <html>
+    tops = list(root.itersiblings(preceding=True))
+    tops.reverse()
+    tops.append(root)
+    tops.extend(root.itersiblings())
+    for top in tops:
+        if isinstance(top.tag, str):
+            yield from etree.iterwalk(top, events=('start', 'end', 'comment', 'pi'))
+
+
+def extract_page(body: bytes, url: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the title, main content and metadata of an HTML page.
+
+    Gives the same results as URLCollector's _extract_title,
+    _extract_content and _extract_metadata on a BeautifulSoup of the page.
+
+    Args:
+        body: Raw page bytes
+        url: Page URL, stored in the metadata
+
+    Returns:
+        Dictionary with content, title, and metadata, or None for pages this
+        walk does not cover (no body, a doctype inside the page, UTF-16, or
+        an unusual title or container), which should go through
+        BeautifulSoup instead
+    """
+    # UTF-16 pages are not searched for doctypes
+    if b'\x00' in body or _DOCTYPE.search(body, _PROLOG.match(body).end()):
+        return None
+
+    root = parse(body)
+    if root is None:
+        return None
+
+    # Strings get_text would return, everywhere and outside removed subtrees
+    all_strings: List[str] = []
+    kept_strings: List[str] = []
+    removed = contained = preserved = 0
+    order = 0
+
+    title = None
+    h1: Optional[_Span] = None
+    og_title = None
+    og_title_found = False
+    meta_found: Dict[str, Optional[str]] = {}
+    containers: List[Optional[_Span]] = [None] * _CONTAINERS
+    body_span: Optional[_Span] = None
+    content_spans: List[_Span] = []
+    open_spans: List[Optional[_Span]] = []
+
+    def add(text: str):
+        # BeautifulSoup turns whitespace-only strings into one space or newline
+        if not preserved and not text.strip(_ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        if not contained:
+            all_strings.append(text)
+            if not removed:
+                kept_strings.append(text)
+
+    for event, element in _walk(root):
+        if event == 'start':
+            tag = element.tag
+            order += 1
+            if tag in _REMOVED_TAGS:
+                removed += 1
+            if tag in _STRING_CONTAINER_TAGS:
+                contained += 1
+            if tag in _PRESERVE_WHITESPACE_TAGS:
+                preserved += 1
+
+            # One span per element, shared by everything it is needed for
+            span = None
+
+            # The title is read before page chrome is removed
+            if tag == 'title':
+                if title is None:
+                    title = element
+            elif tag == 'h1' and h1 is None:
+                span = h1 = _Span(tag, order, len(all_strings), len(kept_strings))
+            elif tag == 'meta':
+                attributes = element.attrib
+                if not og_title_found and attributes.get('property') == 'og:title':
+                    og_title_found = True
+                    og_title = attributes.get('content')
+                if not removed:
+                    for attribute, value, field in _META_FIELDS:
+                        if field not in meta_found and attributes.get(attribute) == value:
+                            meta_found[field] = attributes.get('content')
+
+            if not removed:
+                if tag in _CONTENT_TAGS:
+                    span = span or _Span(tag, order, len(all_strings), len(kept_strings))
+                    content_spans.append(span)
+                elif tag == 'body' and body_span is None:
+                    span = body_span = _Span(tag, order, len(all_strings), len(kept_strings))
+                if tag == 'article' and containers[0] is None:
+                    span = containers[0] = span or _Span(tag, order, len(all_strings),
+                                                         len(kept_strings))
+                elif tag == 'main' and containers[1] is None:
+                    span = containers[1] = span or _Span(tag, order, len(all_strings),
+                                                         len(kept_strings))
+                if containers[2] is None:
+                    role = element.get('role')
+                    if role is not None and _MAIN_ROLE.match(role):
+                        span = containers[2] = span or _Span(tag, order, len(all_strings),
+                                                             len(kept_strings))
+                if containers[3] is None or containers[4] is None:
+                    classes = element.get('class')
+                    if classes:
+                        classes = _NONWHITESPACE.findall(classes)
+                        if containers[3] is None and 'post-content' in classes:
+                            span = containers[3] = span or _Span(tag, order, len(all_strings),
+                                                                 len(kept_strings))
+                        if containers[4] is None and 'article-content' in classes:
+                            span = containers[4] = span or _Span(tag, order, len(all_strings),
+                                                                 len(kept_strings))
+
+            open_spans.append(span)
+            if element.text:
+                add(element.text)
+        elif event == 'end':
+            tag = element.tag
+            span = open_spans.pop()
+            if span is not None:
+                span.last_order = order
+                span.all_end = len(all_strings)
+                span.kept_end = len(kept_strings)
+            if tag in _REMOVED_TAGS:
+                removed -= 1
+            if tag in _STRING_CONTAINER_TAGS:
+                contained -= 1
+            if tag in _PRESERVE_WHITESPACE_TAGS:
+                preserved -= 1
+            if element.tail:
+                add(element.tail)
+        elif element.tail:
+            # Comments and processing instructions only end a string
+            add(element.tail)
+
+    # Title: <title>, then the first <h1>, then og:title
+    if title is not None and len(title):
+        return None
+    if title is not None and title.text:
+        page_title = title.text.strip()
+    elif h1 is not None:
+        page_title = ''.join(all_strings[h1.all_start:h1.all_end]).strip()
+    elif og_title:
+        page_title = og_title.strip()
+    else:
+        page_title = 'Untitled'
+
+    # Content: the first container found, otherwise the body. get_text on
+    # a ruby or template container would return other strings.
+    container = next((span for span in containers if span is not None), body_span)
+    if container is None or container.tag in ('rt', 'rp', 'template'):
+        return None
+
+    text_parts = []
+    for span in content_spans:
+        if span.order <= container.order or span.order > container.last_order:
+            continue
+        text = ''.join(kept_strings[span.kept_start:span.kept_end]).strip()
+        if text:
+            level = _CONTENT_TAGS[span.tag]
+            if level:
+                text = '#' * level + ' ' + text
+            text_parts.append(text)
+    content = '\n\n'.join(text_parts)
+    if not content:
+        content = ''.join(kept_strings[container.kept_start:container.kept_end])
+
+    metadata = {'url': url}
+    for _, _, field in _META_FIELDS:
+        if meta_found.get(field):
+            metadata[field] = meta_found[field]
+
+    return {
+        'content': content.strip(),
+        'title': page_title,
+        'metadata': metadata
+    }
@@ -0,0 +1,114 @@
+"""
+Pooled HTTP session with per-host connection statistics.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    # Advertise every encoding urllib3 can decode here (br needs brotli installed)
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+
+
+class ConnectionStats:
+    """Thread-safe counters of requests and new connections per host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._connections: Dict[str, int] = defaultdict(int)
+
+    def record_request(self, host: str):
+        """Record a request sent to a host."""
+        with self._lock:
+            self._requests[host] += 1
+
+    def record_connection(self, host: str):
+        """Record a new TCP (and TLS) connection opened to a host."""
+        with self._lock:
+            self._connections[host] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the current statistics.
+
+        Returns:
+            Dictionary mapping host to its request, connection and reuse counts
+        """
+        with self._lock:
+            return {
+                host: {
+                    'requests': count,
+                    'connections': self._connections[host],
+                    'reused': max(0, count - self._connections[host]),
+                }
+                for host, count in self._requests.items()
+            }
+
+
+def _counting_pool(base: type, stats: ConnectionStats) -> type:
+    """Create a connection pool class that reports to the given stats."""
+
+    class CountingConnection(base.ConnectionCls):
+        def connect(self):
+            stats.record_connection(self.host)
+            return super().connect()
+
+    class CountingConnectionPool(base):
+        ConnectionCls = CountingConnection
+
+        def urlopen(self, method, url, *args, **kwargs):
+            stats.record_request(self.host)
+            return super().urlopen(method, url, *args, **kwargs)
+
+    return CountingConnectionPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTP adapter whose connection pools record per-host statistics."""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.stats),
+            'https': _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+def create_session(stats: ConnectionStats, pool_connections: int = 20,
+                   pool_maxsize: int = 10) -> requests.Session:
+    """
+    Create a keep-alive session with pooled connections.
+
+    Args:
+        stats: Statistics collector for connection reuse
+        pool_connections: Number of per-host pools to keep cached
+        pool_maxsize: Maximum idle connections kept open per host
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    adapter = PooledAdapter(
+        stats,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
@@ -0,0 +1,169 @@
+"""
+PDF text extraction backends.
+
+pdfplumber runs a full layout analysis for every page, which is far more
+work than we need for plain text. When pypdfium2 is installed it is used as
+a fast text-only engine, falling back to pdfplumber for any page where it
+returns no text or text that looks garbled.
+
+pdfium is not thread-safe, not even across separate documents, so every
+call into it is made while holding PDFIUM_LOCK. Worker processes each have
+their own copy of the library and lock.
+"""
+import threading
+import unicodedata
+from typing import Dict, Any, Iterator, Optional
+import pdfplumber
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+
+BACKENDS = ('auto', 'pdfium', 'pdfplumber')
+
+# Serializes every pdfium call made in this process
+PDFIUM_LOCK = threading.Lock()
+
+
+def available_backend(backend: str = 'auto') -> str:
+    """
+    Resolve a backend name to one that can be used here.
+
+    Args:
+        backend: 'auto', 'pdfium' or 'pdfplumber'
+
+    Returns:
+        'pdfium' or 'pdfplumber'
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    if backend == 'pdfium' and pdfium is None:
+        raise ValueError("The pdfium backend requires pypdfium2 to be installed")
+    if backend == 'pdfplumber' or pdfium is None:
+        return 'pdfplumber'
+    return 'pdfium'
+
+
+def looks_garbled(text: str, max_bad_ratio: float = 0.1) -> bool:
+    """
+    Check whether extracted text is mostly unusable characters.
+
+    Text is considered garbled when replacement characters, control
+    characters or private-use glyphs make up more than max_bad_ratio of its
+    non-whitespace characters.
+    """
+    total = 0
+    bad = 0
+    for char in text:
+        if char.isspace():
+            continue
+        total += 1
+        if char == '\ufffd' or unicodedata.category(char) in ('Cc', 'Co', 'Cs'):
+            bad += 1
+    return total == 0 or bad > total * max_bad_ratio
+
+
+class PDFReader:
+    """Reads metadata and page text from a PDF with the selected backend."""
+
+    def __init__(self, location: str, backend: str = 'auto'):
+        """
+        Open a PDF.
+
+        Args:
+            location: File path
+            backend: 'auto', 'pdfium' or 'pdfplumber'
+        """
+        self.location = location
+        self.backend = available_backend(backend)
+        self.fallback_pages = 0
+        self._plumber = None
+        self._pdfium = None
+
+        if self.backend == 'pdfium':
+            with PDFIUM_LOCK:
+                self._pdfium = pdfium.PdfDocument(location)
+        else:
+            self._plumber = pdfplumber.open(location)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+        if self._pdfium is not None:
+            with PDFIUM_LOCK:
+                return len(self._pdfium)
+        return len(self._plumber.pages)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Document information dictionary (Title, Author, Subject, ...)."""
+        if self._pdfium is not None:
+            with PDFIUM_LOCK:
+                info = self._pdfium.get_metadata_dict()
+            return {key: value for key, value in info.items() if value}
+        return self._plumber.metadata or {}
+
+    def iter_page_texts(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """
+        Extract the text of pages [start, end) one page at a time.
+
+        Pages without text are skipped.
+        """
+        end = self.page_count if end is None else min(end, self.page_count)
+        for index in range(start, end):
+            text = self._page_text(index)
+            if text:
+                yield text
+
+    def close(self):
+        """Close every open document."""
+        if self._pdfium is not None:
+            with PDFIUM_LOCK:
+                self._pdfium.close()
+            self._pdfium = None
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+
+    def _page_text(self, index: int) -> Optional[str]:
+        """Extract one page's text, falling back to pdfplumber when needed."""
+        if self._pdfium is not None:
+            text = self._pdfium_text(index)
+            if not looks_garbled(text):
+                return text
+            self.fallback_pages += 1
+
+        return self._plumber_text(index)
+
+    def _pdfium_text(self, index: int) -> str:
+        """Extract one page's text with pdfium."""
+        with PDFIUM_LOCK:
+            page = self._pdfium[index]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+        return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+    def _plumber_text(self, index: int) -> Optional[str]:
+        """Extract one page's text with pdfplumber."""
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.location)
+
+        page = self._plumber.pages[index]
+        text = page.extract_text()
+        # Release the page's parsed layout objects before moving on
+        page.close()
+        return text
@@ -0,0 +1,217 @@
+"""
+Persistent on-disk HTTP response cache with conditional revalidation.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Mapping
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of HTTP response bodies.
+
+    Bodies are stored once per SHA-256 digest under ``objects/`` and an index
+    maps each URL to its digest and validators (ETag / Last-Modified). The
+    total size of stored bodies is bounded; the least recently used URLs are
+    evicted first.
+
+    Lookups and updates only touch the in-memory index; it is written back
+    to disk by flush(), once per run rather than once per request.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the response cache.
+
+        Args:
+            cache_dir: Directory holding the cache
+            max_bytes: Maximum total size of cached bodies
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = self._load_index()
+        self._dirty = False
+        # Number of URLs sharing each stored body, and total size of the bodies
+        self._refs = Counter(entry['digest'] for entry in self._index.values())
+        self._total = sum(entry['size'] for entry in
+                          {entry['digest']: entry for entry in self._index.values()}.values())
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Get the revalidation headers for a cached URL.
+
+        Args:
+            url: Requested URL
+
+        Returns:
+            If-None-Match / If-Modified-Since headers, empty if not cached
+        """
+        with self._lock:
+            entry = self._index.get(url)
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, url: str) -> Optional[bytes]:
+        """
+        Read the cached body for a URL and mark it as recently used.
+
+        Args:
+            url: Requested URL
+
+        Returns:
+            Cached body, or None if it is not available
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return None
+            digest = entry['digest']
+
+        try:
+            body = self._object_path(digest).read_bytes()
+        except OSError:
+            body = None
+
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry or entry['digest'] != digest:
+                # Replaced while reading; the caller fetches it again
+                return None
+            if body is None:
+                # Body was removed behind our back; forget the entry
+                self._remove(url)
+            else:
+                entry['last_access'] = time.time()
+            self._dirty = True
+            return body
+
+    def store(self, url: str, body: bytes, headers: Mapping[str, str]):
+        """
+        Store a response body if it carries validators.
+
+        Args:
+            url: Requested URL
+            body: Response body
+            headers: Response headers
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+
+        path = self._object_path(digest)
+        if not path.exists():
+            # Concurrent stores of the same body each write their own file
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            if url in self._index:
+                self._remove(url, delete_body=self._index[url]['digest'] != digest)
+            self._index[url] = {
+                'digest': digest,
+                'size': len(body),
+                'etag': etag,
+                'last_modified': last_modified,
+                'last_access': time.time(),
+            }
+            self._refs[digest] += 1
+            if self._refs[digest] == 1:
+                self._total += len(body)
+            self._evict()
+            self._dirty = True
+
+    def refresh(self, url: str, headers: Mapping[str, str]):
+        """
+        Update the validators of an entry after a 304 Not Modified.
+
+        Args:
+            url: Requested URL
+            headers: 304 response headers
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return
+            if headers.get('ETag'):
+                entry['etag'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                entry['last_modified'] = headers['Last-Modified']
+            self._dirty = True
+
+    def flush(self):
+        """Write the URL index to disk if it changed since the last flush."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+                self._dirty = False
+
+    def _remove(self, url: str, delete_body: bool = False):
+        """Forget a URL, optionally deleting its body once no URL shares it."""
+        entry = self._index.pop(url)
+        digest = entry['digest']
+        self._refs[digest] -= 1
+        if self._refs[digest]:
+            return
+        del self._refs[digest]
+        self._total -= entry['size']
+        if delete_body:
+            try:
+                self._object_path(digest).unlink()
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used URLs until stored bodies fit the budget."""
+        if self._total <= self.max_bytes:
+            return
+
+        by_age = sorted(self._index.items(), key=lambda item: item[1]['last_access'])
+        for url, _ in by_age:
+            if self._total <= self.max_bytes:
+                break
+            # Bodies are shared between URLs; only delete the last reference
+            self._remove(url, delete_body=True)
+
+    def _object_path(self, digest: str) -> Path:
+        """Get the path of a stored body."""
+        return self.objects_dir / digest
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load the URL index from disk."""
+        try:
+            with open(self.cache_dir / self.INDEX_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """Atomically write the URL index to disk."""
+        path = self.cache_dir / self.INDEX_FILE
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
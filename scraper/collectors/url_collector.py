@@ -2,23 +2,60 @@
 URL collector using Firecrawl MCP or direct scraping.
 """
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_collector import BaseCollector
-import requests
+from .html_extractor import BACKENDS as HTML_BACKENDS, extract_page
+from .http_session import ConnectionStats, create_session
+from .response_cache import ResponseCache
 from bs4 import BeautifulSoup
 
 
 class URLCollector(BaseCollector):
     """Collects content from URLs."""
     
-    def __init__(self, use_firecrawl: bool = False):
+    def __init__(self, use_firecrawl: bool = False, pool_connections: int = 20,
+                 pool_maxsize: int = 10, timeout: int = 30,
+                 cache: Optional[ResponseCache] = None, html_backend: str = 'lxml'):
         """
         Initialize URL collector.
         
         Args:
             use_firecrawl: Whether to use Firecrawl MCP (requires MCP integration)
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum open connections kept per host
+            timeout: Request timeout in seconds
+            cache: Response cache consulted before downloading
+            html_backend: HTML extraction engine: 'lxml' (a single walk over
+                lxml's tree, falling back to BeautifulSoup for pages it does
+                not cover) or 'bs4'
         """
+        if html_backend not in HTML_BACKENDS:
+            raise ValueError(f"Unknown HTML backend: {html_backend}")
         self.use_firecrawl = use_firecrawl
+        self.html_backend = html_backend
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = ConnectionStats()
+        self.session = create_session(
+            self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+    
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get per-host connection reuse statistics.
+        
+        Returns:
+            Dictionary mapping host to request, connection and reuse counts
+        """
+        return self.stats.snapshot()
+    
+    def close(self):
+        """Close all pooled connections and write back the response cache."""
+        self.session.close()
+        if self.cache:
+            self.cache.flush()
     
     def can_handle(self, location: str) -> bool:
         """Check if this is a URL."""
@@ -49,15 +86,17 @@ class URLCollector(BaseCollector):
         return self._collect_with_requests(url)
     
     def _collect_with_requests(self, url: str) -> Dict[str, Any]:
-        """Collect using direct HTTP requests and BeautifulSoup."""
+        """Collect using direct HTTP requests and lxml or BeautifulSoup."""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
+            body = self._fetch(url)
+            
+            # Same results as the BeautifulSoup methods below, in one tree walk
+            if self.html_backend == 'lxml':
+                page = extract_page(body, url)
+                if page is not None:
+                    return page
             
-            soup = BeautifulSoup(response.content, 'lxml')
+            soup = BeautifulSoup(body, 'lxml')
             
             # Extract title
             title = self._extract_title(soup)
@@ -81,6 +120,36 @@ class URLCollector(BaseCollector):
                 'metadata': {'error': str(e), 'url': url}
             }
     
+    def _fetch(self, url: str) -> bytes:
+        """
+        Download a URL, revalidating against the response cache if enabled.
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            Response body
+        """
+        if not self.cache:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.content
+        
+        headers = self.cache.conditional_headers(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        
+        if response.status_code == 304:
+            body = self.cache.read(url)
+            if body is not None:
+                self.cache.refresh(url, response.headers)
+                return body
+            # Cached body is gone; fetch unconditionally
+            response = self.session.get(url, timeout=self.timeout)
+        
+        response.raise_for_status()
+        self.cache.store(url, response.content, response.headers)
+        return response.content
+    
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Extract title from HTML."""
         # Try <title> tag
@@ -1,7 +1,8 @@
 """
 Main ledger builder that coordinates tier builders.
 """
-from models import KnowledgeLedger
+from typing import Callable, Iterator, Optional, TextIO, Union
+from models import KnowledgeLedger, VerbatimSection
 from .tier1_builder import Tier1Builder
 from .tier2_builder import Tier2Builder
 
@@ -23,23 +24,101 @@ class LedgerBuilder:
         Returns:
             Complete markdown document
         """
-        sections = []
+        return '\n'.join(section if isinstance(section, str) else section.read()
+                         for section in self.iter_sections(ledger))
+    
+    def iter_sections(self, ledger: KnowledgeLedger) -> Iterator[Union[str, VerbatimSection]]:
+        """
+        Build the knowledge ledger one section at a time.
         
+        Joining the yielded sections with newlines gives the output of build();
+        the content of spilled sources comes as VerbatimSections.
+        
+        Args:
+            ledger: KnowledgeLedger with all data
+            
+        Yields:
+            Tier 1, the Tier 2 header, one block per source, then the footer
+        """
         # Tier 1: Executive Index
-        tier1 = self.tier1_builder.build(ledger.topics, ledger.sources)
-        sections.append(tier1)
+        yield self.tier1_builder.build(ledger.topics, ledger.sources)
         
         # Tier 2: Source Content
-        tier2 = self.tier2_builder.build(ledger.sources)
-        sections.append(tier2)
+        yield from self.tier2_builder.iter_sections(ledger.sources)
         
         # Footer
-        sections.append("---")
-        sections.append("")
-        sections.append(f"*Generated on {ledger.created_at.strftime('%Y-%m-%d %H:%M:%S')}*")
-        sections.append("")
+        yield '\n'.join([
+            "---",
+            "",
+            f"*Generated on {ledger.created_at.strftime('%Y-%m-%d %H:%M:%S')}*",
+            ""
+        ])
+    
+    def stream(self, ledger: KnowledgeLedger, fh: TextIO,
+               format_section: Optional[Callable[[str], str]] = None
+               ) -> Iterator[Union[str, VerbatimSection]]:
+        """
+        Write the knowledge ledger to a file handle section by section.
+        
+        Only one section is held in memory at a time; VerbatimSections are
+        copied from their files in blocks. Nothing is written until the
+        returned iterator is consumed.
+        
+        Args:
+            ledger: KnowledgeLedger with all data
+            fh: Text file handle to write to
+            format_section: Optional function applied to each section before
+                it is written; VerbatimSections are written unformatted
+            
+        Yields:
+            Each section as written
+        """
+        write = self.section_writer(fh)
+        for section in self.iter_sections(ledger):
+            if format_section and not isinstance(section, VerbatimSection):
+                section = format_section(section)
+            write(section)
+            yield section
+    
+    def section_writer(self, fh: TextIO) -> Callable[[Union[str, VerbatimSection]], None]:
+        """
+        Get a function writing sections to a file handle, joined with newlines.
+        
+        VerbatimSections are copied from their files in blocks.
+        
+        Args:
+            fh: Text file handle to write to
+            
+        Returns:
+            Function taking each section in document order
+        """
+        first = True
         
-        return '\n'.join(sections)
+        def write(section: Union[str, VerbatimSection]):
+            nonlocal first
+            if not first:
+                fh.write('\n')
+            first = False
+            if isinstance(section, VerbatimSection):
+                section.write(fh)
+            else:
+                fh.write(section)
+        
+        return write
+    
+    def write(self, ledger: KnowledgeLedger, fh: TextIO,
+              format_section: Optional[Callable[[str], str]] = None):
+        """
+        Write the complete knowledge ledger to a file handle.
+        
+        Args:
+            ledger: KnowledgeLedger with all data
+            fh: Text file handle to write to
+            format_section: Optional function applied to each section before
+                it is written
+        """
+        for _ in self.stream(ledger, fh, format_section):
+            pass
     
     def validate(self, markdown: str, ledger: KnowledgeLedger) -> bool:
         """
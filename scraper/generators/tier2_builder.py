@@ -1,8 +1,8 @@
 """
 Tier 2 - Source Content builder.
 """
-from typing import List
-from models import Source
+from typing import List, Iterator, Tuple, Union
+from models import Source, VerbatimSection
 from utils import extract_references
 
 
@@ -19,49 +19,96 @@ class Tier2Builder:
         Returns:
             Markdown string for Tier 2
         """
-        sections = []
+        return '\n'.join(section if isinstance(section, str) else section.read()
+                         for section in self.iter_sections(sources))
+    
+    def iter_sections(self, sources: List[Source]) -> Iterator[Union[str, VerbatimSection]]:
+        """
+        Build the source content section one source at a time.
         
-        sections.append("## Source Content")
-        sections.append("")
+        Joining the yielded blocks with newlines gives the output of build().
+        The content of a spilled source is yielded as a VerbatimSection
+        between the text before and after it, so it is copied from its file
+        rather than read into memory.
         
-        for source in sources:
-            # Source header with metadata
-            sections.append(f"### [{source.id}] {source.title or source.name}")
-            sections.append("")
-            
-            # Metadata line
-            metadata_parts = [
-                f"**Type**: {source.source_type.value}",
-                f"**Authority**: {source.authority_score}"
-            ]
-            
-            # Add location based on type
-            if source.location.startswith('http'):
-                metadata_parts.append(f"**URL**: {source.location}")
-            else:
-                metadata_parts.append(f"**File**: {source.location}")
-            
-            sections.append(' | '.join(metadata_parts))
-            sections.append("")
+        Args:
+            sources: List of all sources
             
-            # Original content (preserved exactly)
-            sections.append("#### Original Content")
-            sections.append("")
-            sections.append(source.content)
-            sections.append("")
+        Yields:
+            The section header, then one markdown block per source
+        """
+        yield '\n'.join(["## Source Content", ""])
+        
+        for source in sources:
+            if not source.content_path:
+                yield self.build_source(source)
+                continue
             
-            # References section
-            if source.references:
-                sections.append("#### References from Source")
-                sections.append("")
-                for ref in source.references:
-                    sections.append(f"- {ref}")
-                sections.append("")
+            head, tail = self._source_parts(source)
+            yield '\n'.join(head)
+            yield VerbatimSection(source.content_path)
+            # The section renders with its own trailing newline
+            yield '\n'.join(tail[1:])
+    
+    def build_source(self, source: Source) -> str:
+        """
+        Build the markdown block of a single source.
+        
+        Args:
+            source: Source to render
             
-            # Cross-reference tag
-            sections.append(f"**Cross-Reference**: [{source.id}]")
+        Returns:
+            Markdown string for the source
+        """
+        head, tail = self._source_parts(source)
+        if source.content_path:
+            content = '\n'.join(source.iter_content_lines())
+        else:
+            content = source.content
+        return '\n'.join(head + [content] + tail)
+    
+    def _source_parts(self, source: Source) -> Tuple[List[str], List[str]]:
+        """Build the lines of a source's block before and after its original content."""
+        sections = []
+        
+        # Source header with metadata
+        sections.append(f"### [{source.id}] {source.title or source.name}")
+        sections.append("")
+        
+        # Metadata line
+        metadata_parts = [
+            f"**Type**: {source.source_type.value}",
+            f"**Authority**: {source.authority_score}"
+        ]
+        
+        # Add location based on type
+        if source.location.startswith('http'):
+            metadata_parts.append(f"**URL**: {source.location}")
+        else:
+            metadata_parts.append(f"**File**: {source.location}")
+        
+        sections.append(' | '.join(metadata_parts))
+        sections.append("")
+        
+        # Original content (preserved exactly)
+        sections.append("#### Original Content")
+        sections.append("")
+        head = sections
+        
+        sections = [""]
+        
+        # References section
+        if source.references:
+            sections.append("#### References from Source")
             sections.append("")
-            sections.append("---")
+            for ref in source.references:
+                sections.append(f"- {ref}")
             sections.append("")
         
-        return '\n'.join(sections)
+        # Cross-reference tag
+        sections.append(f"**Cross-Reference**: [{source.id}]")
+        sections.append("")
+        sections.append("---")
+        sections.append("")
+        
+        return head, sections
@@ -6,34 +6,155 @@ Processes URLs and documents into a structured knowledge ledger.
 """
 import argparse
 import sys
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 from pathlib import Path
-from typing import List
+from typing import List, Dict, Any, Iterator, Tuple, Optional
 from datetime import datetime
 
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from models import Source, ProcessedContent, KnowledgeLedger, SourceType
-from collectors import URLCollector, DocumentCollector
-from processors import ContentCleaner, ContentChunker, TopicExtractor, AuthorityScorer, QAChecker
+from models import Source, ProcessedContent, KnowledgeLedger, SourceType, SpilledText
+from collectors import URLCollector, DocumentCollector, DocumentJobs, ResponseCache
+from processors import (ContentCleaner, ContentChunker, TopicExtractor, AuthorityScorer,
+                        QAChecker, QACache, TopicModelCache, SourceDeduplicator,
+                        BoilerplateFilter)
 from generators import LedgerBuilder
-from utils import generate_source_id, extract_references, clean_text
+from manifest import SourceManifest
+from ledger_file import write_ledger_file
+from utils import generate_source_id, extract_references, clean_text, extract_domain
 
 
 console = Console()
 
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / '.cache'
+
 
 class KnowledgeLedgerAgent:
     """Main agent that orchestrates the knowledge ledger creation."""
     
-    def __init__(self):
-        self.url_collector = URLCollector()
-        self.doc_collector = DocumentCollector()
+    def __init__(self, concurrency: int = 1, per_host_limit: int = 2,
+                 cache_dir: Optional[str] = None, cache_size_mb: int = 512,
+                 http_cache: bool = True, qa_cache: bool = True,
+                 topic_cache: bool = True, incremental: bool = False,
+                 pdf_workers: int = 1, memory_budget_mb: Optional[int] = None,
+                 pdf_backend: str = 'auto', html_backend: str = 'lxml',
+                 chunk_size: Optional[int] = None,
+                 chunk_min_size: int = 0, chunk_overlap: int = 0,
+                 chunk_unit: str = 'chars', qa_mode: str = 'full',
+                 qa_sample_rate: float = 0.1, qa_workers: int = 1,
+                 topic_engine: str = 'tfidf', topic_refit_threshold: float = 0.2,
+                 dedup: bool = True, dedup_threshold: float = 0.8,
+                 boilerplate_sources: int = 5, boilerplate_mode: str = 'collapse',
+                 authority_head_chars: Optional[int] = 100_000,
+                 authority_tail_chars: int = 20_000):
+        """
+        Initialize the agent.
+        
+        Args:
+            concurrency: Maximum number of sources collected at the same time
+            per_host_limit: Maximum number of concurrent requests to a single host
+            cache_dir: Directory for caches and the incremental manifest
+            cache_size_mb: Maximum size of cached response bodies in megabytes
+            http_cache: Whether to cache and revalidate HTTP responses
+            qa_cache: Whether to reuse formatting and lint results of ledger
+                sections that have not changed
+            topic_cache: Whether incremental runs reuse the fitted topic model
+                while few sources were added or removed
+            incremental: Whether to reuse results of sources that have not changed
+            pdf_workers: Number of processes used to extract documents
+            memory_budget_mb: Megabytes of PDF text kept in memory per document;
+                larger documents are spilled to cache_dir and streamed
+            pdf_backend: PDF text engine ('auto', 'pdfium' or 'pdfplumber')
+            html_backend: HTML extraction engine ('lxml' or 'bs4')
+            chunk_size: Maximum chunk size, or None to chunk by headings and paragraphs
+            chunk_min_size: Smaller chunks are merged into the previous chunk
+            chunk_overlap: Size of the text repeated between consecutive chunks
+            chunk_unit: Unit of the chunk sizes ('chars' or 'tokens')
+            qa_mode: Which ledger sections are formatted and linted
+                ('full', 'changed', 'sample' or 'off')
+            qa_sample_rate: Fraction of sections formatted and linted in sample mode
+            qa_workers: Number of processes used to format and lint the ledger
+            topic_engine: Keyword extraction engine ('tfidf' or 'hashing')
+            topic_refit_threshold: Fraction of sources added or removed since
+                the cached topic model was fitted above which an incremental
+                run refits it
+            dedup: Drop near-duplicate sources, keeping the highest-authority copy
+            dedup_threshold: Minimum estimated Jaccard similarity of duplicates
+            boilerplate_sources: Chunks repeated in more sources than this are
+                removed as boilerplate (0 keeps every chunk)
+            boilerplate_mode: 'collapse' keeps the first copy of a boilerplate
+                chunk, 'drop' removes every copy
+            authority_head_chars: Characters at the start of long sources scanned
+                for authority signals (None scans all of every source)
+            authority_tail_chars: Characters at the end of long sources scanned
+                for authority signals
+        """
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        
+        self.response_cache = None
+        if cache_dir and http_cache:
+            self.response_cache = ResponseCache(
+                str(Path(cache_dir) / 'http'),
+                max_bytes=cache_size_mb * 1024 * 1024
+            )
+        
+        self.url_collector = URLCollector(
+            pool_maxsize=max(10, self.per_host_limit),
+            cache=self.response_cache,
+            html_backend=html_backend
+        )
+        spill_dir = None
+        memory_budget = None
+        if cache_dir and memory_budget_mb:
+            spill_dir = str(Path(cache_dir) / 'spill')
+            memory_budget = memory_budget_mb * 1024 * 1024
+        
+        self.doc_collector = DocumentCollector(
+            workers=pdf_workers,
+            spill_dir=spill_dir,
+            memory_budget=memory_budget,
+            pdf_backend=pdf_backend
+        )
+        
+        self.chunker = ContentChunker(
+            max_size=chunk_size,
+            min_size=chunk_min_size,
+            overlap=chunk_overlap,
+            unit=chunk_unit
+        )
+        
+        self.authority_scorer = AuthorityScorer(head_chars=authority_head_chars,
+                                                tail_chars=authority_tail_chars)
+        
+        self.manifest = None
+        if cache_dir and incremental:
+            self.manifest = SourceManifest(
+                str(Path(cache_dir) / 'ledger'),
+                settings={'chunker': self.chunker.settings(),
+                          'authority': self.authority_scorer.settings()}
+            )
         self.cleaner = ContentCleaner()
-        self.chunker = ContentChunker()
-        self.topic_extractor = TopicExtractor(max_topics=10)
-        self.authority_scorer = AuthorityScorer()
-        self.qa_checker = QAChecker()
+        topic_model_cache = None
+        if cache_dir and incremental and topic_cache:
+            topic_model_cache = TopicModelCache(str(Path(cache_dir) / 'topics'),
+                                                settings={'engine': topic_engine})
+        self.topic_extractor = TopicExtractor(max_topics=10, engine=topic_engine,
+                                              cache=topic_model_cache,
+                                              refit_threshold=topic_refit_threshold)
+        self.deduplicator = SourceDeduplicator(threshold=dedup_threshold) if dedup else None
+        self.boilerplate_filter = None
+        if boilerplate_sources > 0:
+            self.boilerplate_filter = BoilerplateFilter(max_sources=boilerplate_sources,
+                                                        mode=boilerplate_mode)
+        section_cache = None
+        if cache_dir and qa_cache:
+            section_cache = QACache(str(Path(cache_dir) / 'qa'), settings=QAChecker.settings())
+        self.qa_checker = QAChecker(mode=qa_mode, cache=section_cache, sample_rate=qa_sample_rate,
+                                    workers=max(1, qa_workers))
         self.ledger_builder = LedgerBuilder()
     
     def process(self, urls: List[str] = None, folder: str = None) -> KnowledgeLedger:
@@ -67,60 +188,108 @@ class KnowledgeLedgerAgent:
             console.print("[red]Error: No URLs or documents to process[/red]")
             return KnowledgeLedger(sources=[], processed_contents=[], topics=[])
         
-        # Process each source
+        # Collect each source
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
         ) as progress:
             task = progress.add_task("Processing sources...", total=len(locations))
-            
-            for i, location in enumerate(locations):
-                progress.update(task, description=f"Processing {i+1}/{len(locations)}: {location[:50]}...")
-                
-                # Collect content
-                collector = self._get_collector(location)
-                if not collector:
-                    console.print(f"[yellow]Skipping unsupported source: {location}[/yellow]")
-                    continue
-                
-                data = collector.collect(location)
-                
-                # Create source
-                source_id = generate_source_id(len(sources) + 1)
-                source_type = self.authority_scorer.classify_type(data['content'], data['metadata'])
-                authority = self.authority_scorer.score(source_type, data['content'], data['metadata'])
+            collected = self._collect_all(locations, progress, task)
+        
+        # Score each collected source
+        scored = []
+        for location, data in collected:
+            content_path = data.get('content_path')
+            entry = None
+            if self.manifest:
+                entry = self.manifest.lookup(location, data['content'], content_path)
+            if entry:
+                # Unchanged since the last run; reuse its scoring, and its
+                # processed content unless it was dropped as a duplicate
+                source_type = SourceManifest.source_type(entry)
+                authority = entry['authority_score']
+                references = entry['references']
+            else:
+                # A spilled source is scored on its whole text rather than
+                # the preview, reading it from disk
+                content = SpilledText(content_path) if content_path else data['content']
+                result = self.authority_scorer.evaluate(content, data['metadata'])
+                source_type = result.source_type
+                authority = result.score
                 
                 # Extract references
-                references = extract_references(data['content'])
-                
-                source = Source(
-                    id=source_id,
-                    name=data['title'],
-                    source_type=source_type,
-                    authority_score=authority,
-                    location=location,
-                    content=data['content'],
-                    title=data['title'],
-                    metadata=data['metadata'],
-                    references=references
-                )
-                
-                sources.append(source)
-                progress.advance(task)
+                references = extract_references(content)
+            
+            scored.append((location, data, entry, source_type, authority, references))
         
-        console.print(f"[green]✓[/green] Collected {len(sources)} sources")
+        # Keep only the highest-authority copy of near-duplicate sources
+        aliases = self._find_duplicates(scored) if self.deduplicator else {}
+        duplicates = {i for group in aliases.values() for i in group}
+        
+        # Create sources in input order so IDs are stable across runs
+        cached_entries = {}
+        for i, (location, data, entry, source_type, authority, references) in enumerate(scored):
+            if i in duplicates:
+                continue
+            source_id = generate_source_id(len(sources) + 1)
+            if entry and SourceManifest.has_processed(entry):
+                cached_entries[source_id] = entry
+            
+            metadata = {key: value for key, value in data['metadata'].items() if key != 'aliases'}
+            if i in aliases:
+                metadata['aliases'] = [scored[j][0] for j in aliases[i]]
+            
+            source = Source(
+                id=source_id,
+                name=data['title'],
+                source_type=source_type,
+                authority_score=authority,
+                location=location,
+                content=data['content'],
+                title=data['title'],
+                metadata=metadata,
+                references=references,
+                content_path=data.get('content_path')
+            )
+            
+            sources.append(source)
+        
+        console.print(f"[green]✓[/green] Collected {len(sources)} sources"
+                      + (f" ({len(duplicates)} near-duplicates dropped)" if duplicates else ""))
+        
+        connection_stats = self.url_collector.connection_stats()
+        if connection_stats:
+            requests_sent = sum(host['requests'] for host in connection_stats.values())
+            reused = sum(host['reused'] for host in connection_stats.values())
+            console.print(f"  HTTP: {requests_sent} requests to {len(connection_stats)} hosts, "
+                          f"{reused} reused connections")
         
         # Process content
         console.print("Processing content...")
         processed_contents = []
         
         for source in sources:
-            # Clean content
-            cleaned = self.cleaner.clean(source.content)
+            if source.id in cached_entries:
+                processed_contents.append(
+                    self.manifest.restore_processed(source.location, cached_entries[source.id],
+                                                    source.id)
+                )
+                continue
             
-            # Chunk content
-            chunks = self.chunker.chunk(cleaned)
+            if source.content_path:
+                # Stream spilled content through the cleaner into a file next
+                # to it; the chunks are spans of that file, read when needed
+                cleaned = ''
+                spilled = SpilledText(str(Path(source.content_path).with_suffix('.cleaned.txt')))
+                lines = spilled.write_lines(self.cleaner.clean_lines(source.iter_content_lines()))
+                chunks = list(self.chunker.chunk_lines(lines, spilled))
+            else:
+                # Clean content
+                cleaned = self.cleaner.clean(source.content)
+                
+                # Chunk content
+                chunks = self.chunker.chunk(cleaned)
             
             processed = ProcessedContent(
                 source_id=source.id,
@@ -129,7 +298,26 @@ class KnowledgeLedgerAgent:
             )
             processed_contents.append(processed)
         
-        console.print(f"[green]✓[/green] Processed {len(processed_contents)} sources")
+        console.print(f"[green]✓[/green] Processed {len(processed_contents)} sources"
+                      + (f" ({len(cached_entries)} unchanged)" if self.manifest else ""))
+        
+        if self.manifest:
+            for source, processed in zip(sources, processed_contents):
+                self.manifest.record(source, processed)
+            # Dropped duplicates are kept so they are not collected and scored again
+            for i in duplicates:
+                location, data, _, source_type, authority, references = scored[i]
+                self.manifest.record_duplicate(location, data, source_type, authority, references)
+            self.manifest.prune(location for location, *_ in scored)
+            self.manifest.save()
+        
+        # Remove chunks repeated across many sources; the manifest keeps them
+        # since which chunks are boilerplate depends on the other sources
+        if self.boilerplate_filter:
+            stats = self.boilerplate_filter.filter(processed_contents)
+            if stats.chunks_removed:
+                console.print(f"[green]✓[/green] Removed {stats.chunks_removed} boilerplate chunks "
+                              f"({stats.groups} distinct, {stats.bytes_removed / 1024:.1f} KB)")
         
         # Extract topics
         console.print("Extracting topics...")
@@ -145,6 +333,170 @@ class KnowledgeLedgerAgent:
         
         return ledger
     
+    def _find_duplicates(self, scored: List[Tuple]) -> Dict[int, List[int]]:
+        """
+        Find near-duplicate sources among the scored collected sources.
+        
+        Args:
+            scored: (location, data, manifest entry, type, authority,
+                references) tuples in input order
+            
+        Returns:
+            Indexes of the duplicates dropped in favour of each kept source,
+            keyed by the kept source's index; the kept source has the highest
+            authority score of its group, the earliest one on ties
+        """
+        signatures = []
+        for location, data, *_ in scored:
+            if data['metadata'].get('error'):
+                # Error messages of different failed sources look alike
+                signatures.append(None)
+            elif data.get('content_path'):
+                with open(data['content_path'], 'r', encoding='utf-8') as f:
+                    signatures.append(self.deduplicator.signature(f))
+            else:
+                signatures.append(self.deduplicator.signature(data['content']))
+        
+        aliases = {}
+        for group in self.deduplicator.groups(signatures):
+            kept = max(group, key=lambda i: (scored[i][4], -i))
+            aliases[kept] = [i for i in group if i != kept]
+        return aliases
+    
+    def _collect_all(self, locations: List[str], progress: Progress,
+                     task) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Collect raw data for every location.
+        
+        Sources are fetched in parallel when concurrency is above 1 and
+        documents are extracted in worker processes when the document
+        collector has more than one worker, but the results are always
+        returned in input order so source IDs stay deterministic regardless
+        of which source finishes first.
+        
+        Args:
+            locations: URLs and file paths to collect
+            progress: Progress display to update
+            task: Progress task ID
+            
+        Returns:
+            List of (location, collected data) tuples in input order
+        """
+        results: List[Any] = [None] * len(locations)
+        jobs = []
+        doc_jobs = []
+        
+        for i, location in enumerate(locations):
+            collector = self._get_collector(location)
+            if not collector:
+                console.print(f"[yellow]Skipping unsupported source: {location}[/yellow]")
+                progress.advance(task)
+                continue
+            
+            if self.manifest and collector is self.doc_collector:
+                cached = self.manifest.cached_document(location)
+                if cached:
+                    results[i] = cached
+                    progress.advance(task)
+                    continue
+            
+            if collector is self.doc_collector and self.doc_collector.workers > 1:
+                doc_jobs.append((i, location))
+            else:
+                jobs.append((i, location, collector))
+        
+        total = len(jobs) + len(doc_jobs)
+        done = 0
+        
+        # The process pool starts before any URL thread, so its workers are
+        # never forked from a process with running threads
+        doc_pool = None
+        documents = None
+        if doc_jobs:
+            doc_pool = ProcessPoolExecutor(max_workers=self.doc_collector.workers)
+            documents = self.doc_collector.submit(doc_pool,
+                                                  [location for _, location in doc_jobs])
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                # Documents are extracted in worker processes while URLs download
+                for i, location, data in self._collect_scheduled(executor, jobs,
+                                                                 documents, doc_jobs):
+                    results[i] = data
+                    done += 1
+                    progress.update(task, description=f"Collected {done}/{total}: {location[:50]}...")
+                    progress.advance(task)
+        finally:
+            if doc_pool is not None:
+                doc_pool.shutdown(cancel_futures=True)
+            if self.response_cache:
+                self.response_cache.flush()
+        
+        return [(locations[i], data) for i, data in enumerate(results) if data is not None]
+    
+    def _collect_scheduled(self, executor: ThreadPoolExecutor, jobs: List[Tuple[int, str, Any]],
+                           documents: Optional[DocumentJobs] = None,
+                           doc_jobs: Optional[List[Tuple[int, str]]] = None
+                           ) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Collect jobs in the executor without exceeding the per-host limit.
+        
+        Jobs wait in a queue per host and are only submitted while their
+        host has a free slot, so workers never sit blocked on a busy host
+        while sources on other hosts are waiting. Hosts with queued jobs
+        take turns; documents are not limited per host. Documents already
+        submitted to a process pool are waited on together with the jobs.
+        
+        Args:
+            executor: Pool the jobs are collected in
+            jobs: (index, location, collector) tuples in input order
+            documents: Documents submitted to a process pool
+            doc_jobs: (index, location) of each of the submitted documents
+            
+        Yields:
+            (index, location, collected data) as each job completes
+        """
+        queues: Dict[Optional[str], deque] = {}
+        for job in jobs:
+            host = extract_domain(job[1]) if job[2] is self.url_collector else None
+            queues.setdefault(host, deque()).append(job)
+        
+        # Hosts with queued jobs and a free slot, in turn order
+        ready = deque(queues)
+        running = {host: 0 for host in queues}
+        futures: Dict[Future, Tuple[int, str, Optional[str]]] = {}
+        
+        def has_slot(host: Optional[str]) -> bool:
+            return host is None or running[host] < self.per_host_limit
+        
+        while ready or futures or (documents and documents.futures):
+            while ready and len(futures) < self.concurrency:
+                host = ready.popleft()
+                i, location, collector = queues[host].popleft()
+                futures[executor.submit(collector.collect, location)] = (i, location, host)
+                running[host] += 1
+                if queues[host] and has_slot(host):
+                    ready.append(host)
+            
+            waiting = list(futures)
+            if documents:
+                waiting.extend(documents.futures)
+            finished, _ = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future not in futures:
+                    collected = documents.complete(future)
+                    if collected is not None:
+                        j, data = collected
+                        yield doc_jobs[j][0], doc_jobs[j][1], data
+                    continue
+                
+                i, location, host = futures.pop(future)
+                running[host] -= 1
+                # A host at its limit left the turn order; it rejoins once a slot frees
+                if queues[host] and host is not None and running[host] == self.per_host_limit - 1:
+                    ready.append(host)
+                yield i, location, future.result()
+    
     def _get_collector(self, location: str):
         """Get appropriate collector for a location."""
         if self.url_collector.can_handle(location):
@@ -165,8 +517,38 @@ class KnowledgeLedgerAgent:
         # Run QA checks
         console.print("Running QA checks...")
         qa_results = self.qa_checker.check_all(markdown)
+        self._report_qa(qa_results)
+        
+        return markdown
+    
+    def write_markdown(self, ledger: KnowledgeLedger, output_path: str):
+        """
+        Generate the knowledge ledger straight into a file.
         
-        # Report results
+        Sections are formatted, written and checked one at a time, so memory
+        use does not grow with the size of the ledger.
+        """
+        console.print("Generating knowledge ledger...")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            qa_results = self.qa_checker.check_sections(
+                self.ledger_builder.iter_sections(ledger),
+                write=self.ledger_builder.section_writer(f)
+            )
+        
+        if self.qa_checker.cache and self.qa_checker.mode != 'off':
+            # Every section was looked up, so anything else is stale
+            self.qa_checker.cache.prune()
+        
+        console.print(
+            f"QA ({self.qa_checker.mode}): linted {qa_results['sections_linted']} "
+            f"of {qa_results['sections']} sections "
+            f"({qa_results['sections_cached']} from cache)"
+        )
+        self._report_qa(qa_results)
+        console.print(f"[green]✓[/green] Saved to: {output_path}")
+    
+    def _report_qa(self, qa_results: Dict[str, Any]):
+        """Print the results of the QA checks."""
         has_errors = False
         
         # Structure errors
@@ -197,8 +579,11 @@ class KnowledgeLedgerAgent:
             console.print("[green]✓[/green] QA Checks passed")
         else:
             console.print("[yellow]⚠[/yellow] QA Checks completed with issues")
-        
-        return markdown
+    
+    def write_ledger_file(self, ledger: KnowledgeLedger, output_path: str):
+        """Save the ledger as a binary ledger file for the content pipeline."""
+        write_ledger_file(ledger, output_path)
+        console.print(f"[green]✓[/green] Saved to: {output_path}")
     
     def save_markdown(self, markdown: str, output_path: str):
         """Save markdown to file."""
@@ -226,6 +611,175 @@ def main():
         default='knowledge_ledger.md',
         help='Output markdown file (default: knowledge_ledger.md)'
     )
+    parser.add_argument(
+        '--ledger-file',
+        help='Binary ledger file written alongside the markdown '
+             '(default: the output path with a .ledger suffix)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Number of sources to collect in parallel (default: 1)'
+    )
+    parser.add_argument(
+        '--per-host-limit',
+        type=int,
+        default=2,
+        help='Maximum parallel requests to a single host (default: 2)'
+    )
+    parser.add_argument(
+        '--pdf-workers',
+        type=int,
+        default=1,
+        help='Number of processes used to extract PDFs and documents (default: 1)'
+    )
+    parser.add_argument(
+        '--pdf-backend',
+        choices=['auto', 'pdfium', 'pdfplumber'],
+        default='auto',
+        help='PDF text engine; auto uses pdfium when installed and falls back '
+             'to pdfplumber per page (default: auto)'
+    )
+    parser.add_argument(
+        '--html-backend',
+        choices=['lxml', 'bs4'],
+        default='lxml',
+        help='HTML extraction engine; lxml reads title, content and metadata '
+             'in one walk over the parsed page, bs4 uses BeautifulSoup '
+             '(same results; default: lxml)'
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        help='Megabytes of text kept in memory per PDF; larger PDFs are '
+             'spilled to the cache directory and streamed'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help='Maximum chunk size; chunks are packed from paragraphs and long '
+             'paragraphs are split at sentence boundaries (default: chunk by '
+             'headings and paragraphs)'
+    )
+    parser.add_argument(
+        '--chunk-min-size',
+        type=int,
+        default=0,
+        help='Merge chunks smaller than this into the previous chunk of the '
+             'same section (default: 0)'
+    )
+    parser.add_argument(
+        '--chunk-overlap',
+        type=int,
+        default=0,
+        help='Size of the text repeated at the start of the next chunk (default: 0)'
+    )
+    parser.add_argument(
+        '--chunk-unit',
+        choices=['chars', 'tokens'],
+        default='chars',
+        help='Unit of the chunk sizes (default: chars)'
+    )
+    parser.add_argument(
+        '--qa',
+        choices=list(QAChecker.QA_MODES),
+        default='full',
+        help='Which ledger sections to format and lint: full, changed (only '
+             'sections that changed since the last run), sample or off (default: full)'
+    )
+    parser.add_argument(
+        '--qa-sample-rate',
+        type=float,
+        default=0.1,
+        help='Fraction of sections formatted and linted with --qa=sample (default: 0.1)'
+    )
+    parser.add_argument(
+        '--qa-workers',
+        type=int,
+        default=1,
+        help='Number of processes used to format and lint the ledger (default: 1)'
+    )
+    parser.add_argument(
+        '--topic-engine',
+        choices=list(TopicExtractor.ENGINES),
+        default='tfidf',
+        help='Keyword extraction: tfidf (in-memory vocabulary) or hashing '
+             '(streamed in batches, fixed memory for large corpora) (default: tfidf)'
+    )
+    parser.add_argument(
+        '--topic-refit-threshold',
+        type=float,
+        default=0.2,
+        help='With --incremental, refit the cached topic model once this fraction of '
+             'sources was added or removed since it was fitted; 0 refits on any change '
+             '(default: 0.2)'
+    )
+    parser.add_argument(
+        '--no-dedup',
+        action='store_true',
+        help='Keep near-duplicate sources (syndicated copies, AMP pages, mirrored PDFs)'
+    )
+    parser.add_argument(
+        '--dedup-threshold',
+        type=float,
+        default=0.8,
+        help='Minimum similarity (0-1) of near-duplicate sources (default: 0.8)'
+    )
+    parser.add_argument(
+        '--boilerplate-sources',
+        type=int,
+        default=5,
+        help='Remove chunks repeated in more than this many sources, such as cookie '
+             'banners and license footers; 0 keeps every chunk (default: 5)'
+    )
+    parser.add_argument(
+        '--boilerplate-mode',
+        choices=list(BoilerplateFilter.MODES),
+        default='collapse',
+        help='collapse keeps the first copy of a boilerplate chunk, drop removes '
+             'every copy (default: collapse)'
+    )
+    parser.add_argument(
+        '--authority-head',
+        type=int,
+        default=100_000,
+        help='Characters at the start of a long source scanned for authority signals; '
+             '0 scans whole sources (default: 100000)'
+    )
+    parser.add_argument(
+        '--authority-tail',
+        type=int,
+        default=20_000,
+        help='Characters at the end of a long source scanned for authority signals, '
+             'in addition to its references section (default: 20000)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help='Directory for the HTTP, QA and topic model caches, spilled documents '
+             'and the --incremental manifest (default: scraper/.cache)'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=512,
+        help='Maximum size of the HTTP response cache in MB (default: 512)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the on-disk caches: always download URLs instead of '
+             'revalidating cached responses, format and lint every ledger '
+             'section instead of reusing results of unchanged sections, and '
+             'refit the topic model on every run'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only reprocess sources whose content changed since the last run, '
+             'and reuse the topic model while few sources changed'
+    )
     
     args = parser.parse_args()
     
@@ -238,7 +792,35 @@ def main():
     # Run agent
     console.print("\n[bold blue]Knowledge Ledger Agent[/bold blue]\n")
     
-    agent = KnowledgeLedgerAgent()
+    agent = KnowledgeLedgerAgent(
+        concurrency=args.concurrency,
+        per_host_limit=args.per_host_limit,
+        cache_dir=args.cache_dir,
+        cache_size_mb=args.cache_size,
+        http_cache=not args.no_cache,
+        qa_cache=not args.no_cache,
+        topic_cache=not args.no_cache,
+        incremental=args.incremental,
+        pdf_workers=args.pdf_workers,
+        memory_budget_mb=args.memory_budget,
+        pdf_backend=args.pdf_backend,
+        html_backend=args.html_backend,
+        chunk_size=args.chunk_size,
+        chunk_min_size=args.chunk_min_size,
+        chunk_overlap=args.chunk_overlap,
+        chunk_unit=args.chunk_unit,
+        qa_mode=args.qa,
+        qa_sample_rate=args.qa_sample_rate,
+        qa_workers=args.qa_workers,
+        topic_engine=args.topic_engine,
+        topic_refit_threshold=args.topic_refit_threshold,
+        dedup=not args.no_dedup,
+        dedup_threshold=args.dedup_threshold,
+        boilerplate_sources=args.boilerplate_sources,
+        boilerplate_mode=args.boilerplate_mode,
+        authority_head_chars=args.authority_head or None,
+        authority_tail_chars=args.authority_tail
+    )
     
     try:
         # Process sources
@@ -248,17 +830,17 @@ def main():
             console.print("[red]No sources were successfully processed[/red]")
             sys.exit(1)
         
-        # Generate markdown
-        markdown = agent.generate_markdown(ledger)
-        
-        # Save
-        agent.save_markdown(markdown, args.output)
+        # Generate, check and save markdown
+        agent.write_markdown(ledger, args.output)
+        ledger_file = args.ledger_file or str(Path(args.output).with_suffix('.ledger'))
+        agent.write_ledger_file(ledger, ledger_file)
         
         # Summary
         console.print(f"\n[bold green]Summary:[/bold green]")
         console.print(f"  Sources: {len(ledger.sources)}")
         console.print(f"  Topics: {len(ledger.topics)}")
         console.print(f"  Output: {args.output}")
+        console.print(f"  Ledger file: {ledger_file}")
         
     except Exception as e:
         console.print(f"[red]Error: {str(e)}[/red]")
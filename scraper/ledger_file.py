@@ -0,0 +1,421 @@
+"""
+Binary knowledge ledger file.
+
+Stores a complete KnowledgeLedger (sources, processed content, chunks and
+topics) so later pipeline steps do not have to parse the markdown ledger.
+The full content of sources that were spilled to disk is stored too, so
+the file does not depend on spill files that later runs may replace.
+Strings are stored as UTF-8 blobs and every record refers to them by
+(offset, length), so a reader can memory-map a file of any size and decode
+only the sources or chunks it asks for.
+
+Layout:
+    header      magic, version, table offsets and record counts
+    blobs       strings and JSON, in the order they were written
+    tables      fixed-size source, processed content, chunk and topic
+                records, then source and processed content IDs sorted for
+                binary search
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from models import (KnowledgeLedger, Source, SourceType, ProcessedContent, ContentChunk,
+                    Topic)
+
+
+MAGIC = b'KLEDGER\x00'
+# Bump when the layout changes; readers refuse other versions
+FORMAT_VERSION = 1
+
+# Offset of a missing (None) string
+NONE = 0xFFFFFFFFFFFFFFFF
+
+HEADER = struct.Struct('<8sII' + 'QQ' + 'QQ' * 4 + 'QQ')
+# id, name, location, content, title, source_type, metadata, references,
+# extracted_at; authority_score
+SOURCE_RECORD = struct.Struct('<' + 'QQ' * 9 + 'q')
+# source_id, cleaned_text, topics; first chunk, chunk count
+PROCESSED_RECORD = struct.Struct('<' + 'QQ' * 3 + 'QQ')
+# text, heading, metadata; start and end in the cleaned text (NONE when the
+# chunk has its own text); level; processed content index
+CHUNK_RECORD = struct.Struct('<' + 'QQ' * 3 + 'QQ' + 'qQ')
+# name, description, keywords, source_ids; relevance_score
+TOPIC_RECORD = struct.Struct('<' + 'QQ' * 4 + 'd')
+INDEX_ENTRY = struct.Struct('<Q')
+
+ENCODING = 'utf-8'
+ERRORS = 'surrogatepass'
+
+
+class _BlobWriter:
+    """Appends strings to a file and returns their (offset, length)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def write(self, data: bytes) -> Tuple[int, int]:
+        start = self.offset
+        self.f.write(data)
+        self.offset += len(data)
+        return start, len(data)
+
+    def text(self, text: Optional[str]) -> Tuple[int, int]:
+        if text is None:
+            return NONE, 0
+        return self.write(text.encode(ENCODING, ERRORS))
+
+    def json(self, value: Any) -> Tuple[int, int]:
+        if value is None:
+            return NONE, 0
+        return self.text(json.dumps(value, default=str))
+
+    def lines(self, lines: Iterator[str]) -> Tuple[int, int]:
+        """Write lines joined with newlines, one line at a time."""
+        start = self.offset
+        for index, line in enumerate(lines):
+            if index:
+                self.write(b'\n')
+            self.write(line.encode(ENCODING, ERRORS))
+        return start, self.offset - start
+
+
+def write_ledger_file(ledger: KnowledgeLedger, path: str):
+    """
+    Write a ledger to a binary ledger file.
+
+    Source content that was spilled to disk is streamed into the file, so
+    it is never held in memory. The file is replaced atomically.
+
+    Args:
+        ledger: Ledger to write
+        path: Output file path
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\x00' * HEADER.size)
+        blobs = _BlobWriter(f)
+        created_at = blobs.text(ledger.created_at.isoformat())
+
+        sources = []
+        for source in ledger.sources:
+            content = blobs.lines(source.iter_content_lines())
+            sources.append(SOURCE_RECORD.pack(
+                *blobs.text(source.id), *blobs.text(source.name), *blobs.text(source.location),
+                *content, *blobs.text(source.title), *blobs.text(source.source_type.value),
+                *blobs.json(source.metadata), *blobs.json(source.references),
+                *blobs.text(source.extracted_at.isoformat()), source.authority_score
+            ))
+
+        processed_records = []
+        chunks = []
+        for processed in ledger.processed_contents:
+            cleaned_text = blobs.text(processed.cleaned_text)
+            processed_records.append(PROCESSED_RECORD.pack(
+                *blobs.text(processed.source_id), *cleaned_text, *blobs.json(processed.topics),
+                len(chunks), len(processed.chunks)
+            ))
+            chunks.extend(_chunk_records(blobs, processed, cleaned_text[0],
+                                         len(processed_records) - 1))
+
+        topics = [
+            TOPIC_RECORD.pack(
+                *blobs.text(topic.name), *blobs.text(topic.description),
+                *blobs.json(topic.keywords), *blobs.json(topic.source_ids),
+                topic.relevance_score
+            )
+            for topic in ledger.topics
+        ]
+
+        tables = []
+        for records in (sources, processed_records, chunks, topics):
+            tables.append(blobs.offset)
+            for record in records:
+                blobs.write(record)
+        for ids in ([source.id for source in ledger.sources],
+                    [processed.source_id for processed in ledger.processed_contents]):
+            tables.append(blobs.offset)
+            for index in sorted(range(len(ids)), key=ids.__getitem__):
+                blobs.write(INDEX_ENTRY.pack(index))
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, 0, *created_at,
+            tables[0], len(sources), tables[1], len(processed_records),
+            tables[2], len(chunks), tables[3], len(topics),
+            tables[4], tables[5]
+        ))
+
+    os.replace(tmp_path, path)
+
+
+def _chunk_records(blobs: _BlobWriter, processed: ProcessedContent, cleaned_offset: int,
+                   processed_index: int) -> List[bytes]:
+    """Pack the chunks of a processed content, pointing into its cleaned text when possible."""
+    records = []
+    cleaned_text = processed.cleaned_text
+    # Byte offset of a character offset in the cleaned text, advanced
+    # incrementally as chunk starts normally increase
+    position = (0, 0)
+
+    def byte_offset(char_offset: int) -> int:
+        nonlocal position
+        chars, offset = position if char_offset >= position[0] else (0, 0)
+        offset += len(cleaned_text[chars:char_offset].encode(ENCODING, ERRORS))
+        position = (char_offset, offset)
+        return offset
+
+    for chunk in processed.chunks:
+        if chunk.buffer is cleaned_text:
+            start = byte_offset(chunk.start)
+            end = start + len(cleaned_text[chunk.start:chunk.end].encode(ENCODING, ERRORS))
+            text = (cleaned_offset + start, end - start)
+            span = (chunk.start, chunk.end)
+        else:
+            text = blobs.text(chunk.text)
+            span = (NONE, NONE)
+        records.append(CHUNK_RECORD.pack(
+            *text, *blobs.text(chunk.heading), *blobs.json(chunk._metadata or None),
+            *span, chunk.level, processed_index
+        ))
+    return records
+
+
+class _SortedIds:
+    """Sequence of a table's IDs in sorted order, read from the file on access."""
+
+    def __init__(self, ledger_file: 'LedgerFile', ids_offset: int, count: int,
+                 table_offset: int, record: struct.Struct):
+        self.ledger_file = ledger_file
+        self.ids_offset = ids_offset
+        self.count = count
+        self.table_offset = table_offset
+        self.record = record
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, position: int) -> str:
+        # The ID is the first string of every record
+        offset = self.table_offset + self.index_at(position) * self.record.size
+        return self.ledger_file._text(*struct.unpack_from('<QQ', self.ledger_file._map, offset))
+
+    def index_at(self, position: int) -> int:
+        """Position in the table of the record with the given sorted position."""
+        return INDEX_ENTRY.unpack_from(self.ledger_file._map,
+                                       self.ids_offset + position * INDEX_ENTRY.size)[0]
+
+
+class LedgerFile:
+    """
+    Read-only, memory-mapped view of a binary ledger file.
+
+    Records are decoded on access; nothing is loaded up front beyond the
+    header.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a ledger file.
+
+        Args:
+            path: Path of a file written by write_ledger_file()
+
+        Raises:
+            ValueError: If the file is not a ledger file of this version
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a ledger file: {path}")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"Not a ledger file: {path}")
+        header = HEADER.unpack_from(self._map, 0)
+        if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a ledger file of version {FORMAT_VERSION}: {path}")
+
+        self._created_at = header[3:5]
+        (self._sources_offset, self.source_count, self._processed_offset, self.processed_count,
+         self._chunks_offset, self.chunk_count, self._topics_offset, self.topic_count,
+         self._source_ids_offset, self._processed_ids_offset) = header[5:]
+
+    def __enter__(self) -> 'LedgerFile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap and close the file."""
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    @property
+    def created_at(self) -> datetime:
+        """When the ledger was created."""
+        return datetime.fromisoformat(self._text(*self._created_at))
+
+    def source(self, index: int) -> Source:
+        """
+        Get a source by its position in the ledger.
+
+        Args:
+            index: Position of the source
+
+        Returns:
+            The source, with its full content; a source that was spilled
+            when written is returned with its content in memory and no
+            content_path
+        """
+        record = SOURCE_RECORD.unpack_from(self._map, self._record_offset(
+            self._sources_offset, SOURCE_RECORD, index, self.source_count))
+        return Source(
+            id=self._text(*record[0:2]),
+            name=self._text(*record[2:4]),
+            location=self._text(*record[4:6]),
+            content=self._text(*record[6:8]),
+            title=self._text(*record[8:10]),
+            source_type=SourceType(self._text(*record[10:12])),
+            metadata=self._json(*record[12:14]) or {},
+            references=self._json(*record[14:16]) or [],
+            extracted_at=datetime.fromisoformat(self._text(*record[16:18])),
+            authority_score=record[18]
+        )
+
+    def source_by_id(self, source_id: str) -> Optional[Source]:
+        """Get a source by its ID, or None if the ledger has no such source."""
+        index = self._find(self._source_ids_offset, self.source_count, source_id,
+                           self._sources_offset, SOURCE_RECORD)
+        return None if index is None else self.source(index)
+
+    def iter_sources(self) -> Iterator[Source]:
+        """Iterate over the sources in ledger order."""
+        for index in range(self.source_count):
+            yield self.source(index)
+
+    def processed_content(self, index: int) -> ProcessedContent:
+        """
+        Get processed content by its position in the ledger.
+
+        The chunks are spans of the cleaned text, as they were when written.
+
+        Args:
+            index: Position of the processed content
+
+        Returns:
+            The processed content with its chunks
+        """
+        record = self._processed_record(index)
+        cleaned_text = self._text(*record[2:4])
+        chunks = [self._chunk(record[6] + offset, cleaned_text) for offset in range(record[7])]
+        return ProcessedContent(
+            source_id=self._text(*record[0:2]),
+            chunks=chunks,
+            cleaned_text=cleaned_text,
+            topics=self._json(*record[4:6]) or []
+        )
+
+    def processed_content_by_id(self, source_id: str) -> Optional[ProcessedContent]:
+        """Get the processed content of a source by the source's ID, or None."""
+        index = self._find(self._processed_ids_offset, self.processed_count, source_id,
+                           self._processed_offset, PROCESSED_RECORD)
+        return None if index is None else self.processed_content(index)
+
+    def chunk_range(self, index: int) -> range:
+        """Get the positions of the chunks of a processed content."""
+        record = self._processed_record(index)
+        return range(record[6], record[6] + record[7])
+
+    def chunk(self, index: int) -> ContentChunk:
+        """
+        Get a chunk by its position in the ledger, decoding only its own text.
+
+        Args:
+            index: Position of the chunk
+
+        Returns:
+            The chunk, with its own copy of its text
+        """
+        return self._chunk(index)
+
+    def topics(self) -> List[Topic]:
+        """Get all topics."""
+        topics = []
+        for index in range(self.topic_count):
+            record = TOPIC_RECORD.unpack_from(self._map, self._record_offset(
+                self._topics_offset, TOPIC_RECORD, index, self.topic_count))
+            topics.append(Topic(
+                name=self._text(*record[0:2]),
+                description=self._text(*record[2:4]),
+                keywords=self._json(*record[4:6]) or [],
+                source_ids=self._json(*record[6:8]) or [],
+                relevance_score=record[8]
+            ))
+        return topics
+
+    def load(self) -> KnowledgeLedger:
+        """Load the whole ledger into memory, including the full content of spilled sources."""
+        return KnowledgeLedger(
+            sources=list(self.iter_sources()),
+            processed_contents=[self.processed_content(index)
+                                for index in range(self.processed_count)],
+            topics=self.topics(),
+            created_at=self.created_at
+        )
+
+    def _chunk(self, index: int, cleaned_text: Optional[str] = None) -> ContentChunk:
+        """Decode a chunk, as a span of cleaned_text when given and possible."""
+        record = CHUNK_RECORD.unpack_from(self._map, self._record_offset(
+            self._chunks_offset, CHUNK_RECORD, index, self.chunk_count))
+        heading = self._text(*record[2:4])
+        metadata = self._json(*record[4:6])
+        start, end, level = record[6:9]
+        if cleaned_text is not None and start != NONE:
+            return ContentChunk(buffer=cleaned_text, start=start, end=end,
+                                heading=heading, level=level, metadata=metadata)
+        return ContentChunk(self._text(*record[0:2]), heading=heading, level=level,
+                            metadata=metadata)
+
+    def _processed_record(self, index: int) -> Tuple:
+        return PROCESSED_RECORD.unpack_from(self._map, self._record_offset(
+            self._processed_offset, PROCESSED_RECORD, index, self.processed_count))
+
+    def _find(self, ids_offset: int, count: int, source_id: str, table_offset: int,
+              record: struct.Struct) -> Optional[int]:
+        """Binary search the sorted IDs of a table for the position of a record."""
+        ids = _SortedIds(self, ids_offset, count, table_offset, record)
+        position = bisect.bisect_left(ids, source_id)
+        if position < count and ids[position] == source_id:
+            return ids.index_at(position)
+        return None
+
+    @staticmethod
+    def _record_offset(table_offset: int, record: struct.Struct, index: int, count: int) -> int:
+        if not 0 <= index < count:
+            raise IndexError(index)
+        return table_offset + index * record.size
+
+    def _text(self, offset: int, length: int) -> Optional[str]:
+        if offset == NONE:
+            return None
+        return str(self._map[offset:offset + length], ENCODING, ERRORS)
+
+    def _json(self, offset: int, length: int) -> Any:
+        if offset == NONE:
+            return None
+        return json.loads(self._text(offset, length))
@@ -0,0 +1,411 @@
+"""
+Source manifest for incremental knowledge ledger rebuilds.
+
+Each processed source is stored on disk together with the hash of its raw
+content, so later runs can reuse the collected text, authority score,
+references and processed chunks of every source that has not changed.
+Sources dropped as near-duplicates are recorded too, without processed
+chunks, so they are not collected and scored again.
+
+An entry is a small JSON file; the collected, cleaned and chunk texts are
+kept out of line in a text file next to it and only read when needed. The
+chunks of a spilled source are spans of its cleaned text, which stays in
+the file it was cleaned into.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from models import Source, SourceType, ProcessedContent, ContentChunk, SpilledText
+
+
+# Bump when cleaning, chunking or scoring changes so stale entries are ignored
+MANIFEST_VERSION = 5
+
+
+class SourceManifest:
+    """Persists per-source processing results keyed by location and content hash."""
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, manifest_dir: str, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the manifest.
+
+        Args:
+            manifest_dir: Directory holding the manifest index and entries
+            settings: Processing settings; entries recorded with different
+                settings are ignored
+        """
+        self.manifest_dir = Path(manifest_dir)
+        self.settings = settings or {}
+        self.entries_dir = self.manifest_dir / 'entries'
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        if not self._index:
+            # Entries of a discarded index can never be looked up again
+            self._remove_stale_entries()
+
+    @staticmethod
+    def hash_content(content: str, content_path: Optional[str] = None) -> str:
+        """Hash raw source content, reading it from disk if it was spilled."""
+        if content_path:
+            return SourceManifest.hash_file(Path(content_path))
+        return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        """Hash a file's bytes without reading it into memory at once."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def cached_document(self, location: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the collected data of a local document that has not changed.
+
+        The file's size and modification time are checked first; the file is
+        only hashed when those differ from the recorded values.
+
+        Args:
+            location: File path
+
+        Returns:
+            Dictionary with content, title and metadata, or None if changed
+        """
+        record = self._index.get(location)
+        if not record or not record.get('file'):
+            return None
+
+        path = Path(location)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        file_state = record['file']
+        if (stat.st_size, stat.st_mtime_ns) != (file_state['size'], file_state['mtime_ns']):
+            if self.hash_file(path) != file_state['sha256']:
+                return None
+            file_state['size'] = stat.st_size
+            file_state['mtime_ns'] = stat.st_mtime_ns
+
+        entry = self._load_entry(location)
+        if not entry:
+            return None
+
+        data = {
+            'content': self._read_text(location, entry['content']),
+            'title': entry['title'],
+            'metadata': entry['metadata']
+        }
+        if entry.get('content_path'):
+            if not Path(entry['content_path']).is_file():
+                return None
+            data['content_path'] = entry['content_path']
+        return data
+
+    def lookup(self, location: str, content: str,
+               content_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached processing results for a source if its content is unchanged.
+
+        Args:
+            location: URL or file path
+            content: Raw collected content
+            content_path: File holding the full content if it was spilled
+
+        Returns:
+            Manifest entry, or None if the source must be reprocessed; an
+            entry of a dropped duplicate has no processed content
+        """
+        record = self._index.get(location)
+        if not record or record['content_hash'] != self.hash_content(content, content_path):
+            return None
+        return self._load_entry(location)
+
+    @staticmethod
+    def has_processed(entry: Dict[str, Any]) -> bool:
+        """Check whether a manifest entry holds processed content that can be restored."""
+        if entry.get('chunks') is None:
+            return False
+        return not entry.get('cleaned_path') or Path(entry['cleaned_path']).is_file()
+
+    def restore_processed(self, location: str, entry: Dict[str, Any],
+                          source_id: str) -> ProcessedContent:
+        """
+        Rebuild processed content from a manifest entry.
+
+        Args:
+            location: URL or file path of the source
+            entry: Manifest entry from lookup() that has processed content
+            source_id: ID assigned to the source in this run
+
+        Returns:
+            ProcessedContent for the source
+        """
+        with open(self._text_file(location), 'rb') as f:
+            cleaned_text = self._read_span(f, entry['cleaned_text'])
+            buffer = cleaned_text
+            if entry.get('cleaned_path'):
+                buffer = SpilledText(entry['cleaned_path'])
+            chunks = []
+            for chunk in entry['chunks']:
+                chunk = dict(chunk)
+                if 'text' in chunk:
+                    chunk['text'] = self._read_span(f, chunk['text'])
+                    chunks.append(ContentChunk(**chunk))
+                else:
+                    chunks.append(ContentChunk(buffer=buffer, **chunk))
+
+        return ProcessedContent(
+            source_id=source_id,
+            chunks=chunks,
+            cleaned_text=cleaned_text
+        )
+
+    def record(self, source: Source, processed: ProcessedContent):
+        """
+        Record the processing results of a source.
+
+        Sources whose content hash is unchanged are not rewritten.
+
+        Args:
+            source: Processed source
+            processed: Its processed content
+        """
+        content_hash = self.hash_content(source.content, source.content_path)
+        if self._unchanged(source.location, content_hash, processed=True):
+            return
+
+        texts = [source.content, processed.cleaned_text]
+        cleaned_path = None
+        chunks = []
+        for chunk in processed.chunks:
+            if isinstance(chunk.buffer, SpilledText):
+                cleaned_path = chunk.buffer.path
+            entry = self._chunk_entry(chunk, processed.cleaned_text)
+            if 'start' not in entry:
+                entry['text'] = len(texts)
+                texts.append(chunk.text)
+            chunks.append(entry)
+
+        self._write_entry(source.location, content_hash, {
+            'content_path': source.content_path,
+            'title': source.title,
+            'metadata': source.metadata,
+            'source_type': source.source_type.value,
+            'authority_score': source.authority_score,
+            'references': source.references,
+            'cleaned_text': 1,
+            'cleaned_path': cleaned_path,
+            'chunks': chunks
+        }, texts)
+
+    def record_duplicate(self, location: str, data: Dict[str, Any], source_type: SourceType,
+                         authority_score: int, references: List[str]):
+        """
+        Record a collected and scored source that was dropped as a near-duplicate.
+
+        The entry has no processed content; it spares the next run from
+        collecting and scoring the source again while it stays unchanged.
+
+        Args:
+            location: URL or file path
+            data: Collected data of the source
+            source_type: Its source type
+            authority_score: Its authority score
+            references: Its references
+        """
+        content_hash = self.hash_content(data['content'], data.get('content_path'))
+        if self._unchanged(location, content_hash, processed=False):
+            return
+
+        self._write_entry(location, content_hash, {
+            'content_path': data.get('content_path'),
+            'title': data['title'],
+            'metadata': data['metadata'],
+            'source_type': source_type.value,
+            'authority_score': authority_score,
+            'references': references,
+            'cleaned_text': None,
+            'chunks': None
+        }, [data['content']])
+
+    def _unchanged(self, location: str, content_hash: str, processed: bool) -> bool:
+        """
+        Check whether a source's recorded entry is still current.
+
+        An entry without processed content is not current for a source that
+        was processed. The file state of an unchanged document is refreshed
+        so the next run can skip reading it again.
+        """
+        record = self._index.get(location)
+        if not record or record['content_hash'] != content_hash:
+            return False
+        if processed and not record.get('processed'):
+            return False
+
+        file_state = record.get('file')
+        if file_state is not None:
+            stat = Path(location).stat()
+            if (stat.st_size, stat.st_mtime_ns) != (file_state['size'], file_state['mtime_ns']):
+                record['file'] = self._file_state(location)
+        return True
+
+    def _write_entry(self, location: str, content_hash: str, entry: Dict[str, Any],
+                     texts: List[str]):
+        """
+        Write an entry and its texts, and add it to the index.
+
+        Every text is appended to the entry's text file; the entry holds
+        texts[0] under 'content' and refers to the others by their index in
+        texts, which is replaced by a [byte offset, byte length] span.
+        """
+        spans = []
+        text_file = self._text_file(location)
+        tmp_path = text_file.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            for text in texts:
+                encoded = text.encode('utf-8', 'surrogatepass')
+                spans.append([f.tell(), len(encoded)])
+                f.write(encoded)
+        os.replace(tmp_path, text_file)
+
+        entry['content'] = spans[0]
+        if entry['cleaned_text'] is not None:
+            entry['cleaned_text'] = spans[entry['cleaned_text']]
+        for chunk in entry['chunks'] or []:
+            if 'text' in chunk:
+                chunk['text'] = spans[chunk['text']]
+
+        entry_file = self._entry_file(location)
+        tmp_path = entry_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, entry_file)
+
+        self._index[location] = {
+            'content_hash': content_hash,
+            'file': self._file_state(location),
+            'processed': entry['chunks'] is not None
+        }
+
+    def prune(self, locations: Iterable[str]):
+        """
+        Forget every source that is no longer part of the input.
+
+        Args:
+            locations: Locations processed in this run
+        """
+        keep = set(locations)
+        for location in list(self._index):
+            if location not in keep:
+                del self._index[location]
+                for path in (self._entry_file(location), self._text_file(location)):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+    def save(self):
+        """Atomically write the manifest index to disk and delete entries it no longer lists."""
+        path = self.manifest_dir / self.INDEX_FILE
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'settings': self.settings,
+                'sources': self._index
+            }, f)
+        os.replace(tmp_path, path)
+        self._remove_stale_entries()
+
+    def _remove_stale_entries(self):
+        """Delete the entry files of locations missing from the index, and leftover temporary files."""
+        names = {self._entry_file(location).stem for location in self._index}
+        for path in self.entries_dir.iterdir():
+            if path.stem not in names or path.suffix == '.tmp':
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _file_state(self, location: str) -> Optional[Dict[str, Any]]:
+        """Get the size, modification time and hash of a local file."""
+        path = Path(location)
+        if location.startswith(('http://', 'https://')) or not path.is_file():
+            return None
+
+        stat = path.stat()
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': self.hash_file(path)
+        }
+
+    @staticmethod
+    def _chunk_entry(chunk: ContentChunk, cleaned_text: str) -> Dict[str, Any]:
+        """Serialize a chunk, as offsets when it is a span of the cleaned text or of its file."""
+        entry = {
+            'heading': chunk.heading,
+            'level': chunk.level,
+            'metadata': chunk.metadata
+        }
+        if chunk.buffer is cleaned_text or isinstance(chunk.buffer, SpilledText):
+            entry['start'] = chunk.start
+            entry['end'] = chunk.end
+        else:
+            entry['text'] = chunk.text
+        return entry
+
+    @staticmethod
+    def source_type(entry: Dict[str, Any]) -> SourceType:
+        """Get the source type stored in a manifest entry."""
+        return SourceType(entry['source_type'])
+
+    def _entry_file(self, location: str) -> Path:
+        """Get the entry file of a location."""
+        name = hashlib.sha256(location.encode('utf-8')).hexdigest()
+        return self.entries_dir / f'{name}.json'
+
+    def _text_file(self, location: str) -> Path:
+        """Get the file holding the texts of a location's entry."""
+        return self._entry_file(location).with_suffix('.txt')
+
+    def _load_entry(self, location: str) -> Optional[Dict[str, Any]]:
+        """Load a manifest entry from disk, without its texts."""
+        if not self._text_file(location).is_file():
+            return None
+        try:
+            with open(self._entry_file(location), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_text(self, location: str, span: Tuple[int, int]) -> str:
+        """Read one text of a location's entry."""
+        with open(self._text_file(location), 'rb') as f:
+            return self._read_span(f, span)
+
+    @staticmethod
+    def _read_span(f, span: Tuple[int, int]) -> str:
+        """Read a [byte offset, byte length] span of an open text file."""
+        f.seek(span[0])
+        return f.read(span[1]).decode('utf-8', 'surrogatepass')
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest index, discarding it if it was written by another version or settings."""
+        try:
+            with open(self.manifest_dir / self.INDEX_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get('version') != MANIFEST_VERSION or data.get('settings', {}) != self.settings:
+            return {}
+        return data.get('sources', {})
@@ -1,8 +1,11 @@
 """
 Data models for the Knowledge Ledger Agent.
 """
+import bisect
+import codecs
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Callable, TextIO, Union
 from datetime import datetime
 from enum import Enum
 
@@ -31,15 +34,273 @@ class Source:
     metadata: Dict[str, Any] = field(default_factory=dict)
     references: List[str] = field(default_factory=list)
     extracted_at: datetime = field(default_factory=datetime.now)
+    content_path: Optional[str] = None  # Full content spilled to disk; content is a preview
+    
+    def iter_content_lines(self) -> Iterator[str]:
+        """Iterate over the full content line by line, reading spilled content from disk."""
+        if not self.content_path:
+            yield from self.content.split('\n')
+            return
+        
+        # Like split('\n'), a trailing newline ends with an empty line
+        line = '\n'
+        with open(self.content_path, 'r', encoding='utf-8', newline='\n') as f:
+            for line in f:
+                yield line[:-1] if line.endswith('\n') else line
+        if line.endswith('\n'):
+            yield ''
+
+
+class VerbatimSection:
+    """
+    Ledger section copied as is from a file, such as the spilled content of
+    a large PDF, instead of being held in memory.
+    
+    It renders as the file's text followed by a newline and is neither
+    formatted nor linted.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Create a section backed by a file.
+        
+        Args:
+            path: File holding the section's text
+        """
+        self.path = path
+        self.newline_count: Optional[int] = None  # Known once written
+    
+    def read(self) -> str:
+        """Read the whole section into memory."""
+        with open(self.path, 'r', encoding='utf-8', newline='\n') as f:
+            return f.read() + '\n'
+    
+    def write(self, fh: TextIO, block_size: int = 1024 * 1024):
+        """Copy the section to a file handle in blocks, counting its newlines."""
+        newlines = 1
+        with open(self.path, 'r', encoding='utf-8', newline='\n') as f:
+            for block in iter(lambda: f.read(block_size), ''):
+                fh.write(block)
+                newlines += block.count('\n')
+        fh.write('\n')
+        self.newline_count = newlines
+
+
+class SpilledText:
+    """
+    Text kept in a file instead of memory, such as the cleaned text of a
+    spilled PDF.
+    
+    It is sliced like a string, and a slice only reads its own part of the
+    file: the byte offset of every CHECKPOINT-th character is recorded when
+    the text is written, or on first use for a file written before.
+    """
+    
+    CHECKPOINT = 4096
+    ENCODING = 'utf-8'
+    ERRORS = 'surrogatepass'
+    
+    # The file read last stays open; texts are mostly read one after another
+    _reader = None
+    
+    def __init__(self, path: str):
+        """
+        Create a text backed by a file.
+        
+        Args:
+            path: File holding the text, written by write_lines() if it
+                does not hold it yet
+        """
+        self.path = path
+        self._chars: Optional[array] = None  # Character offset of every checkpoint
+        self._bytes: Optional[array] = None  # Byte offset of every checkpoint
+        self._length = 0
+    
+    def write_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Replace the file's text with lines joined by newlines.
+        
+        The text is written as the lines are read from the returned
+        iterator, so it can be consumed by another pass at the same time;
+        it can only be sliced once the iterator is exhausted.
+        
+        Args:
+            lines: Lines of text, without line terminators
+            
+        Yields:
+            Each line, once it is written
+        """
+        if SpilledText._reader is not None and SpilledText._reader.name == self.path:
+            self._close_reader()
+        chars, offsets = array('q', [0]), array('q', [0])
+        length = size = 0
+        separator = ''
+        with open(self.path, 'wb') as f:
+            for line in lines:
+                text = separator + line
+                separator = '\n'
+                # Long lines get checkpoints within them
+                for start in range(0, len(text), self.CHECKPOINT):
+                    piece = text[start:start + self.CHECKPOINT]
+                    encoded = piece.encode(self.ENCODING, self.ERRORS)
+                    f.write(encoded)
+                    length += len(piece)
+                    size += len(encoded)
+                    if length - chars[-1] >= self.CHECKPOINT:
+                        chars.append(length)
+                        offsets.append(size)
+                yield line
+        self._chars, self._bytes, self._length = chars, offsets, length
+    
+    def __len__(self) -> int:
+        self._index()
+        return self._length
+    
+    def __getitem__(self, key: slice) -> str:
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("SpilledText can only be sliced contiguously")
+        self._index()
+        start, end, _ = key.indices(self._length)
+        if start >= end:
+            return ''
+        
+        checkpoint = bisect.bisect_right(self._chars, start) - 1
+        skip = start - self._chars[checkpoint]
+        f = self._open_reader()
+        f.seek(self._bytes[checkpoint])
+        decoder = codecs.getincrementaldecoder(self.ENCODING)(self.ERRORS)
+        pieces = []
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(self.CHECKPOINT)
+            text = decoder.decode(block, final=not block)
+            if skip:
+                skipped = min(skip, len(text))
+                text = text[skipped:]
+                skip -= skipped
+            pieces.append(text[:remaining])
+            remaining -= len(pieces[-1])
+            if not block:
+                break
+        return ''.join(pieces)
+
+    def find(self, sub: str, start: int = 0) -> int:
+        """Find the first occurrence of sub from start, like str.find(), reading blocks of the text."""
+        self._index()
+        start = max(start, 0)
+        if not sub:
+            return start if start <= self._length else -1
+        block_size = max(16 * self.CHECKPOINT, 2 * len(sub))
+        while start < self._length:
+            block = self[start:start + block_size]
+            index = block.find(sub)
+            if index >= 0:
+                return start + index
+            if start + len(block) >= self._length:
+                break
+            # Blocks overlap so an occurrence across two of them is found
+            start += len(block) - len(sub) + 1
+        return -1
+
+    def _index(self):
+        """Record the checkpoints of a file written before, reading it once."""
+        if self._chars is not None:
+            return
+        chars, offsets = array('q', [0]), array('q', [0])
+        length = size = 0
+        with open(self.path, 'r', encoding=self.ENCODING, errors=self.ERRORS, newline='') as f:
+            for piece in iter(lambda: f.read(self.CHECKPOINT), ''):
+                length += len(piece)
+                size += len(piece.encode(self.ENCODING, self.ERRORS))
+                chars.append(length)
+                offsets.append(size)
+        self._chars, self._bytes, self._length = chars, offsets, length
+    
+    def _open_reader(self):
+        reader = SpilledText._reader
+        if reader is None or reader.name != self.path:
+            self._close_reader()
+            reader = SpilledText._reader = open(self.path, 'rb')
+        return reader
+    
+    @staticmethod
+    def _close_reader():
+        if SpilledText._reader is not None:
+            SpilledText._reader.close()
+            SpilledText._reader = None
 
 
-@dataclass
 class ContentChunk:
-    """Represents a chunk of processed content."""
-    text: str
-    heading: Optional[str] = None
-    level: int = 0  # Heading level (0 = no heading)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """
+    Represents a chunk of processed content.
+    
+    A chunk stores offsets into a buffer shared with the other chunks of its
+    source (normally the cleaned text, or a SpilledText holding it) instead
+    of its own copy of the text; the text is only sliced out when it is
+    accessed.
+    """
+    __slots__ = ('buffer', 'start', 'end', 'heading', 'level', '_metadata')
+    
+    def __init__(self, text: Optional[str] = None, heading: Optional[str] = None,
+                 level: int = 0, metadata: Optional[Dict[str, Any]] = None, *,
+                 buffer: Union[str, SpilledText, None] = None, start: int = 0,
+                 end: Optional[int] = None):
+        """
+        Create a chunk from its own text or from a span of a shared buffer.
+        
+        Args:
+            text: Chunk text, when the chunk is not backed by a shared buffer
+            heading: Heading of the section the chunk belongs to
+            level: Heading level (0 = no heading)
+            metadata: Additional chunk metadata
+            buffer: Shared text the chunk is a span of
+            start: Start offset of the chunk in buffer
+            end: End offset of the chunk in buffer (default: end of buffer)
+        """
+        if buffer is None:
+            buffer = text if text is not None else ''
+            start = 0
+            end = None
+        elif text is not None:
+            raise ValueError("ContentChunk takes either text or buffer, not both")
+        
+        self.buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end is None else end
+        self.heading = heading
+        self.level = level
+        self._metadata = metadata
+    
+    @property
+    def text(self) -> str:
+        """Chunk text, sliced from the shared buffer."""
+        if self.start == 0 and isinstance(self.buffer, str) and self.end == len(self.buffer):
+            return self.buffer
+        return self.buffer[self.start:self.end]
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Additional chunk metadata, created on first access."""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+    
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._metadata = value
+    
+    def __len__(self) -> int:
+        return self.end - self.start
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ContentChunk):
+            return NotImplemented
+        return ((self.text, self.heading, self.level, self._metadata or {}) ==
+                (other.text, other.heading, other.level, other._metadata or {}))
+    
+    def __repr__(self) -> str:
+        return (f"ContentChunk(text={self.text!r}, heading={self.heading!r}, "
+                f"level={self.level!r}, metadata={self.metadata!r})")
 
 
 @dataclass
@@ -61,17 +322,123 @@ class Topic:
     relevance_score: float  # 0-1
 
 
+class _TrackedList(list):
+    """List that calls on_change after every change to it."""
+    
+    def __init__(self, items: Iterable = (), on_change: Optional[Callable[[], None]] = None):
+        super().__init__(items)
+        self.on_change = on_change
+    
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are plain lists; the owner tracks them again
+        return (list, (list(self),))
+
+
+def _tracked(name: str):
+    method = getattr(list, name)
+    
+    def wrapper(self, *args):
+        result = method(self, *args)
+        if self.on_change is not None:
+            self.on_change()
+        return result
+    
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend',
+              'insert', 'pop', 'remove', 'clear', 'sort', 'reverse'):
+    setattr(_TrackedList, _name, _tracked(_name))
+
+
 @dataclass
 class KnowledgeLedger:
-    """Complete knowledge ledger structure."""
+    """
+    Complete knowledge ledger structure.
+    
+    Lookups by source ID and keyword go through indexes that are built on
+    first use. The ledger keeps its own copies of the lists it is given and
+    drops the affected indexes whenever one of them is changed or replaced;
+    call invalidate_indexes() after changing the IDs, keywords or source IDs
+    of items already in the ledger.
+    """
     sources: List[Source]
     processed_contents: List[ProcessedContent]
     topics: List[Topic]
     created_at: datetime = field(default_factory=datetime.now)
     
+    # Indexes built from each tracked list
+    _INDEXES_BY_FIELD = {
+        'sources': ('sources',),
+        'processed_contents': ('processed_contents',),
+        'topics': ('keywords', 'source_topics'),
+    }
+    
+    def __setattr__(self, name: str, value: Any):
+        if name in self._INDEXES_BY_FIELD:
+            value = _TrackedList(value, lambda: self._invalidate(name))
+            self._invalidate(name)
+        super().__setattr__(name, value)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state.pop('_indexes', None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
+    
     def get_source_by_id(self, source_id: str) -> Optional[Source]:
         """Get a source by its ID."""
-        for source in self.sources:
-            if source.id == source_id:
-                return source
-        return None
+        return self._index('sources').get(source_id)
+    
+    def get_processed_content(self, source_id: str) -> Optional[ProcessedContent]:
+        """Get the processed content of a source by the source's ID."""
+        return self._index('processed_contents').get(source_id)
+    
+    def get_topic_by_keyword(self, keyword: str) -> Optional[Topic]:
+        """Get the first topic with a keyword."""
+        return self._index('keywords').get(keyword)
+    
+    def get_topics_for_source(self, source_id: str) -> List[Topic]:
+        """Get the topics that reference a source, in ledger order."""
+        return list(self._index('source_topics').get(source_id, ()))
+    
+    def invalidate_indexes(self):
+        """Drop every lookup index; they are rebuilt on next use."""
+        self.__dict__.pop('_indexes', None)
+    
+    def _invalidate(self, name: str):
+        """Drop the indexes built from one of the tracked lists."""
+        indexes = self.__dict__.get('_indexes')
+        if indexes:
+            for index_name in self._INDEXES_BY_FIELD[name]:
+                indexes.pop(index_name, None)
+    
+    def _index(self, name: str) -> Dict[str, Any]:
+        """Get a lookup index, building it on first use."""
+        indexes = self.__dict__.setdefault('_indexes', {})
+        index = indexes.get(name)
+        if index is not None:
+            return index
+        
+        index = {}
+        if name == 'sources':
+            for source in self.sources:
+                index.setdefault(source.id, source)
+        elif name == 'processed_contents':
+            for processed in self.processed_contents:
+                index.setdefault(processed.source_id, processed)
+        elif name == 'keywords':
+            for topic in self.topics:
+                for keyword in topic.keywords:
+                    index.setdefault(keyword, topic)
+        elif name == 'source_topics':
+            for topic in self.topics:
+                for source_id in dict.fromkeys(topic.source_ids):
+                    index.setdefault(source_id, []).append(topic)
+        
+        indexes[name] = index
+        return index
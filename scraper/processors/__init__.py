@@ -1,5 +1,11 @@
 from .cleaner import ContentCleaner
 from .chunker import ContentChunker
 from .topic_extractor import TopicExtractor
-from .authority_scorer import AuthorityScorer
+from .tfidf_engine import StreamingTfidf
+from .topic_clusterer import TopicClusterer
+from .authority_scorer import AuthorityScorer, AuthorityResult
+from .deduplicator import SourceDeduplicator
+from .boilerplate_filter import BoilerplateFilter, BoilerplateStats
 from .qa_checker import QAChecker
+from .qa_cache import QACache
+from .topic_model_cache import TopicModelCache
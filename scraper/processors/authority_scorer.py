@@ -1,11 +1,20 @@
 """
 Authority scoring for sources.
 """
-from typing import Dict, Any
-from models import SourceType
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from models import SourceType, SpilledText
 import re
 
 
+@dataclass
+class AuthorityResult:
+    """Source type and authority score of a source."""
+    source_type: SourceType
+    score: int  # 0-100
+    signals: Dict[str, int] = field(default_factory=dict)  # Points added by each signal
+
+
 class AuthorityScorer:
     """Scores sources based on type, domain, and content indicators."""
     
@@ -20,7 +29,112 @@ class AuthorityScorer:
         SourceType.UNKNOWN: 50,
     }
     
-    def score(self, source_type: SourceType, content: str, 
+    # Every content indicator, searched for in one pass over the lowercased
+    # content. The lookahead makes each match zero-width so a match never
+    # hides another indicator starting inside it. The first lookahead lists
+    # the first two characters of every indicator so that other positions
+    # are skipped without trying each alternative.
+    CONTENT_PATTERN = re.compile(r"""
+    (?=ab|am|ap|bi|ci|do|dr|fi|i\ |in|is|jo|me|pe|ph|pr|re|sh|ta|un|yo|\d)
+    (?=
+        (?P<structure>abstract|introduction|methodology|references)
+      | (?P<citations>bibliography|citations)
+      | (?P<academic>\b(?:journal|peer.?review|doi:|issn:)\b)
+      | (?P<opinion>in\ my\ opinion|i\ think|i\ believe|personal\ view)
+      | (?P<data>\b\d+%|\b\d+\.\d+\b)
+      | (?P<caption>(?:figure|table)\ \d)
+      | (?P<methods>\b(?:methods|approach)\b)
+      | (?P<credentials>\b(?:ph\.?d|professor|dr\.|researcher)\b)
+      | (?P<clickbait>\b(?:you\ won't\ believe|shocking|amazing|unbelievable)\b)
+    )""", re.VERBOSE)
+    
+    # Data indicators in the original content, for content whose length
+    # changes when lowercased
+    DATA_PATTERN = re.compile(r'\b\d+%|\b\d+\.\d+\b|figure \d+|table \d+')
+    
+    WORD_CHAR = re.compile(r'\w')
+    
+    # A line holding only a references section heading
+    REFERENCES_HEADING = re.compile(
+        r'^[ \t#*\d.]*(?:references|bibliography|works cited|literature cited)[ \t:*]*$',
+        re.IGNORECASE | re.MULTILINE
+    )
+    
+    WHITESPACE = re.compile(r'\s')
+    
+    # Points added by each content signal
+    CONTENT_SCORES = {
+        'references': 10,
+        'data': 5,
+        'methodology': 5,
+        'credentials': 5,
+        'clickbait': -5,
+    }
+    
+    def __init__(self, head_chars: Optional[int] = 100_000, tail_chars: int = 20_000,
+                 references_chars: int = 50_000):
+        """
+        Initialize the scorer.
+        
+        Content longer than head_chars + tail_chars is only scanned in three
+        windows: its start, its end and the section after its last
+        references heading.
+        
+        Args:
+            head_chars: Characters scanned at the start of the content, or
+                None to always scan all of it. At least 1000, since
+                classification looks for structure in the first 1000.
+            tail_chars: Characters scanned at the end of the content
+            references_chars: Characters scanned from the last references
+                heading between the head and the tail
+        """
+        if head_chars is not None and head_chars < 1000:
+            raise ValueError("head_chars must be at least 1000")
+        self.head_chars = head_chars
+        self.tail_chars = max(0, tail_chars)
+        self.references_chars = max(0, references_chars)
+    
+    def settings(self) -> Dict[str, Any]:
+        """Get the settings that determine which content is scanned."""
+        return {
+            'head_chars': self.head_chars,
+            'tail_chars': self.tail_chars,
+            'references_chars': self.references_chars
+        }
+    
+    def evaluate(self, content: Union[str, SpilledText],
+                 metadata: Dict[str, Any]) -> AuthorityResult:
+        """
+        Classify a source and score it, reading its content once.
+        
+        Gives the same type and score as classify_type() followed by score().
+        A SpilledText is only read in its windows, and between them while
+        looking for a references heading.
+        
+        Args:
+            content: Source content, or the whole text of a spilled source
+            metadata: Source metadata
+            
+        Returns:
+            AuthorityResult with the type, the score and the points of every
+            signal that applied
+        """
+        found = self._scan(content)
+        source_type = self._classify(found, metadata)
+        
+        signals = {'type': self.TYPE_SCORES.get(source_type, 50)}
+        if 'url' in metadata:
+            signals['domain'] = self._score_domain(metadata['url'])
+        for signal, points in self.CONTENT_SCORES.items():
+            if signal in found:
+                signals[signal] = points
+        signals.update(self._metadata_signals(metadata))
+        signals = {signal: points for signal, points in signals.items() if points}
+        
+        score = max(0, min(100, sum(signals.values())))
+        return AuthorityResult(source_type=source_type, score=score, signals=signals)
+    
+    def score(self, source_type: SourceType, content: str,
               metadata: Dict[str, Any]) -> int:
         """
         Calculate authority score for a source.
@@ -60,8 +174,10 @@ class AuthorityScorer:
         Returns:
             Classified SourceType
         """
-        content_lower = content.lower()
-        
+        return self._classify(self._scan(content), metadata)
+    
+    def _classify(self, found: Set[str], metadata: Dict[str, Any]) -> SourceType:
+        """Classify a source from its metadata and the signals found in its content."""
         # Check URL patterns
         if 'url' in metadata:
             url = metadata['url'].lower()
@@ -81,24 +197,156 @@ class AuthorityScorer:
             if any(domain in url for domain in ['blog', 'medium.com', 'substack']):
                 return SourceType.BLOG
         
-        # Check PDF metadata
+        # Check PDF metadata: abstract, introduction and methodology in that
+        # order, with a research paper term near the start
         if metadata.get('type') == 'pdf':
-            # Look for research paper indicators
-            if any(term in content_lower[:1000] for term in ['abstract', 'methodology', 'introduction', 'references']):
-                # Check for academic structure
-                if re.search(r'\babstract\b.*\bintroduction\b.*\bmethodology\b', content_lower, re.DOTALL):
-                    return SourceType.RESEARCH
+            if 'structure_start' in found and 'research_structure' in found:
+                return SourceType.RESEARCH
         
         # Check content indicators
-        if re.search(r'\b(journal|peer.?review|doi:|issn:)\b', content_lower):
+        if 'academic' in found:
             return SourceType.ACADEMIC
         
-        if any(term in content_lower[:500] for term in ['in my opinion', 'i think', 'i believe', 'personal view']):
+        if 'opinion' in found:
             return SourceType.OPINION
         
         # Default to unknown if can't classify
         return SourceType.UNKNOWN
     
+    def _scan(self, content: Union[str, SpilledText]) -> Set[str]:
+        """
+        Find the classification and scoring signals of some content.
+        
+        Only the windows of the content are scanned, one after the other.
+        
+        Args:
+            content: Source content
+            
+        Returns:
+            Names of the signals found: 'academic', 'opinion' (in the first
+            500 characters), 'structure_start' (a research paper term in the
+            first 1000 characters), 'research_structure' and the keys of
+            CONTENT_SCORES
+        """
+        found = set()
+        structure_step = 0  # abstract, introduction, methodology seen in order
+        for window_start, window_end in self._windows(content):
+            window = content[window_start:window_end]
+            window_lower = window.lower()
+            # Lowercasing keeps positions unless some character expands
+            aligned = len(window_lower) == len(window)
+            at_start = window_start == 0
+            
+            structure_after = 0  # Everything in this window follows earlier windows
+            for match in self.CONTENT_PATTERN.finditer(window_lower):
+                kind = match.lastgroup
+                start, end = match.span(kind)
+                
+                if kind == 'structure':
+                    term = match.group(kind)
+                    if term == 'references':
+                        found.add('references')
+                    if at_start and end <= 1000:
+                        found.add('structure_start')
+                    if not self._bounded(window_lower, start, end):
+                        continue
+                    if term == 'methodology':
+                        found.add('methodology')
+                    if start >= structure_after and structure_step < 3 and \
+                            term == ('abstract', 'introduction', 'methodology')[structure_step]:
+                        structure_step += 1
+                        structure_after = end
+                        if structure_step == 3:
+                            found.add('research_structure')
+                elif kind == 'citations':
+                    found.add('references')
+                elif kind == 'opinion':
+                    if at_start and end <= 500:
+                        found.add('opinion')
+                elif kind in ('data', 'caption'):
+                    # Figure and table captions only count in lowercase
+                    if aligned and (kind == 'data' or window.startswith(('figure', 'table'), start)):
+                        found.add('data')
+                elif kind == 'methods':
+                    found.add('methodology')
+                else:
+                    found.add(kind)
+            
+            if not aligned and self.DATA_PATTERN.search(window):
+                found.add('data')
+        return found
+    
+    def _windows(self, content: Union[str, SpilledText]) -> List[Tuple[int, int]]:
+        """
+        Get the spans of content to scan.
+        
+        Args:
+            content: Source content
+            
+        Returns:
+            Sorted, non-overlapping (start, end) spans: the whole content if
+            it fits in the head and tail windows, otherwise the head, the
+            references section (if a heading is found) and the tail
+        """
+        length = len(content)
+        if self.head_chars is None or length <= self.head_chars + self.tail_chars:
+            return [(0, length)]
+        
+        # Window edges are moved to whitespace so no word is cut in two
+        head_end = self._snap(content, self.head_chars)
+        tail_start = self._snap(content, length - self.tail_chars)
+        spans = [(0, head_end), (tail_start, length)]
+        
+        start = self._last_references_heading(content, head_end, tail_start)
+        if start is not None and self.references_chars:
+            spans.append((start, self._snap(content, min(start + self.references_chars, length))))
+        
+        windows: List[Tuple[int, int]] = []
+        for start, end in sorted(spans):
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            elif start < end:
+                windows.append((start, end))
+        return windows
+    
+    def _last_references_heading(self, content: Union[str, SpilledText], start: int,
+                                 end: int, block_size: int = 1024 * 1024) -> Optional[int]:
+        """Find the start of the last references heading between two positions."""
+        if isinstance(content, str):
+            heading = None
+            for heading in self.REFERENCES_HEADING.finditer(content, start, end):
+                pass
+            return heading.start() if heading is not None else None
+        
+        # Blocks of whole lines, each searched with the character before it
+        # so that ^ only matches after a newline, as in one string
+        last = None
+        block_start = start
+        carry = ''
+        for position in range(start, end, block_size):
+            block = carry + content[position:min(position + block_size, end)]
+            carry = ''
+            if position + block_size < end:
+                cut = block.rfind('\n') + 1
+                block, carry = block[:cut], block[cut:]
+                if not block:
+                    continue
+            context = content[block_start - 1:block_start] if block_start else ''
+            for heading in self.REFERENCES_HEADING.finditer(context + block, len(context)):
+                last = block_start - len(context) + heading.start()
+            block_start += len(block)
+        return last
+    
+    def _snap(self, content: Union[str, SpilledText], position: int) -> int:
+        """Move a position forward to the next whitespace, at most 100 characters."""
+        match = self.WHITESPACE.search(content[position:position + 100])
+        return position + match.start() if match else position
+    
+    def _bounded(self, text: str, start: int, end: int) -> bool:
+        """Whether text[start:end], a run of word characters, is a whole word."""
+        return not ((start > 0 and self.WORD_CHAR.match(text, start - 1)) or
+                    (end < len(text) and self.WORD_CHAR.match(text, end)))
+    
     def _score_domain(self, url: str) -> int:
         """Score based on domain authority."""
         url_lower = url.lower()
@@ -112,7 +360,7 @@ class AuthorityScorer:
             return 10
         
         # Established tech/news
-        if any(domain in url_lower for domain in ['nytimes', 'wsj', 'bbc', 'reuters', 
+        if any(domain in url_lower for domain in ['nytimes', 'wsj', 'bbc', 'reuters',
                                                     'stackoverflow', 'github']):
             return 5
         
@@ -120,45 +368,27 @@ class AuthorityScorer:
     
     def _score_content(self, content: str) -> int:
         """Score based on content quality indicators."""
-        score = 0
-        content_lower = content.lower()
-        
-        # Has references/citations
-        if re.search(r'(references|bibliography|citations)', content_lower):
-            score += 10
-        
-        # Has data/statistics
-        if re.search(r'\b\d+%|\b\d+\.\d+\b|figure \d+|table \d+', content):
-            score += 5
-        
-        # Has methodology section
-        if re.search(r'\b(methodology|methods|approach)\b', content_lower):
-            score += 5
-        
-        # Has author credentials
-        if re.search(r'\b(ph\.?d|professor|dr\.|researcher)\b', content_lower):
-            score += 5
-        
-        # Penalty for clickbait indicators
-        if re.search(r'\b(you won\'t believe|shocking|amazing|unbelievable)\b', content_lower):
-            score -= 5
-        
-        return score
+        found = self._scan(content)
+        return sum(points for signal, points in self.CONTENT_SCORES.items() if signal in found)
     
     def _score_metadata(self, metadata: Dict[str, Any]) -> int:
         """Score based on metadata."""
-        score = 0
+        return sum(self._metadata_signals(metadata).values())
+    
+    def _metadata_signals(self, metadata: Dict[str, Any]) -> Dict[str, int]:
+        """Points added by each metadata field."""
+        signals = {}
         
         # Has author
         if metadata.get('author'):
-            score += 3
+            signals['author'] = 3
         
         # Has publish date
         if metadata.get('published_date'):
-            score += 2
+            signals['published_date'] = 2
         
         # Has subject/description
         if metadata.get('subject') or metadata.get('description'):
-            score += 2
+            signals['description'] = 2
         
-        return score
+        return signals
@@ -0,0 +1,255 @@
+"""
+Corpus-wide removal of boilerplate chunks.
+
+Cookie banners, newsletter calls to action, author bios and license
+footers end up as the same chunk in many sources. Every chunk gets an exact
+fingerprint of its normalised text and a 64-bit simhash; chunks whose text
+or simhash (within a few bits) is found in more than max_sources sources
+are boilerplate and are removed.
+"""
+import bisect
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from models import ContentChunk, ProcessedContent
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+@dataclass
+class BoilerplateStats:
+    """What a BoilerplateFilter run removed."""
+    chunks_removed: int = 0
+    bytes_removed: int = 0
+    groups: int = 0  # Distinct boilerplate texts
+
+
+class BoilerplateFilter:
+    """Removes chunks that repeat across many sources."""
+
+    MODES = ('collapse', 'drop')
+    BLOCKS = 4  # simhash split into 16-bit blocks for near-match lookups
+
+    def __init__(self, max_sources: int = 5, mode: str = 'collapse', max_distance: int = 3,
+                 min_words: int = 4):
+        """
+        Initialize the filter.
+
+        Args:
+            max_sources: Chunks found in more sources than this are boilerplate
+            mode: 'collapse' keeps a boilerplate chunk in the first source it
+                appears in, 'drop' removes it everywhere
+            max_distance: Maximum number of differing simhash bits of a near match
+            min_words: Chunks with fewer words are only matched exactly
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown boilerplate mode: {mode}")
+        if max_distance >= self.BLOCKS:
+            raise ValueError(f"max_distance must be below {self.BLOCKS}")
+        self.max_sources = max_sources
+        self.mode = mode
+        self.max_distance = max_distance
+        self.min_words = min_words
+
+    def filter(self, processed_contents: List[ProcessedContent]) -> BoilerplateStats:
+        """
+        Remove boilerplate chunks from processed contents in place.
+
+        The chunks are read twice: once to fingerprint and group them, and
+        once to remove the groups found in too many sources. The removed
+        text is also cut out of cleaned_text.
+
+        Args:
+            processed_contents: Processed content of every source
+
+        Returns:
+            Counts of what was removed
+        """
+        index = _FingerprintIndex(self.max_distance, self.min_words)
+        groups_by_content: List[List[int]] = []
+        sources: Dict[int, Set[int]] = {}
+        first_source: Dict[int, int] = {}
+        for position, processed in enumerate(processed_contents):
+            groups = [index.group(text) for text in _own_texts(processed.chunks)]
+            for group in groups:
+                if group < 0:
+                    continue
+                seen = sources.setdefault(group, set())
+                # Only whether a group is in more than max_sources sources matters
+                if len(seen) <= self.max_sources:
+                    seen.add(position)
+                first_source.setdefault(group, position)
+            groups_by_content.append(groups)
+
+        boilerplate = {group for group, seen in sources.items() if len(seen) > self.max_sources}
+        stats = BoilerplateStats(groups=len(boilerplate))
+        if not boilerplate:
+            return stats
+
+        for position, (processed, groups) in enumerate(zip(processed_contents, groups_by_content)):
+            removed = [
+                group in boilerplate and (self.mode == 'drop' or first_source[group] != position)
+                for group in groups
+            ]
+            if not any(removed):
+                continue
+            kept_chunks = [chunk for chunk, drop in zip(processed.chunks, removed) if not drop]
+            removed_chunks = [chunk for chunk, drop in zip(processed.chunks, removed) if drop]
+            stats.chunks_removed += len(removed_chunks)
+            stats.bytes_removed += sum(len(chunk.text.encode('utf-8', 'surrogatepass'))
+                                       for chunk in removed_chunks)
+            self._remove(processed, kept_chunks, removed_chunks)
+        return stats
+
+    @staticmethod
+    def _remove(processed: ProcessedContent, kept: List[ContentChunk],
+                removed: List[ContentChunk]):
+        """Replace the chunks of a source and cut the removed text out of cleaned_text."""
+        text = processed.cleaned_text
+        if not text or any(chunk.buffer is not text for chunk in kept + removed):
+            # Streamed sources keep their text only in their chunks
+            processed.chunks = kept
+            return
+
+        # Overlapping chunks share text, which is only cut if no kept chunk covers it
+        cuts = _subtract(_merge((c.start, c.end) for c in removed),
+                         _merge((c.start, c.end) for c in kept))
+        pieces, cut_ends, cut_totals, previous, cut_total = [], [], [0], 0, 0
+        for start, end in cuts:
+            pieces.append(text[previous:start])
+            cut_total += end - start
+            cut_ends.append(end)
+            cut_totals.append(cut_total)
+            previous = end
+        pieces.append(text[previous:])
+        new_text = ''.join(pieces)
+
+        def shifted(offset: int) -> int:
+            # Minus the text of every cut ending at or before the offset
+            return offset - cut_totals[bisect.bisect_right(cut_ends, offset)]
+
+        processed.cleaned_text = new_text
+        processed.chunks = [
+            ContentChunk(heading=chunk.heading, level=chunk.level, metadata=chunk._metadata,
+                         buffer=new_text, start=shifted(chunk.start), end=shifted(chunk.end))
+            for chunk in kept
+        ]
+
+
+def _own_texts(chunks: List[ContentChunk]):
+    """Yield each chunk's text without the overlap repeated from the chunk before it."""
+    previous = None
+    for chunk in chunks:
+        if previous is not None and previous.buffer is chunk.buffer and chunk.start < previous.end:
+            yield chunk.buffer[previous.end:chunk.end]
+        else:
+            yield chunk.text
+        previous = chunk
+
+
+def _merge(spans) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(spans: List[Tuple[int, int]], covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # Both are sorted and disjoint, so they are walked together once
+    result = []
+    first = 0
+    for start, end in spans:
+        while first < len(covered) and covered[first][1] <= start:
+            first += 1
+        for index in range(first, len(covered)):
+            covered_start, covered_end = covered[index]
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                result.append((start, covered_start))
+            start = max(start, covered_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class _FingerprintIndex:
+    """Assigns chunk texts to groups of identical or near-identical texts."""
+
+    def __init__(self, max_distance: int, min_words: int):
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self._exact: Dict[bytes, int] = {}
+        self._simhashes: List[int] = []
+        self._simhash_groups: List[int] = []
+        self._blocks: List[Dict[int, List[int]]] = [{} for _ in range(BoilerplateFilter.BLOCKS)]
+        self._groups = 0
+
+    def group(self, text: str) -> int:
+        """Get the group of a chunk text; -1 for texts without words."""
+        words = _WORD_PATTERN.findall(text.lower())
+        if not words:
+            return -1
+        digest = hashlib.blake2b(' '.join(words).encode('utf-8', 'surrogatepass'),
+                                 digest_size=16).digest()
+        group = self._exact.get(digest)
+        if group is not None:
+            return group
+
+        group = None
+        simhash = None
+        if len(words) >= self.min_words:
+            simhash = _simhash(words)
+            group = self._near_group(simhash)
+        if group is None:
+            group = self._groups
+            self._groups += 1
+        if simhash is not None:
+            self._add_simhash(simhash, group)
+        self._exact[digest] = group
+        return group
+
+    def _near_group(self, simhash: int):
+        # Hashes within max_distance < BLOCKS bits agree on at least one whole block
+        for block, table in enumerate(self._blocks):
+            for candidate in table.get((simhash >> (16 * block)) & 0xFFFF, ()):
+                if bin(simhash ^ self._simhashes[candidate]).count('1') <= self.max_distance:
+                    return self._simhash_groups[candidate]
+        return None
+
+    def _add_simhash(self, simhash: int, group: int):
+        position = len(self._simhashes)
+        self._simhashes.append(simhash)
+        self._simhash_groups.append(group)
+        for block, table in enumerate(self._blocks):
+            table.setdefault((simhash >> (16 * block)) & 0xFFFF, []).append(position)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser, spreading 32-bit hashes over all 64 bits."""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _simhash(words: List[str]) -> int:
+    """64-bit simhash of a text's words and word pairs."""
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode('utf-8', 'surrogatepass')) for word in words),
+        dtype=np.uint64, count=len(words)
+    )
+    pair_hashes = _mix(word_hashes[:-1]) ^ word_hashes[1:]
+    hashes = _mix(np.concatenate((word_hashes, pair_hashes)))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0) * 2 > len(hashes)
+    return int.from_bytes(np.packbits(votes, bitorder='little').tobytes(), 'little')
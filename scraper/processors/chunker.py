@@ -2,17 +2,127 @@
 Content chunking by semantic boundaries.
 """
 import re
-from typing import List
-from models import ContentChunk
+from itertools import groupby
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+from models import ContentChunk, SpilledText
+
+
+class _TextWindow:
+    """Text that arrives in pieces, addressed by absolute offsets."""
+    
+    def __init__(self, text: str = ''):
+        self._segments: List[Tuple[int, str]] = []
+        self.end = 0
+        if text:
+            self.append(text)
+    
+    def append(self, text: str) -> int:
+        """Append text, returning its offset."""
+        offset = self.end
+        self._segments.append((offset, text))
+        self.end += len(text)
+        return offset
+    
+    def slice(self, start: int, end: int) -> str:
+        """Get the text between two offsets."""
+        parts = []
+        for offset, text in self._segments:
+            if offset + len(text) <= start:
+                continue
+            if offset >= end:
+                break
+            parts.append(text[max(0, start - offset):end - offset])
+        return ''.join(parts)
+    
+    def discard(self, before: int):
+        """Forget segments that end before an offset."""
+        keep = 0
+        while (keep < len(self._segments) and
+               self._segments[keep][0] + len(self._segments[keep][1]) <= before):
+            keep += 1
+        if keep:
+            del self._segments[:keep]
+
+
+class _Lines:
+    """Consecutive lines of a text and the offset of the first one."""
+    
+    def __init__(self):
+        self.lines: List[str] = []
+        self.start = 0
+    
+    def append(self, line: str, offset: int):
+        """Add a line found at an offset of the text."""
+        if not self.lines:
+            self.start = offset
+        self.lines.append(line)
 
 
 class ContentChunker:
     """Chunks content by semantic boundaries (headings, paragraphs)."""
     
+    HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+)$')
+    
+    # Sections longer than this are split into paragraphs
+    MAX_SECTION_LENGTH = 2000
+    PARAGRAPH_BREAK_PATTERN = re.compile(r'\n\n+')
+    
+    # Whitespace that follows the end of a sentence
+    SENTENCE_BREAK_PATTERN = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+    # Approximate tokens: words and individual punctuation marks
+    TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+    WORD_PATTERN = re.compile(r'\S+')
+    
+    SIZE_UNITS = ('chars', 'tokens')
+    
+    def __init__(self, max_size: Optional[int] = None, min_size: int = 0,
+                 overlap: int = 0, unit: str = 'chars'):
+        """
+        Initialize the chunker.
+        
+        Without max_size, sections are only split by paragraphs once they are
+        longer than MAX_SECTION_LENGTH characters. With max_size, every chunk
+        is packed from whole paragraphs up to that size, oversized paragraphs
+        are split at sentence boundaries, and chunks smaller than min_size are
+        merged into the previous chunk of the same section.
+        
+        Args:
+            max_size: Maximum chunk size, or None for heading/paragraph chunking
+            min_size: Chunks smaller than this are merged with their neighbour
+            overlap: Size of the tail of each chunk repeated at the start of
+                the next chunk of the same section
+            unit: 'chars' or 'tokens' (words and punctuation marks)
+        """
+        if unit not in self.SIZE_UNITS:
+            raise ValueError(f"Unknown chunk size unit: {unit}")
+        if max_size is not None:
+            if max_size <= 0:
+                raise ValueError("max_size must be positive")
+            if not 0 <= min_size <= max_size:
+                raise ValueError("min_size must be between 0 and max_size")
+            if not 0 <= overlap < max_size // 2:
+                raise ValueError("overlap must be less than half of max_size")
+        
+        self.max_size = max_size
+        self.min_size = min_size
+        self.overlap = overlap
+        self.unit = unit
+    
+    def settings(self) -> Dict[str, Any]:
+        """Get the settings that determine how content is chunked."""
+        return {
+            'max_size': self.max_size,
+            'min_size': self.min_size,
+            'overlap': self.overlap,
+            'unit': self.unit
+        }
+    
     def chunk(self, text: str) -> List[ContentChunk]:
         """
         Split content into semantic chunks.
         
+        The chunks are spans of text rather than copies of it.
+        
         Args:
             text: Text to chunk
             
@@ -21,72 +131,454 @@ class ContentChunker:
         """
         chunks = []
         
+        if self.max_size is not None:
+            window = _TextWindow(text)
+            spans = self._budget_spans(self._iter_lines(text), window, fill=False)
+            for start, end, heading, level in spans:
+                chunks.append(ContentChunk(buffer=text, start=start, end=end,
+                                           heading=heading, level=level))
+            return chunks
+        
         # Split by headings (markdown style)
         sections = self._split_by_headings(text)
         
-        for heading, level, content in sections:
+        for heading, level, start, end in sections:
             # Further split long sections by paragraphs
-            if len(content) > 2000:  # If section is too long
-                paragraphs = self._split_by_paragraphs(content)
-                for i, para in enumerate(paragraphs):
-                    if para.strip():
-                        # First paragraph gets the heading
-                        chunk_heading = heading if i == 0 else None
-                        chunks.append(ContentChunk(
-                            text=para.strip(),
-                            heading=chunk_heading,
-                            level=level
-                        ))
+            if end - start > self.MAX_SECTION_LENGTH:  # If section is too long
+                paragraphs = self._split_by_paragraphs(text, start, end)
+                for i, (para_start, para_end) in enumerate(paragraphs):
+                    # First paragraph gets the heading
+                    chunk_heading = heading if i == 0 else None
+                    chunks.append(ContentChunk(
+                        buffer=text,
+                        start=para_start,
+                        end=para_end,
+                        heading=chunk_heading,
+                        level=level
+                    ))
             else:
-                if content.strip():
+                start, end = self._strip_span(text, start, end)
+                if start < end:
                     chunks.append(ContentChunk(
-                        text=content.strip(),
+                        buffer=text,
+                        start=start,
+                        end=end,
                         heading=heading,
                         level=level
                     ))
         
         return chunks
     
+    def chunk_lines(self, lines: Iterable[str],
+                    buffer: Union[str, SpilledText, None] = None) -> Iterator[ContentChunk]:
+        """
+        Split a stream of lines into semantic chunks as they arrive.
+        
+        Produces the same chunks as chunk('\n'.join(lines)), but only buffers
+        one section up to the split threshold, or one paragraph once a section
+        is known to be split by paragraphs.
+        
+        Args:
+            lines: Lines of text, without line terminators
+            buffer: Text holding '\n'.join(lines), such as a SpilledText the
+                lines are written to; the chunks are spans of it instead of
+                copies of their text
+            
+        Yields:
+            ContentChunk objects
+        """
+        if self.max_size is not None:
+            window = _TextWindow()
+            for start, end, heading, level in self._budget_spans(lines, window, fill=True):
+                yield self._line_chunk(window, buffer, start, end, heading, level)
+            return
+        
+        heading = None
+        level = 0
+        section = _Lines()
+        length = -1  # Length of '\n'.join(section) while the section is whole
+        split = False
+        first_paragraph = True
+        offset = 0  # Offset of the next line in '\n'.join(lines)
+        
+        for line in lines:
+            line_start = offset
+            offset += len(line) + 1
+            match = self.HEADING_PATTERN.match(line)
+            if match:
+                yield from self._flush_lines(section, buffer, heading, level, split,
+                                             first_paragraph)
+                heading = match.group(2).strip()
+                level = len(match.group(1))
+                section = _Lines()
+                length = -1
+                split = False
+                first_paragraph = True
+                continue
+            
+            if not split:
+                section.append(line, line_start)
+                length += len(line) + 1
+                if length <= self.MAX_SECTION_LENGTH:
+                    continue
+                
+                # Section is too long: emit its finished paragraphs
+                split = True
+                lines_so_far, section = section, _Lines()
+                line_start = lines_so_far.start
+                for buffered in lines_so_far.lines:
+                    chunk = self._add_paragraph_line(section, buffer, buffered, line_start,
+                                                     heading, level, first_paragraph)
+                    line_start += len(buffered) + 1
+                    if chunk:
+                        first_paragraph = False
+                        yield chunk
+                continue
+            
+            chunk = self._add_paragraph_line(section, buffer, line, line_start, heading, level,
+                                             first_paragraph)
+            if chunk:
+                first_paragraph = False
+                yield chunk
+        
+        yield from self._flush_lines(section, buffer, heading, level, split, first_paragraph)
+    
+    def _budget_spans(self, lines: Iterable[str], window: _TextWindow,
+                      fill: bool) -> Iterator[Tuple[int, int, Optional[str], int]]:
+        """
+        Pack lines into chunks of at most max_size.
+        
+        Args:
+            lines: Lines of text, without line terminators
+            window: Text of the lines
+            fill: Whether lines are appended to the window as they are read
+        
+        Yields:
+            (start, end, heading, level) tuples with offsets into '\n'.join(lines)
+        """
+        paragraphs = self._iter_paragraphs(lines, window if fill else None)
+        for (_, heading, level), group in groupby(paragraphs, key=lambda item: item[0]):
+            for start, end in self._pack_section((item[1:] for item in group), window):
+                yield start, end, heading, level
+    
+    def _iter_paragraphs(self, lines: Iterable[str],
+                         window: Optional[_TextWindow] = None) -> Iterator[Tuple[tuple, int, int, str]]:
+        """
+        Group a stream of lines into paragraphs.
+        
+        Args:
+            lines: Lines of text, without line terminators
+            window: Window the lines are appended to as they are read
+        
+        Yields:
+            ((section_index, heading, level), start, end, paragraph) tuples
+        """
+        section = (0, None, 0)
+        buffer: List[str] = []
+        buffer_start = 0
+        offset = 0
+        
+        for line in lines:
+            if window is not None:
+                window.append(line + '\n')
+            
+            match = self.HEADING_PATTERN.match(line)
+            if match or not line:
+                paragraph = self._paragraph(buffer, buffer_start)
+                if paragraph:
+                    yield (section,) + paragraph
+                buffer = []
+                if match:
+                    section = (section[0] + 1, match.group(2).strip(), len(match.group(1)))
+            else:
+                if not buffer:
+                    buffer_start = offset
+                buffer.append(line)
+            
+            offset += len(line) + 1
+        
+        paragraph = self._paragraph(buffer, buffer_start)
+        if paragraph:
+            yield (section,) + paragraph
+    
+    def _paragraph(self, lines: List[str], offset: int) -> Optional[Tuple[int, int, str]]:
+        """Get the stripped text and offsets of a paragraph's lines."""
+        raw = '\n'.join(lines)
+        text = raw.strip()
+        if not text:
+            return None
+        start = offset + len(raw) - len(raw.lstrip())
+        return start, start + len(text), text
+    
+    def _pack_section(self, paragraphs: Iterable[Tuple[int, int, str]],
+                      window: _TextWindow) -> Iterator[Tuple[int, int]]:
+        """
+        Pack the paragraphs of one section into spans of at most max_size.
+        
+        Paragraphs are consumed one at a time and every piece of text is
+        measured once, so the section is processed in a single linear pass.
+        Every chunk is a contiguous span of the text, and the whitespace
+        between its pieces counts towards its size.
+        
+        Yields:
+            (start, end) offsets of each chunk
+        """
+        pending: Optional[Tuple[int, int, int]] = None  # Finished chunk, held back for merging
+        start = None
+        end = 0
+        size = 0
+        seed_size = 0  # Size of the overlap repeated from the last chunk
+        
+        for para_start, _, paragraph in paragraphs:
+            for piece_start, piece_end, piece_size in self._split_paragraph(paragraph, para_start):
+                if start is not None:
+                    join_size = self._gap_size(end, piece_start)
+                    if size + join_size + piece_size <= self.max_size:
+                        size += join_size + piece_size
+                        end = piece_end
+                        continue
+                    
+                    # Chunk is full: start the next one with the overlap
+                    if pending is not None:
+                        yield pending[0], pending[1]
+                    pending = (start, end, size)
+                    window.discard(start)
+                    
+                    start, size = self._overlap_seed(window, start, end)
+                    if start is not None:
+                        join_size = self._gap_size(end, piece_start)
+                        if size + join_size + piece_size <= self.max_size:
+                            seed_size = size + join_size
+                            size += join_size + piece_size
+                            end = piece_end
+                            continue
+                
+                start, end, size = piece_start, piece_end, piece_size
+                seed_size = 0
+        
+        if start is None:
+            return
+        
+        if pending is not None:
+            # Merge a small final chunk into the previous one when it fits
+            body_size = size - seed_size
+            if self.unit == 'chars':
+                merged_size = end - pending[0]
+            else:
+                merged_size = pending[2] + body_size
+            if body_size < self.min_size and merged_size <= self.max_size:
+                yield pending[0], end
+                return
+            yield pending[0], pending[1]
+        
+        yield start, end
+    
+    def _split_paragraph(self, paragraph: str, offset: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Split a paragraph into pieces that each fit in max_size.
+        
+        A paragraph that fits is yielded whole. Otherwise it is split at
+        sentence boundaries, and sentences that are still too long are split
+        between words.
+        
+        Args:
+            paragraph: Paragraph text
+            offset: Offset of the paragraph in the text
+        
+        Yields:
+            (start, end, size) tuples
+        """
+        size = self._size(paragraph)
+        if size <= self.max_size:
+            yield offset, offset + len(paragraph), size
+            return
+        
+        start = 0
+        for match in self.SENTENCE_BREAK_PATTERN.finditer(paragraph):
+            yield from self._split_sentence(paragraph, start, match.start(), offset)
+            start = match.end()
+        yield from self._split_sentence(paragraph, start, len(paragraph), offset)
+    
+    def _split_sentence(self, paragraph: str, start: int, end: int,
+                        offset: int) -> Iterator[Tuple[int, int, int]]:
+        """Split a sentence between words into pieces that fit in max_size."""
+        if start >= end:
+            return
+        size = self._size(paragraph[start:end])
+        if size <= self.max_size:
+            yield offset + start, offset + end, size
+            return
+        
+        piece_start = None
+        piece_end = 0
+        size = 0
+        for match in self.WORD_PATTERN.finditer(paragraph, start, end):
+            word_start, word_end = match.span()
+            word_size = self._size(match.group())
+            if piece_start is not None:
+                join_size = self._gap_size(piece_end, word_start)
+                if size + join_size + word_size <= self.max_size:
+                    size += join_size + word_size
+                    piece_end = word_end
+                    continue
+                yield offset + piece_start, offset + piece_end, size
+                piece_start = None
+            
+            # A single word longer than the budget is cut into pieces
+            while word_size > self.max_size:
+                if self.unit == 'chars':
+                    cut = word_start + self.max_size
+                else:
+                    tokens = self.TOKEN_PATTERN.finditer(paragraph, word_start, word_end)
+                    for _ in range(self.max_size):
+                        cut = next(tokens).end()
+                yield offset + word_start, offset + cut, self.max_size
+                word_start = cut
+                word_size = self._size(paragraph[word_start:word_end])
+            
+            piece_start, piece_end, size = word_start, word_end, word_size
+        
+        if piece_start is not None:
+            yield offset + piece_start, offset + piece_end, size
+    
+    def _overlap_seed(self, window: _TextWindow, start: int,
+                      end: int) -> Tuple[Optional[int], int]:
+        """
+        Find the tail of a chunk that starts the next chunk, cut at a word boundary.
+        
+        Returns:
+            (start, size) of the tail, or (None, 0) without overlap
+        """
+        if not self.overlap:
+            return None, 0
+        
+        text = window.slice(start, end)
+        words = [match.span() for match in self.WORD_PATTERN.finditer(text)]
+        seed_start = None
+        size = 0
+        for word_start, word_end in reversed(words):
+            if self.unit == 'chars':
+                word_size = len(text) - word_start
+            else:
+                word_size = size + self._size(text[word_start:word_end])
+            if word_size > self.overlap:
+                break
+            seed_start, size = word_start, word_size
+        
+        if seed_start is None:
+            return None, 0
+        return start + seed_start, size
+    
+    def _size(self, text: str) -> int:
+        """Measure text in the configured unit."""
+        if self.unit == 'tokens':
+            return len(self.TOKEN_PATTERN.findall(text))
+        return len(text)
+    
+    def _gap_size(self, end: int, start: int) -> int:
+        """Measure the whitespace between two pieces."""
+        return start - end if self.unit == 'chars' else 0
+    
+    def _add_paragraph_line(self, paragraph: '_Lines', buffer: Union[str, SpilledText, None],
+                            line: str, line_start: int, heading: Optional[str], level: int,
+                            first_paragraph: bool) -> Optional[ContentChunk]:
+        """Add a line to the current paragraph, returning the paragraph once it ends."""
+        if line:
+            paragraph.append(line, line_start)
+            return None
+        
+        span = self._paragraph(paragraph.lines, paragraph.start)
+        paragraph.lines.clear()
+        if not span:
+            return None
+        return self._line_chunk(span[2], buffer, span[0], span[1],
+                                heading if first_paragraph else None, level)
+    
+    def _flush_lines(self, lines: '_Lines', buffer: Union[str, SpilledText, None],
+                     heading: Optional[str], level: int, split: bool,
+                     first_paragraph: bool) -> Iterator[ContentChunk]:
+        """Emit what remains of a section when it ends."""
+        span = self._paragraph(lines.lines, lines.start)
+        if span:
+            yield self._line_chunk(span[2], buffer, span[0], span[1],
+                                   heading if (first_paragraph or not split) else None, level)
+    
+    @staticmethod
+    def _line_chunk(text: Union[str, _TextWindow], buffer: Union[str, SpilledText, None],
+                    start: int, end: int, heading: Optional[str], level: int) -> ContentChunk:
+        """Make a chunk of streamed lines, as a span of buffer when there is one."""
+        if buffer is not None:
+            return ContentChunk(buffer=buffer, start=start, end=end, heading=heading, level=level)
+        if isinstance(text, _TextWindow):
+            text = text.slice(start, end)
+        return ContentChunk(text=text, heading=heading, level=level)
+    
     def _split_by_headings(self, text: str) -> List[tuple]:
         """
         Split text by markdown headings.
         
         Returns:
-            List of (heading_text, level, content) tuples
+            List of (heading_text, level, start, end) tuples, where start and
+            end are the offsets of the section content in text
         """
         sections = []
-        lines = text.split('\n')
         
         current_heading = None
         current_level = 0
-        current_content = []
-        
-        heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$')
+        content_start = None  # Offset of the first content line of the section
+        content_end = 0
+        offset = 0
         
-        for line in lines:
-            match = heading_pattern.match(line)
+        for line in self._iter_lines(text):
+            match = self.HEADING_PATTERN.match(line)
             if match:
                 # Save previous section
-                if current_content or current_heading is None:
-                    content = '\n'.join(current_content)
-                    sections.append((current_heading, current_level, content))
+                if content_start is not None:
+                    sections.append((current_heading, current_level, content_start, content_end))
                 
                 # Start new section
                 current_level = len(match.group(1))
                 current_heading = match.group(2).strip()
-                current_content = []
+                content_start = None
             else:
-                current_content.append(line)
+                if content_start is None:
+                    content_start = offset
+                content_end = offset + len(line)
+            offset += len(line) + 1
         
         # Save last section
-        if current_content or current_heading:
-            content = '\n'.join(current_content)
-            sections.append((current_heading, current_level, content))
+        if content_start is not None:
+            sections.append((current_heading, current_level, content_start, content_end))
         
         return sections
     
-    def _split_by_paragraphs(self, text: str) -> List[str]:
-        """Split text by paragraph breaks."""
+    def _split_by_paragraphs(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Split a span of text by paragraph breaks, returning stripped spans."""
+        paragraphs = []
         # Split on double newlines
-        paragraphs = re.split(r'\n\n+', text)
-        return [p.strip() for p in paragraphs if p.strip()]
+        for match in self.PARAGRAPH_BREAK_PATTERN.finditer(text, start, end):
+            paragraphs.append(self._strip_span(text, start, match.start()))
+            start = match.end()
+        paragraphs.append(self._strip_span(text, start, end))
+        return [(p_start, p_end) for p_start, p_end in paragraphs if p_start < p_end]
+    
+    @staticmethod
+    def _iter_lines(text: str) -> Iterator[str]:
+        """Iterate over the lines of text without splitting it all at once."""
+        start = 0
+        while True:
+            end = text.find('\n', start)
+            if end == -1:
+                yield text[start:]
+                return
+            yield text[start:end]
+            start = end + 1
+    
+    @staticmethod
+    def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+        """Narrow a span of text to exclude leading and trailing whitespace."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
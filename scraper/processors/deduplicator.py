@@ -0,0 +1,134 @@
+"""
+Near-duplicate source detection with MinHash signatures and LSH banding.
+
+Syndicated copies, AMP variants and mirrored PDFs of the same text share
+most of their word shingles. Each source is reduced to a fixed-size MinHash
+signature, and only sources whose signatures collide in at least one LSH
+band are compared, so finding duplicates does not compare every pair.
+"""
+import re
+import zlib
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class SourceDeduplicator:
+    """Groups sources whose texts are near-duplicates of each other."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity of the word
+                shingles of two duplicate sources
+            num_perm: Number of hash functions in a signature
+            bands: Number of LSH bands; num_perm must be a multiple of it.
+                More bands find more candidate pairs at lower similarity.
+            shingle_size: Number of consecutive words in a shingle
+            seed: Seed of the hash functions
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, lines: Iterable[str], block_size: int = 4096) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            lines: Text, as one string or line by line
+            block_size: Number of shingles hashed at a time
+
+        Returns:
+            Array of num_perm hash values, or None if the text has fewer
+            words than a shingle
+        """
+        if isinstance(lines, str):
+            lines = (lines,)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        window = deque(maxlen=self.shingle_size)
+        block: List[int] = []
+        seen = False
+        for line in lines:
+            for word in _WORD_PATTERN.findall(line.lower()):
+                window.append(word)
+                if len(window) == self.shingle_size:
+                    block.append(zlib.crc32(' '.join(window).encode('utf-8', 'surrogatepass')))
+                    if len(block) == block_size:
+                        self._update(signature, block)
+                        block = []
+                        seen = True
+        if block:
+            self._update(signature, block)
+            seen = True
+        return signature if seen else None
+
+    def _update(self, signature: np.ndarray, shingles: List[int]):
+        """Lower the signature to the minimum of each hash function over shingles."""
+        values = np.array(shingles, dtype=np.uint64)[:, None]
+        # a, b and the shingle hashes are below 2**32, so a * x + b fits in 64 bits
+        hashed = (values * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        np.minimum(signature, hashed.min(axis=0), out=signature)
+
+    def groups(self, signatures: List[Optional[np.ndarray]]) -> List[List[int]]:
+        """
+        Find groups of near-duplicate texts.
+
+        Args:
+            signatures: Signature of each text (None for texts to leave out)
+
+        Returns:
+            Lists of two or more indexes into signatures, each sorted, in
+            order of their first index
+        """
+        rows = self.num_perm // self.bands
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                key = band.to_bytes(2, 'little') + signature[band * rows:(band + 1) * rows].tobytes()
+                buckets[key].append(i)
+
+        parent = list(range(len(signatures)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        checked = set()
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if find(i) != find(j) and self.similarity(signatures[i], signatures[j]) >= self.threshold:
+                        parent[max(find(i), find(j))] = min(find(i), find(j))
+
+        grouped: Dict[int, List[int]] = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                grouped[find(i)].append(i)
+        return [members for _, members in sorted(grouped.items()) if len(members) > 1]
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimate the Jaccard similarity of two texts from their signatures."""
+        return float(np.count_nonzero(first == second)) / len(first)
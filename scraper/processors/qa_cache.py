@@ -0,0 +1,116 @@
+"""
+On-disk cache of per-section QA results.
+
+Formatting and linting a ledger section only depend on its text and on the
+tools doing it, so the results are stored under the SHA-256 of that text
+combined with the tool versions and settings, and reused by later runs.
+Results of other tool versions or settings are never looked up again and
+are pruned after the next run.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+
+# Bump when the format of cached results changes
+QA_CACHE_VERSION = 2
+
+
+class QACache:
+    """Caches formatted sections and their lint failures by content hash."""
+
+    def __init__(self, cache_dir: str, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the QA cache.
+
+        Args:
+            cache_dir: Directory holding the cache
+            settings: Versions and settings of the formatting and linting
+                tools; results stored with different settings are not used
+        """
+        self.cache_dir = Path(cache_dir)
+        self.settings = {'version': QA_CACHE_VERSION, **(settings or {})}
+        self._salt = json.dumps(self.settings, sort_keys=True).encode('utf-8')
+        self.formatted_dir = self.cache_dir / 'formatted'
+        self.lint_dir = self.cache_dir / 'lint'
+        self.formatted_dir.mkdir(parents=True, exist_ok=True)
+        self.lint_dir.mkdir(parents=True, exist_ok=True)
+        self._used: Set[Path] = set()
+
+    @staticmethod
+    def digest(text: str) -> str:
+        """Hash a section's text."""
+        return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def formatted(self, digest: str) -> Optional[str]:
+        """
+        Get the formatted version of a section.
+
+        Args:
+            digest: Hash of the unformatted section
+
+        Returns:
+            Formatted section, or None if it is not cached
+        """
+        path = self.formatted_dir / f'{self._key(digest)}.md'
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+        except OSError:
+            return None
+        self._used.add(path)
+        return text
+
+    def store_formatted(self, digest: str, formatted: str):
+        """Store the formatted version of a section."""
+        path = self.formatted_dir / f'{self._key(digest)}.md'
+        self._write(path, formatted)
+
+    def failures(self, digest: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the lint failures of a section.
+
+        Args:
+            digest: Hash of the formatted section
+
+        Returns:
+            Lint failures with line numbers relative to the section, or None
+            if the section has not been linted before
+        """
+        path = self.lint_dir / f'{self._key(digest)}.json'
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                failures = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._used.add(path)
+        return failures
+
+    def store_failures(self, digest: str, failures: List[Dict[str, Any]]):
+        """Store the lint failures of a section."""
+        path = self.lint_dir / f'{self._key(digest)}.json'
+        self._write(path, json.dumps(failures))
+
+    def prune(self):
+        """Remove every entry that was not used or stored in this run."""
+        for directory in (self.formatted_dir, self.lint_dir):
+            for path in directory.iterdir():
+                if path not in self._used:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+    def _key(self, digest: str) -> str:
+        """Combine a section's hash with the tool settings into its entry name."""
+        return hashlib.sha256(self._salt + digest.encode('ascii')).hexdigest()
+
+    def _write(self, path: Path, text: str):
+        """Atomically write an entry."""
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        self._used.add(path)
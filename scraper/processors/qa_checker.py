@@ -1,16 +1,138 @@
 """
 QA Checker module for validating and improved markdown quality.
 """
+import bisect
+import hashlib
+import os
 import re
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable, List, Dict, Any, Iterable, Optional, Tuple, Union
 import mdformat
-from pymarkdown.api import PyMarkdownApi, PyMarkdownScanPathResult, PyMarkdownFixStringResult
+from pymarkdown.api import (PyMarkdownApi, PyMarkdownScanFailure, PyMarkdownScanPathResult,
+                            PyMarkdownFixStringResult)
+from models import VerbatimSection
+from .qa_cache import QACache
+
+# pymarkdown rule reporting the headings and first styles of a section
+STRUCTURE_RULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qa_structure_rule.py')
+STRUCTURE_RULE_ID = 'LDG001'
+
+
+def _structure_api(styles: Optional[Dict[str, str]] = None) -> PyMarkdownApi:
+    """Get a pymarkdown API that also reports structure, with the given rule styles."""
+    api = PyMarkdownApi().add_plugin_path(STRUCTURE_RULE_PATH)
+    api.enable_rule_by_identifier(STRUCTURE_RULE_ID.lower())
+    for rule_id, style in (styles or {}).items():
+        api.set_string_property(f'plugins.{rule_id.lower()}.style', style)
+    return api
+
+
+def _check_section(section: str, fix: bool) -> Tuple[str, List[PyMarkdownScanFailure]]:
+    """Format a section if asked, then lint it with its structure; run in a worker process."""
+    if fix:
+        section = QAChecker().format_markdown(section)
+    return section, _structure_api().scan_string(section).scan_failures
+
+
+@dataclass
+class _Heading:
+    """A heading of a document checked section by section."""
+    line_number: int
+    lines: List[str]
+    indent: int
+    reported: bool
+
+
+@dataclass
+class _DocumentState:
+    """What check_sections() knows about the document before the next section."""
+    start_line: int = 1
+    # Level of the last heading, as fixed
+    last_level: int = 0
+    # First style each style-consistency rule saw
+    styles: Dict[str, str] = field(default_factory=dict)
+    headings: List[_Heading] = field(default_factory=list)
+    failures: List[PyMarkdownScanFailure] = field(default_factory=list)
+    # Failures that only stand if the current section is the last one
+    end_failures: List[PyMarkdownScanFailure] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
 
 class QAChecker:
     """Checks and lints generated markdown."""
 
-    def __init__(self):
+    REQUIRED_SECTIONS = [
+        "# Knowledge Ledger",
+        "## Executive Index",
+        "### Core Topics",
+        "### Source Map",
+        "## Source Content"
+    ]
+
+    # Rules that only apply to the start of a document
+    DOCUMENT_START_RULES = {'MD041'}
+    # Rules that only apply to the end of a document
+    DOCUMENT_END_RULES = {'MD047'}
+    # Rules whose result depends on every heading before the current one
+    HEADING_RULES = {'MD001', 'MD003', 'MD024', 'MD025'}
+    # Reference definitions, fragment links and pragmas tie distant parts of
+    # a document together
+    CROSS_SECTION_PATTERN = re.compile(
+        r'^ {0,3}\[(?:\\.|[^\]\\])+\]:|\]\(\s*<?#|<!--\s*pyml', re.MULTILINE
+    )
+
+    # full: format and lint every section; changed: only sections not
+    # linted in an earlier run, reusing the formatting of the others; sample:
+    # a fixed fraction of sections, chosen by their text, leaving the others
+    # as they are; off: no formatting or linting
+    QA_MODES = ('full', 'changed', 'sample', 'off')
+
+    def __init__(self, mode: str = 'full', cache: Optional[QACache] = None,
+                 sample_rate: float = 0.1, workers: int = 1):
+        """
+        Initialize the checker.
+
+        Args:
+            mode: Which sections check_sections() formats and lints
+            cache: Cache of per-section results from earlier runs
+            sample_rate: Fraction of sections formatted and linted in sample mode
+            workers: Number of processes check_sections() formats and lints
+                sections in
+        """
+        if mode not in self.QA_MODES:
+            raise ValueError(f"Unknown QA mode: {mode}")
         self.api = PyMarkdownApi()
+        self.mode = mode
+        self.cache = cache
+        self.sample_rate = sample_rate
+        self.workers = workers
+
+    @staticmethod
+    def settings() -> Dict[str, Any]:
+        """
+        Get the versions and configuration of the formatting and linting tools.
+        
+        pymarkdown reads its configuration from a .pymarkdown or
+        pyproject.toml file in the working directory, so the hashes of
+        those files are included.
+        
+        Returns:
+            Dictionary identifying everything results depend on besides the text
+        """
+        config = {}
+        for name in ('.pymarkdown', 'pyproject.toml'):
+            try:
+                with open(name, 'rb') as f:
+                    config[name] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                pass
+        return {
+            'mdformat': mdformat.__version__,
+            'pymarkdown': PyMarkdownApi().application_version,
+            'config': config
+        }
 
     def check_structure(self, markdown: str) -> List[str]:
         """
@@ -23,15 +145,8 @@ class QAChecker:
             List of error messages, empty if valid.
         """
         errors = []
-        required_sections = [
-            "# Knowledge Ledger",
-            "## Executive Index",
-            "### Core Topics",
-            "### Source Map",
-            "## Source Content"
-        ]
-        
-        for section in required_sections:
+        
+        for section in self.REQUIRED_SECTIONS:
             if section not in markdown:
                 errors.append(f"Missing required section: '{section}'")
                 
@@ -147,3 +262,316 @@ class QAChecker:
             "link_errors": self.check_links(markdown),
             "lint_errors": self.lint_markdown(markdown)
         }
+
+    def format_section(self, markdown: str) -> str:
+        """
+        Format one section of a document, reusing cached results.
+        
+        Args:
+            markdown: The markdown section to format.
+            
+        Returns:
+            Formatted section, or the section itself when the QA mode
+            leaves it out.
+        """
+        if self.mode == 'off' or not self._sampled(markdown):
+            return markdown
+        if self.cache is None:
+            return self.format_markdown(markdown)
+        
+        digest = self.cache.digest(markdown)
+        formatted = self.cache.formatted(digest)
+        if formatted is None:
+            formatted = self.format_markdown(markdown)
+            self.cache.store_formatted(digest, formatted)
+        return formatted
+
+    def check_sections(self, sections: Iterable[Union[str, VerbatimSection]],
+                       write: Optional[Callable[[Union[str, VerbatimSection]], None]] = None
+                       ) -> Dict[str, Any]:
+        """
+        Run all checks over a document given as sections, formatting it on the way.
+        
+        The document is the sections joined with newlines. Sections are
+        consumed one at a time, so the whole document never has to be held
+        in memory. With write, sections are formatted like
+        format_markdown() does and passed to write in document order;
+        without it, sections are checked as given. The QA mode applies to
+        formatting and linting alike: sections left out of the sample are
+        written as they are, and unchanged sections are written as cached
+        without being linted again. Formatted sections and lint results
+        are reused from the cache.
+        
+        Rules that carry state through a document are reconciled across
+        sections, so in full mode the written document is the one
+        fix_linting() makes of the sections formatted by mdformat and
+        joined, and the lint errors are the ones lint_markdown() reports
+        for it. Heading rules are rerun over the document's headings alone,
+        rules about the start and end of a document only apply to the
+        first and last section, and a section is fixed and linted again in
+        context when its first heading skips levels after the previous
+        section or its first style of a style-consistency rule differs from
+        the document's. Reference definitions, fragment links and pymarkdown
+        pragmas are not reconciled; sections containing them are counted.
+        VerbatimSections are neither formatted nor linted; without write,
+        they must have been written already so their line count is known.
+        
+        With several workers, sections are formatted and linted in a
+        process pool while the following sections are produced.
+        
+        Args:
+            sections: Markdown sections, in document order.
+            write: Function writing a formatted section.
+            
+        Returns:
+            Dictionary with results, like check_all(), plus the number of
+            sections, sections linted, lint results taken from the cache and
+            sections with reference definitions, fragment links or pragmas.
+        """
+        missing = list(self.REQUIRED_SECTIONS)
+        link_errors = []
+        state = _DocumentState()
+        counts = {'sections': 0, 'sections_linted': 0, 'sections_cached': 0,
+                  'sections_unreconciled': 0}
+        # Sections waiting for their results, in document order
+        pending = deque()
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 and self.mode != 'off' else None
+        
+        def finish(section, result, linted):
+            section = self._finish_section(section, result, linted, state, write is not None, counts)
+            if write is not None:
+                write(section)
+            if isinstance(section, VerbatimSection):
+                state.start_line += section.newline_count + 1
+                return
+            nonlocal missing
+            missing = [required for required in missing if required not in section]
+            link_errors.extend(self.check_links(section))
+            state.start_line += section.count('\n') + 1
+        
+        try:
+            for section in sections:
+                counts['sections'] += 1
+                if isinstance(section, VerbatimSection):
+                    pending.append((section, None, False))
+                else:
+                    pending.append(self._start_section(section, write is not None, counts, pool))
+                
+                # Bound the number of sections held by the pool
+                while pending and (len(pending) > 2 * self.workers or
+                                   not isinstance(pending[0][1], Future)):
+                    finish(*pending.popleft())
+            
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        
+        failures = state.failures + state.end_failures + self._heading_failures(state.headings)
+        failures.sort(key=lambda failure: (failure.line_number, failure.column_number,
+                                           failure.rule_id))
+        return {
+            "structure_errors": [f"Missing required section: '{section}'" for section in missing],
+            "link_errors": link_errors,
+            "lint_errors": [str(failure) for failure in failures] + state.errors,
+            **counts
+        }
+
+    def _sampled(self, section: str) -> bool:
+        """Check whether the QA mode's sample includes a section; every mode but sample does."""
+        if self.mode != 'sample':
+            return True
+        return int(QACache.digest(section)[:8], 16) < self.sample_rate * 0x100000000
+
+    def _start_section(self, section: str, fix: bool, counts: Dict[str, int],
+                       pool: Optional[ProcessPoolExecutor] = None
+                       ) -> Tuple[str, Any, bool]:
+        """
+        Start formatting and linting a section as the QA mode selects.
+        
+        Returns:
+            The section, its result or a future of it, and whether it is
+            linted. The result is the formatted section and its failures,
+            including the structure rule's, or None when it is not scanned.
+        """
+        if self.mode == 'off' or not self._sampled(section):
+            # Sections the mode leaves out are neither formatted nor linted
+            return section, (section, None), False
+        
+        formatted = None
+        if not fix:
+            formatted = section
+        elif self.cache:
+            formatted = self.cache.formatted(QACache.digest(section))
+        cached = None
+        if formatted is not None and self.cache:
+            cached = self.cache.failures(QACache.digest(formatted))
+        
+        # Unchanged sections reuse their formatting and are not linted again
+        lint = self.mode != 'changed' or cached is None
+        if lint:
+            counts['sections_linted'] += 1
+        if cached is not None:
+            if lint:
+                counts['sections_cached'] += 1
+            cached = [PyMarkdownScanFailure(**failure) for failure in cached]
+            return section, (formatted, cached), lint
+        
+        text = section if formatted is None else formatted
+        try:
+            if pool is not None:
+                result = pool.submit(_check_section, text, formatted is None)
+            else:
+                result = _check_section(text, formatted is None)
+        except Exception as e:
+            result = Future()
+            result.set_exception(e)
+        return section, result, lint
+
+    def _finish_section(self, section: Union[str, VerbatimSection], result: Any, linted: bool,
+                        state: _DocumentState, fix: bool, counts: Dict[str, int]
+                        ) -> Union[str, VerbatimSection]:
+        """
+        Reconcile a section's results with the document before it.
+        
+        Returns:
+            The section to write.
+        """
+        # The previous section is not the last one
+        state.end_failures = []
+        if isinstance(section, VerbatimSection):
+            return section
+        
+        raw_section = section
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except Exception as e:
+                state.errors.append(f"Linting failed to run: {str(e)}")
+                return section
+        section, failures = result
+        if self.cache and failures is not None:
+            if fix:
+                self.cache.store_formatted(QACache.digest(raw_section), section)
+            self.cache.store_failures(QACache.digest(section),
+                                      [asdict(failure) for failure in failures])
+        if failures is None:
+            return section
+        
+        headings, styles = self._structure(failures)
+        if self.CROSS_SECTION_PATTERN.search(section):
+            counts['sections_unreconciled'] += 1
+        
+        # Styles that differ from the ones the document settled on
+        context_styles = {rule_id: state.styles[rule_id] for rule_id, style in styles.items()
+                          if state.styles.setdefault(rule_id, style) != style}
+        # A first heading skipping levels is only fixed in context
+        context_level = 0
+        if fix and headings and state.last_level and headings[0][1] > state.last_level + 1:
+            context_level = state.last_level
+        if context_styles or context_level:
+            try:
+                if fix:
+                    section = self._fix_in_context(section, context_level, context_styles)
+                failures = _structure_api(context_styles).scan_string(section).scan_failures
+            except Exception as e:
+                state.errors.append(f"Linting failed to run: {str(e)}")
+                return section
+            headings, _ = self._structure(failures)
+        
+        lines = section.split('\n') if headings else []
+        for line_number, level, last_line in headings:
+            text = lines[line_number - 1].lstrip(' ')
+            state.headings.append(_Heading(
+                line_number=line_number + state.start_line - 1,
+                lines=[text] + lines[line_number:last_line],
+                indent=len(lines[line_number - 1]) - len(text),
+                reported=linted
+            ))
+            state.last_level = level
+        
+        if not linted:
+            return section
+        for failure in failures:
+            if failure.rule_id == STRUCTURE_RULE_ID or failure.rule_id in self.HEADING_RULES:
+                continue
+            if state.start_line > 1 and failure.rule_id in self.DOCUMENT_START_RULES:
+                continue
+            failure = replace(failure, line_number=failure.line_number + state.start_line - 1)
+            if failure.rule_id in self.DOCUMENT_END_RULES:
+                state.end_failures.append(failure)
+            else:
+                state.failures.append(failure)
+        return section
+
+    @staticmethod
+    def _structure(failures: List[PyMarkdownScanFailure]
+                   ) -> Tuple[List[Tuple[int, int, int]], Dict[str, str]]:
+        """
+        Read the structure rule's failures.
+        
+        Returns:
+            (first line, level, last line) of every heading and the first
+            style of each style-consistency rule.
+        """
+        headings = []
+        styles = {}
+        for failure in failures:
+            if failure.rule_id != STRUCTURE_RULE_ID:
+                continue
+            kind, _, value = failure.extra_error_information.strip(' []').partition(':')
+            if kind == 'heading':
+                _, level, last_line = value.split(':')
+                headings.append((failure.line_number, int(level), int(last_line)))
+            else:
+                styles[kind] = value
+        return headings, styles
+
+    def _fix_in_context(self, section: str, level: int, styles: Dict[str, str]) -> str:
+        """
+        Fix a formatted section again as the whole document would fix it.
+        
+        Args:
+            section: The section, as fixed on its own
+            level: Level of the heading before the section, if its first
+                heading skips levels after it
+            styles: Styles the document settled on that the section's
+                style-consistency rules did not
+        """
+        api = PyMarkdownApi()
+        for rule_id, style in styles.items():
+            api.set_string_property(f'plugins.{rule_id.lower()}.style', style)
+        # The heading levels after a heading only depend on its level
+        prefix = '#' * level + ' x\n\n' if level else ''
+        result = api.fix_string(prefix + section)
+        if not result.was_fixed or not result.fixed_file.startswith(prefix):
+            return section
+        return result.fixed_file[len(prefix):]
+
+    def _heading_failures(self, headings: List[_Heading]) -> List[PyMarkdownScanFailure]:
+        """Run the heading rules over a document made of the given headings alone."""
+        if not headings:
+            return []
+        
+        skeleton = []
+        starts = []
+        line_number = 1
+        for heading in headings:
+            skeleton.append('\n'.join(heading.lines))
+            starts.append(line_number)
+            line_number += len(heading.lines) + 1
+        
+        failures = []
+        for failure in self.api.scan_string('\n\n'.join(skeleton) + '\n').scan_failures:
+            if failure.rule_id not in self.HEADING_RULES:
+                continue
+            index = bisect.bisect_right(starts, failure.line_number) - 1
+            heading = headings[index]
+            if heading.reported:
+                offset = failure.line_number - starts[index]
+                failures.append(replace(
+                    failure, line_number=heading.line_number + offset,
+                    column_number=failure.column_number + (heading.indent if not offset else 0)
+                ))
+        return failures
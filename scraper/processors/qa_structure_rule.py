@@ -0,0 +1,95 @@
+"""
+pymarkdown rule used by QAChecker when checking a ledger section by section.
+
+Loaded with PyMarkdownApi.add_plugin_path() rather than imported. It never
+reports a real problem: its failures record every heading and the first
+style each style-consistency rule (MD004, MD035, MD046, MD048, MD049,
+MD050) sees in a section, so the sections can be checked against the
+rules' state in the whole document.
+"""
+from typing import cast
+from pymarkdown.plugin_manager.plugin_details import PluginDetailsV2
+from pymarkdown.plugin_manager.plugin_scan_context import PluginScanContext
+from pymarkdown.plugin_manager.rule_plugin import RulePlugin
+from pymarkdown.tokens.atx_heading_markdown_token import AtxHeadingMarkdownToken
+from pymarkdown.tokens.emphasis_markdown_token import EmphasisMarkdownToken
+from pymarkdown.tokens.fenced_code_block_markdown_token import FencedCodeBlockMarkdownToken
+from pymarkdown.tokens.markdown_token import MarkdownToken
+from pymarkdown.tokens.setext_heading_markdown_token import SetextHeadingMarkdownToken
+from pymarkdown.tokens.thematic_break_markdown_token import ThematicBreakMarkdownToken
+from pymarkdown.tokens.unordered_list_start_markdown_token import UnorderedListStartMarkdownToken
+
+
+# Styles as the rules' 'style' settings name them
+LIST_STYLES = {'-': 'dash', '*': 'asterisk', '+': 'plus'}
+FENCE_STYLES = {'`': 'backtick', '~': 'tilde'}
+EMPHASIS_STYLES = {'*': 'asterisk', '_': 'underscore'}
+
+
+# pymarkdown expects the class to be named after the file
+class QaStructureRule(RulePlugin):
+    """
+    Reports headings and first styles as failures.
+
+    A heading is reported at its first line as 'heading:STYLE:LEVEL:LAST',
+    where LAST is the line of a setext heading's underline; a first style
+    as 'RULE:STYLE'.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__seen = set()
+
+    def get_details(self) -> PluginDetailsV2:
+        """Get the details for the plugin."""
+        return PluginDetailsV2(
+            plugin_name="ledger-structure",
+            plugin_id="LDG001",
+            plugin_enabled_by_default=False,
+            plugin_description="Headings and first styles of a ledger section",
+            plugin_version="0.2.0",
+        )
+
+    def starting_new_file(self) -> None:
+        """Event that a new file to be scanned is starting."""
+        self.__seen = set()
+
+    def next_token(self, context: PluginScanContext, token: MarkdownToken) -> None:
+        """Event that a new token is being processed."""
+        if token.is_atx_heading:
+            heading = cast(AtxHeadingMarkdownToken, token)
+            style = 'atx_closed' if heading.remove_trailing_count else 'atx'
+            self.report_next_token_error(
+                context, token,
+                extra_error_information=f"heading:{style}:{heading.hash_count}:{token.line_number}"
+            )
+        elif token.is_setext_heading:
+            heading = cast(SetextHeadingMarkdownToken, token)
+            self.report_next_token_error(
+                context, token,
+                extra_error_information=f"heading:setext:{heading.hash_count}:{token.line_number}",
+                use_original_position=True
+            )
+        elif token.is_unordered_list_start:
+            self.__first(context, token, "MD004", LIST_STYLES[
+                cast(UnorderedListStartMarkdownToken, token).list_start_sequence])
+        elif token.is_thematic_break:
+            self.__first(context, token, "MD035",
+                         cast(ThematicBreakMarkdownToken, token).rest_of_line)
+        elif token.is_code_block:
+            if token.is_fenced_code_block:
+                self.__first(context, token, "MD046", "fenced")
+                self.__first(context, token, "MD048", FENCE_STYLES[
+                    cast(FencedCodeBlockMarkdownToken, token).fence_character])
+            else:
+                self.__first(context, token, "MD046", "indented")
+        elif token.is_inline_emphasis:
+            emphasis = cast(EmphasisMarkdownToken, token)
+            if emphasis.emphasis_character in "*_" and emphasis.emphasis_length in (1, 2):
+                self.__first(context, token, "MD049" if emphasis.emphasis_length == 1 else "MD050",
+                             EMPHASIS_STYLES[emphasis.emphasis_character])
+
+    def __first(self, context: PluginScanContext, token: MarkdownToken, rule_id: str, style: str):
+        if rule_id not in self.__seen:
+            self.__seen.add(rule_id)
+            self.report_next_token_error(context, token, extra_error_information=f"{rule_id}:{style}")
@@ -0,0 +1,262 @@
+"""
+Streaming TF-IDF over hashed features.
+
+TfidfVectorizer learns its vocabulary from every document at once, so the
+documents and all of their n-grams are in memory together. StreamingTfidf
+hashes n-grams into a fixed number of buckets instead and only keeps two
+counters per bucket, filled from documents read in batches. Its memory use
+depends on n_features, not on the number of documents, and more documents
+can be added at any time with partial_fit().
+
+Documents too large to hold as one string, such as the text of a spilled
+PDF, are passed as TextBlocks and analyzed block by block, by StreamingTfidf
+and by BlockTfidfVectorizer alike.
+"""
+import heapq
+from collections import Counter, deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.utils import murmurhash3_32
+
+
+class TextBlocks:
+    """
+    Document text read in blocks rather than held as one string.
+
+    The text is the blocks joined by separator. The separator holds no word
+    characters, so no word spans two blocks. Subclasses yield the blocks.
+    """
+
+    separator = '\n\n'
+
+    def __iter__(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def pieces(self) -> Iterator[str]:
+        """Yield the text in pieces: the blocks and the separators between them."""
+        for i, block in enumerate(self):
+            if i:
+                yield self.separator
+            yield block
+
+
+def _block_ngrams(blocks: TextBlocks, preprocess, tokenize, stop_words, min_n: int,
+                  max_n: int) -> Iterator[str]:
+    """Yield the word n-grams a vectorizer counts in a document, reading it block by block."""
+    window = deque(maxlen=max_n)
+    for block in blocks:
+        for token in tokenize(preprocess(block)):
+            if stop_words is not None and token in stop_words:
+                continue
+            window.append(token)
+            for n in range(min_n, min(max_n, len(window)) + 1):
+                yield token if n == 1 else ' '.join(islice(window, len(window) - n, None))
+
+
+class _BlockAnalyzerMixin:
+    """Word analyzer that also takes TextBlocks documents."""
+
+    def build_analyzer(self):
+        analyze = super().build_analyzer()
+        if self.analyzer != 'word':
+            return analyze
+        preprocess = self.build_preprocessor()
+        tokenize = self.build_tokenizer()
+        stop_words = self.get_stop_words()
+        min_n, max_n = self.ngram_range
+
+        def analyze_blocks(document: Union[str, TextBlocks]):
+            if isinstance(document, TextBlocks):
+                return _block_ngrams(document, preprocess, tokenize, stop_words, min_n, max_n)
+            return analyze(document)
+
+        return analyze_blocks
+
+
+class BlockTfidfVectorizer(_BlockAnalyzerMixin, TfidfVectorizer):
+    """TfidfVectorizer that also takes TextBlocks documents."""
+
+
+class BlockHashingVectorizer(_BlockAnalyzerMixin, HashingVectorizer):
+    """HashingVectorizer that also takes TextBlocks documents."""
+
+
+def _batches(documents: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    iterator = iter(documents)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class StreamingTfidf:
+    """TF-IDF weighting with document frequencies accumulated batch by batch."""
+
+    def __init__(self, n_features: int = 2 ** 20, max_features: Optional[int] = 500,
+                 min_df: float = 1, max_df: float = 0.8,
+                 ngram_range: Tuple[int, int] = (1, 2), stop_words: Optional[str] = 'english',
+                 batch_size: int = 1000):
+        """
+        Initialize the engine.
+
+        min_df, max_df and max_features select features the way TfidfVectorizer
+        does, applied to hash buckets instead of terms.
+
+        Args:
+            n_features: Number of hash buckets (16 bytes of counters each)
+            max_features: Keep only this many buckets with the highest corpus counts
+            min_df: Minimum document count (int) or fraction (float) of a bucket
+            max_df: Maximum document count (int) or fraction (float) of a bucket
+            ngram_range: Smallest and largest n-gram size
+            stop_words: Stop word list passed to the vectorizer
+            batch_size: Number of documents hashed at a time
+        """
+        self.n_features = n_features
+        self.max_features = max_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.batch_size = max(1, batch_size)
+        self._vectorizer = BlockHashingVectorizer(
+            n_features=n_features,
+            stop_words=stop_words,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm=None
+        )
+        self._analyzer = self._vectorizer.build_analyzer()
+        # Hashes the counted terms of a document, as the vectorizer would
+        # hash its terms, without a list of every term occurrence
+        self._hasher = FeatureHasher(n_features=n_features, input_type='pair',
+                                     alternate_sign=False)
+        self.n_documents = 0
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.term_frequency = np.zeros(n_features, dtype=np.int64)
+        self._idf: Optional[np.ndarray] = None
+
+    def partial_fit(self, documents: Iterable[Union[str, TextBlocks]]) -> 'StreamingTfidf':
+        """
+        Add documents to the document frequencies.
+
+        Args:
+            documents: Document texts, read batch_size at a time
+
+        Returns:
+            The engine itself
+        """
+        for batch in _batches(documents, self.batch_size):
+            counts = self._hasher.transform(
+                Counter(self._analyzer(document)).items() for document in batch
+            )
+            self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+            self.term_frequency += np.bincount(
+                counts.indices, weights=counts.data, minlength=self.n_features
+            ).astype(np.int64)
+            self.n_documents += len(batch)
+        self._idf = None
+        return self
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Get the accumulated counts, to be restored with load_state()."""
+        return {
+            'n_documents': np.array(self.n_documents),
+            'document_frequency': self.document_frequency,
+            'term_frequency': self.term_frequency,
+        }
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> 'StreamingTfidf':
+        """
+        Restore counts saved with state().
+
+        Args:
+            state: Arrays returned by state()
+
+        Returns:
+            The engine itself
+
+        Raises:
+            ValueError: If the counts were made with a different n_features
+        """
+        if len(state['document_frequency']) != self.n_features:
+            raise ValueError("Saved counts use a different number of features")
+        self.n_documents = int(state['n_documents'])
+        self.document_frequency = np.array(state['document_frequency'], dtype=np.int64)
+        self.term_frequency = np.array(state['term_frequency'], dtype=np.int64)
+        self._idf = None
+        return self
+
+    def idf(self) -> np.ndarray:
+        """
+        Get the smoothed IDF of every bucket, 0 for buckets that are not kept.
+
+        Returns:
+            Array of n_features weights
+
+        Raises:
+            ValueError: If min_df, max_df and max_features leave no bucket
+        """
+        if self._idf is None:
+            self._idf = self._compute_idf()
+        return self._idf
+
+    def _compute_idf(self) -> np.ndarray:
+        n = self.n_documents
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n
+        if max_doc_count < min_doc_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+
+        df = self.document_frequency
+        kept = (df > 0) & (df >= min_doc_count) & (df <= max_doc_count)
+        if self.max_features is not None and np.count_nonzero(kept) > self.max_features:
+            candidates = np.flatnonzero(kept)
+            order = np.argsort(-self.term_frequency[candidates], kind='stable')
+            kept = np.zeros_like(kept)
+            kept[candidates[order[:self.max_features]]] = True
+        if not kept.any():
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        idf = np.zeros(self.n_features)
+        idf[kept] = np.log((1 + n) / (1 + df[kept])) + 1
+        return idf
+
+    def bucket(self, term: str) -> int:
+        """Get the hash bucket of a term, the same one the vectorizer counts it in."""
+        return abs(murmurhash3_32(term, seed=0)) % self.n_features
+
+    def keywords(self, document: Union[str, TextBlocks], top_n: int = 15) -> List[str]:
+        """
+        Get the highest weighted terms of a document.
+
+        Args:
+            document: Document text
+            top_n: Number of keywords
+
+        Returns:
+            Terms by descending TF-IDF weight
+        """
+        idf = self.idf()
+        scored = []
+        for term, count in Counter(self._analyzer(document)).items():
+            weight = idf[self.bucket(term)]
+            if weight > 0:
+                scored.append((count * weight, term))
+        return [term for _, term in heapq.nsmallest(top_n, scored, key=lambda s: (-s[0], s[1]))]
+
+    def iter_keywords(self, documents: Iterable[Union[str, TextBlocks]],
+                      top_n: int = 15) -> Iterator[List[str]]:
+        """
+        Get the keywords of each document in turn.
+
+        Args:
+            documents: Document texts
+            top_n: Number of keywords per document
+
+        Yields:
+            Keyword list of each document
+        """
+        for document in documents:
+            yield self.keywords(document, top_n)
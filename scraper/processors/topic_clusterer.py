@@ -0,0 +1,114 @@
+"""
+Clustering of per-source keywords into multi-keyword topics.
+"""
+import warnings
+from typing import Dict, List
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from sklearn.decomposition import NMF
+from sklearn.exceptions import ConvergenceWarning
+from models import Topic
+
+
+class TopicClusterer:
+    """Groups keywords that occur in the same sources with NMF on their co-occurrence."""
+
+    def __init__(self, n_topics: int = 10, min_sources: int = 1, max_iter: int = 200,
+                 random_state: int = 0):
+        """
+        Initialize the clusterer.
+
+        Args:
+            n_topics: Number of keyword clusters
+            min_sources: Minimum number of sources a keyword must appear in
+            max_iter: Maximum number of NMF iterations
+            random_state: Seed of the NMF initialisation
+        """
+        self.n_topics = n_topics
+        self.min_sources = min_sources
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def cluster(self, keywords_by_source: List[List[str]], source_ids: List[str]) -> List[Topic]:
+        """
+        Cluster keywords into topics.
+
+        Args:
+            keywords_by_source: Keywords for each source
+            source_ids: Corresponding source IDs
+
+        Returns:
+            List of Topic objects, most relevant first
+        """
+        incidence, keywords, sources = self._incidence(keywords_by_source, source_ids)
+        if not keywords:
+            return []
+
+        doc_freq = np.asarray(incidence.sum(axis=0)).ravel()
+        weights = self._keyword_weights(incidence, doc_freq)
+        assignment = weights.argmax(axis=1)
+        strength = weights.max(axis=1)
+
+        topics = []
+        for component in range(weights.shape[1]):
+            members = np.flatnonzero((assignment == component) & (strength > 0))
+            if len(members) == 0:
+                continue
+            members = members[np.lexsort((members, -strength[members], -doc_freq[members]))]
+            member_sources = np.flatnonzero(incidence[:, members].getnnz(axis=1))
+            names = [keywords[i] for i in members]
+            topics.append(Topic(
+                name=names[0].title(),
+                description=f"Topic related to {', '.join(names[:3])}",
+                keywords=names,
+                source_ids=[sources[i] for i in member_sources],
+                relevance_score=len(member_sources) / len(sources)
+            ))
+
+        topics.sort(key=lambda t: t.relevance_score, reverse=True)
+        return topics
+
+    def _incidence(self, keywords_by_source: List[List[str]], source_ids: List[str]):
+        """Build the binary source x keyword matrix of keywords in min_sources sources."""
+        rows: Dict[str, int] = {}
+        columns: Dict[str, int] = {}
+        row_indices, column_indices = [], []
+        for source_id, keywords in zip(source_ids, keywords_by_source):
+            row = rows.setdefault(source_id, len(rows))
+            for keyword in keywords:
+                row_indices.append(row)
+                column_indices.append(columns.setdefault(keyword, len(columns)))
+
+        incidence = csr_matrix(
+            (np.ones(len(row_indices)), (row_indices, column_indices)),
+            shape=(len(rows), len(columns))
+        )
+        incidence.data[:] = 1  # duplicates were summed
+        names = list(columns)
+        keep = np.flatnonzero(np.asarray(incidence.sum(axis=0)).ravel() >= self.min_sources)
+        return incidence[:, keep].tocsr(), [names[i] for i in keep], list(rows)
+
+    def _keyword_weights(self, incidence: csr_matrix, doc_freq: np.ndarray) -> np.ndarray:
+        """Get the weight of every keyword in every cluster (keywords x clusters)."""
+        n_components = min(self.n_topics, incidence.shape[1])
+        if n_components <= 1:
+            return doc_freq.reshape(-1, 1).astype(float)
+
+        # Cosine-normalised co-occurrence, so frequent keywords do not pull in every cluster
+        scale = diags(1 / np.sqrt(doc_freq))
+        cooccurrence = (scale @ (incidence.T @ incidence) @ scale).tocsr()
+
+        # Keywords of a single source are most of the vocabulary but say little about
+        # which keywords belong together; they are placed after fitting the others
+        core = doc_freq >= 2
+        if np.count_nonzero(core) < n_components:
+            core[:] = True
+        model = NMF(n_components=n_components, init='nndsvd', max_iter=self.max_iter,
+                    random_state=self.random_state)
+        weights = np.zeros((len(doc_freq), n_components))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            weights[core] = model.fit_transform(cooccurrence[core][:, core])
+            if not core.all():
+                weights[~core] = model.transform(cooccurrence[~core][:, core])
+        return weights
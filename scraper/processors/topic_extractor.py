@@ -1,26 +1,121 @@
 """
 Topic extraction using TF-IDF and keyword analysis.
 """
-from typing import List, Dict
+from typing import List, Dict, Collection, Iterator, Optional, Tuple, Union
 from collections import Counter
 import re
+import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.feature_extraction.text import TfidfVectorizer
-from models import Topic, ProcessedContent
+from models import Topic, ProcessedContent, ContentChunk
+from .tfidf_engine import BlockTfidfVectorizer, StreamingTfidf, TextBlocks
+from .topic_clusterer import TopicClusterer
+from .topic_model_cache import TopicModelCache
+
+
+class _ChunkTexts(TextBlocks):
+    """Text of a streamed source: its chunk texts joined by blank lines, read chunk by chunk."""
+    
+    def __init__(self, chunks: List[ContentChunk]):
+        self._chunks = chunks
+    
+    def __iter__(self) -> Iterator[str]:
+        return (chunk.text for chunk in self._chunks)
+
+
+class _DocumentTexts:
+    """Document texts of processed contents, built one at a time as they are read."""
+    
+    def __init__(self, processed_contents: List[ProcessedContent]):
+        self._processed_contents = processed_contents
+    
+    def __len__(self) -> int:
+        return len(self._processed_contents)
+    
+    def __iter__(self) -> Iterator[Union[str, TextBlocks]]:
+        for pc in self._processed_contents:
+            # Streamed sources keep their cleaned text only in their chunks,
+            # which may be spans of a file, so they are never joined
+            yield pc.cleaned_text or _ChunkTexts(pc.chunks)
+
+
+def _top_k_per_row(matrix: csr_matrix, k: int, block_size: int = 1 << 22) -> List[np.ndarray]:
+    """
+    Get the columns of the k largest positive values in each row of a CSR matrix.
+    
+    Only the stored values are looked at. A block of rows is laid out as one
+    row per document, padded to the longest row, and np.partition finds the
+    k-th largest value of every row at once. The few values at or above it
+    are then sorted by descending value and ascending column.
+    
+    Args:
+        matrix: Sparse matrix
+        k: Number of columns per row
+        block_size: Maximum number of padded values laid out at a time
+        
+    Returns:
+        Column indices of each row, largest value first
+    """
+    matrix = csr_matrix(matrix)
+    if not matrix.has_sorted_indices:
+        matrix = matrix.sorted_indices()
+    n_rows = matrix.shape[0]
+    width = int(np.diff(matrix.indptr).max(initial=0))
+    if k <= 0 or width == 0:
+        return [np.empty(0, dtype=matrix.indices.dtype) for _ in range(n_rows)]
+    block_rows = max(1, block_size // width)
+    
+    top = []
+    for start in range(0, n_rows, block_rows):
+        block = matrix[start:start + block_rows]
+        lengths = np.diff(block.indptr)
+        rows = np.repeat(np.arange(block.shape[0]), lengths)
+        padded = np.full((block.shape[0], lengths.max(initial=1)), -np.inf)
+        padded[rows, np.arange(block.nnz) - block.indptr[rows]] = block.data
+        kth = min(k, padded.shape[1])
+        threshold = -np.partition(-padded, kth - 1, axis=1)[:, kth - 1]
+        
+        # Values tied with the k-th largest are all kept here and cut in column order
+        selected = (block.data >= threshold[rows]) & (block.data > 0)
+        rows, columns, values = rows[selected], block.indices[selected], block.data[selected]
+        order = np.lexsort((columns, -values, rows))
+        rows, columns = rows[order], columns[order]
+        ranks = np.arange(len(rows)) - np.searchsorted(rows, np.arange(block.shape[0]))[rows]
+        counts = np.minimum(np.bincount(rows, minlength=block.shape[0]), k)
+        top.extend(np.split(columns[ranks < k], np.cumsum(counts)[:-1]))
+    return top
 
 
 class TopicExtractor:
-    """Extracts core topics from content using TF-IDF."""
+    """Extracts core topics from content using TF-IDF and keyword clustering."""
     
-    def __init__(self, max_topics: int = 10, min_sources: int = 1):
+    ENGINES = ('tfidf', 'hashing')
+    
+    def __init__(self, max_topics: int = 10, min_sources: int = 1,
+                 engine: str = 'tfidf', batch_size: int = 1000,
+                 cache: Optional[TopicModelCache] = None, refit_threshold: float = 0.2):
         """
         Initialize topic extractor.
         
         Args:
             max_topics: Maximum number of topics to extract
             min_sources: Minimum number of sources a topic must appear in
+            engine: 'tfidf' fits a vocabulary over all documents at once,
+                'hashing' streams them through a StreamingTfidf in batches
+            batch_size: Number of documents hashed at a time by the hashing engine
+            cache: Cache keeping the fitted model and keywords between runs
+            refit_threshold: Fraction of documents added or removed since the
+                cached model was fitted above which it is fitted again
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown topic engine: {engine}")
         self.max_topics = max_topics
         self.min_sources = min_sources
+        self.engine = engine
+        self.batch_size = batch_size
+        self.cache = cache
+        self.refit_threshold = refit_threshold
+        self.clusterer = TopicClusterer(n_topics=max_topics, min_sources=min_sources)
     
     def extract_topics(self, processed_contents: List[ProcessedContent]) -> List[Topic]:
         """
@@ -36,76 +131,184 @@ class TopicExtractor:
             return []
         
         # Prepare documents for TF-IDF
-        documents = []
-        source_ids = []
-        
-        for pc in processed_contents:
-            documents.append(pc.cleaned_text)
-            source_ids.append(pc.source_id)
+        documents = _DocumentTexts(processed_contents)
+        source_ids = [pc.source_id for pc in processed_contents]
         
         # Extract keywords using TF-IDF
-        keywords_by_source = self._extract_keywords_tfidf(documents)
+        if self.cache:
+            keywords_by_source = self._extract_keywords_cached(processed_contents)
+        else:
+            _, keywords_by_source = self._extract_keywords(documents)
         
         # Cluster keywords into topics
         topics = self._cluster_keywords(keywords_by_source, source_ids)
         
         return topics[:self.max_topics]
     
-    def _extract_keywords_tfidf(self, documents: List[str], top_n: int = 15) -> List[List[str]]:
+    def _extract_keywords_cached(self, processed_contents: List[ProcessedContent],
+                                 top_n: int = 15) -> List[List[str]]:
+        """
+        Extract keywords, reusing the cached model and keywords when possible.
+        
+        Only documents whose text is not in the cache are transformed. The
+        model is fitted again when no model is cached, when the cached fit
+        failed or when the documents added or removed since it was fitted
+        exceed refit_threshold.
+        
+        Args:
+            processed_contents: List of processed content
+            top_n: Number of top keywords per document
+            
+        Returns:
+            List of keyword lists (one per document)
+        """
+        digests = [self.cache.digest(doc) for doc in _DocumentTexts(processed_contents)]
+        saved = self.cache.load()
+        if saved is not None:
+            fitted, cached_keywords, arrays = saved
+            drift = len(fitted.symmetric_difference(digests)) / max(len(fitted), 1)
+            model = self._restore_model(arrays) if drift <= self.refit_threshold else None
+            if model is not None:
+                new = [i for i, digest in enumerate(digests) if digest not in cached_keywords]
+                _, new_keywords = self._extract_keywords(
+                    _DocumentTexts([processed_contents[i] for i in new]), top_n, model
+                )
+                keywords = {digest: cached_keywords[digest]
+                            for digest in digests if digest in cached_keywords}
+                keywords.update(zip((digests[i] for i in new), new_keywords))
+                if keywords.keys() != cached_keywords.keys():
+                    self.cache.update_keywords(keywords)
+                return [keywords[digest] for digest in digests]
+        
+        model, keywords_by_doc = self._extract_keywords(_DocumentTexts(processed_contents), top_n)
+        self.cache.save(set(digests), dict(zip(digests, keywords_by_doc)), self._model_arrays(model))
+        return keywords_by_doc
+    
+    def _extract_keywords(self, documents: Collection[str], top_n: int = 15, model=None):
+        """
+        Extract keywords with the configured engine.
+        
+        Args:
+            documents: Document texts
+            top_n: Number of top keywords per document
+            model: Fitted model to transform the documents with; a new one
+                is fitted on them if not given
+            
+        Returns:
+            Tuple of the model (None if it could not be fitted) and the
+            keyword lists (one per document)
+        """
+        if self.engine == 'hashing':
+            return self._extract_keywords_hashing(documents, top_n, model)
+        return self._extract_keywords_tfidf(documents, top_n, model)
+    
+    def _extract_keywords_tfidf(self, documents: Collection[str], top_n: int = 15,
+                                vectorizer: Optional[TfidfVectorizer] = None
+                                ) -> Tuple[Optional[TfidfVectorizer], List[List[str]]]:
         """
         Extract top keywords from each document using TF-IDF.
         
         Args:
             documents: List of document texts
             top_n: Number of top keywords per document
+            vectorizer: Fitted vectorizer; a new one is fitted if not given
             
         Returns:
-            List of keyword lists (one per document)
+            Tuple of the vectorizer and the keyword lists (one per document)
         """
+        if not documents:
+            return vectorizer, []
         try:
-            # Use TF-IDF to extract important terms
-            vectorizer = TfidfVectorizer(
-                max_features=500,
-                stop_words='english',
-                ngram_range=(1, 2),  # Unigrams and bigrams
-                min_df=1,
-                max_df=0.8
-            )
-            
-            tfidf_matrix = vectorizer.fit_transform(documents)
+            if vectorizer is None:
+                # Use TF-IDF to extract important terms
+                vectorizer = self._tfidf_vectorizer()
+                tfidf_matrix = vectorizer.fit_transform(documents)
+            else:
+                tfidf_matrix = vectorizer.transform(documents)
             feature_names = vectorizer.get_feature_names_out()
             
             # Get top keywords for each document
-            keywords_by_doc = []
-            for doc_idx in range(len(documents)):
-                # Get TF-IDF scores for this document
-                doc_vector = tfidf_matrix[doc_idx].toarray().flatten()
-                
-                # Get indices of top scoring terms
-                top_indices = doc_vector.argsort()[-top_n:][::-1]
-                
-                # Get the actual keywords
-                keywords = [feature_names[i] for i in top_indices if doc_vector[i] > 0]
-                keywords_by_doc.append(keywords)
+            keywords_by_doc = [
+                [feature_names[i] for i in top_indices]
+                for top_indices in _top_k_per_row(tfidf_matrix, top_n)
+            ]
             
-            return keywords_by_doc
+            return vectorizer, keywords_by_doc
             
         except Exception as e:
             # Fallback to simple word frequency if TF-IDF fails
-            return [self._extract_keywords_fallback(doc, top_n) for doc in documents]
+            return None, [self._extract_keywords_fallback(doc, top_n) for doc in documents]
     
-    def _extract_keywords_fallback(self, text: str, top_n: int = 15) -> List[str]:
-        """Fallback keyword extraction using word frequency."""
-        # Simple word tokenization
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
+    def _extract_keywords_hashing(self, documents: Collection[str], top_n: int = 15,
+                                  engine: Optional[StreamingTfidf] = None
+                                  ) -> Tuple[Optional[StreamingTfidf], List[List[str]]]:
+        """
+        Extract top keywords from each document with a streaming TF-IDF.
+        
+        Documents are read twice, once to count document frequencies and once
+        to weight their terms, and only batch_size of them are held at a time.
         
+        Args:
+            documents: Document texts, iterable more than once
+            top_n: Number of top keywords per document
+            engine: Fitted engine; a new one is fitted if not given
+            
+        Returns:
+            Tuple of the engine and the keyword lists (one per document)
+        """
+        if not documents:
+            return engine, []
+        try:
+            if engine is None:
+                engine = StreamingTfidf(batch_size=self.batch_size)
+                engine.partial_fit(documents)
+            return engine, list(engine.iter_keywords(documents, top_n))
+        except Exception:
+            return None, [self._extract_keywords_fallback(doc, top_n) for doc in documents]
+    
+    @staticmethod
+    def _tfidf_vectorizer(vocabulary: Optional[List[str]] = None) -> TfidfVectorizer:
+        """Create the TF-IDF vectorizer, with a fixed vocabulary if one is given."""
+        return BlockTfidfVectorizer(
+            max_features=500,
+            stop_words='english',
+            ngram_range=(1, 2),  # Unigrams and bigrams
+            min_df=1,
+            max_df=0.8,
+            vocabulary=vocabulary
+        )
+    
+    @staticmethod
+    def _model_arrays(model) -> Dict[str, np.ndarray]:
+        """Get the arrays a fitted model is saved as."""
+        if isinstance(model, StreamingTfidf):
+            return model.state()
+        if isinstance(model, TfidfVectorizer):
+            return {'vocabulary': model.get_feature_names_out().astype(str), 'idf': model.idf_}
+        return {}
+    
+    def _restore_model(self, arrays: Dict[str, np.ndarray]):
+        """Rebuild a model from its saved arrays; None if the fit had failed."""
+        if 'vocabulary' in arrays:
+            vectorizer = self._tfidf_vectorizer(arrays['vocabulary'].tolist())
+            vectorizer.idf_ = arrays['idf']
+            return vectorizer
+        if 'document_frequency' in arrays:
+            return StreamingTfidf(batch_size=self.batch_size).load_state(arrays)
+        return None
+    
+    def _extract_keywords_fallback(self, text: Union[str, TextBlocks],
+                                   top_n: int = 15) -> List[str]:
+        """Fallback keyword extraction using word frequency."""
         # Common stop words
         stop_words = {'this', 'that', 'with', 'from', 'have', 'will', 'would', 
                       'could', 'should', 'about', 'their', 'there', 'these', 'those'}
         
-        # Filter and count
-        filtered = [w for w in words if w not in stop_words]
-        counter = Counter(filtered)
+        # Simple word tokenization, then filter and count
+        counter = Counter()
+        for block in ((text,) if isinstance(text, str) else text):
+            words = re.findall(r'\b[a-z]{4,}\b', block.lower())
+            counter.update(w for w in words if w not in stop_words)
         
         return [word for word, _ in counter.most_common(top_n)]
     
@@ -121,31 +324,4 @@ class TopicExtractor:
         Returns:
             List of Topic objects
         """
-        # Count how many sources each keyword appears in
-        keyword_sources = {}
-        for source_id, keywords in zip(source_ids, keywords_by_source):
-            for keyword in keywords:
-                if keyword not in keyword_sources:
-                    keyword_sources[keyword] = []
-                if source_id not in keyword_sources[keyword]:
-                    keyword_sources[keyword].append(source_id)
-        
-        # Create topics from keywords that appear in multiple sources or are highly relevant
-        topics = []
-        for keyword, sources in keyword_sources.items():
-            if len(sources) >= self.min_sources:
-                # Calculate relevance score based on number of sources
-                relevance = len(sources) / len(source_ids)
-                
-                topics.append(Topic(
-                    name=keyword.title(),
-                    description=f"Topic related to {keyword}",
-                    keywords=[keyword],
-                    source_ids=sources,
-                    relevance_score=relevance
-                ))
-        
-        # Sort by relevance
-        topics.sort(key=lambda t: t.relevance_score, reverse=True)
-        
-        return topics
+        return self.clusterer.cluster(keywords_by_source, source_ids)
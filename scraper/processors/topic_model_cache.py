@@ -0,0 +1,113 @@
+"""
+On-disk cache of the fitted topic model and per-document keywords.
+
+TopicExtractor keeps its TF-IDF model between runs so topics stay stable
+and only new documents need to be transformed. The model's arrays are
+stored in an .npz file; the documents it was fitted on and the keywords of
+every document are stored in a JSON file, keyed by the hash of the text.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+import numpy as np
+from .tfidf_engine import TextBlocks
+
+
+# Bump when keyword extraction changes so saved models are refitted
+TOPIC_MODEL_VERSION = 1
+
+
+class TopicModelCache:
+    """Persists a fitted keyword model with the keywords it produced."""
+
+    STATE_FILE = 'state.json'
+    MODEL_FILE = 'model.npz'
+
+    def __init__(self, cache_dir: str, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the topic model cache.
+
+        Args:
+            cache_dir: Directory holding the cache
+            settings: Extraction settings; a model saved with different
+                settings is ignored
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.settings = {'version': TOPIC_MODEL_VERSION, **(settings or {})}
+        self._state: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def digest(text: Union[str, TextBlocks]) -> str:
+        """Hash a document's text, reading TextBlocks block by block."""
+        digest = hashlib.sha256()
+        for piece in ((text,) if isinstance(text, str) else text.pieces()):
+            digest.update(piece.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def load(self) -> Optional[Tuple[Set[str], Dict[str, List[str]], Dict[str, np.ndarray]]]:
+        """
+        Load the saved model.
+
+        Returns:
+            Tuple of the digests the model was fitted on, the keywords by
+            digest and the model arrays (empty if the fit failed), or None
+            if there is no usable model
+        """
+        try:
+            with open(self.cache_dir / self.STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('settings') != self.settings:
+                return None
+            arrays = {}
+            if state.get('model'):
+                with np.load(self.cache_dir / self.MODEL_FILE, allow_pickle=False) as model:
+                    arrays = {name: model[name] for name in model.files}
+        except (OSError, ValueError, KeyError):
+            return None
+        self._state = state
+        return set(state['fitted']), state['keywords'], arrays
+
+    def save(self, fitted: Set[str], keywords: Dict[str, List[str]],
+             arrays: Dict[str, np.ndarray]):
+        """
+        Save a model.
+
+        Args:
+            fitted: Digests of the documents the model was fitted on
+            keywords: Keywords by document digest
+            arrays: Model arrays; empty if the model could not be fitted
+        """
+        if arrays:
+            tmp_path = self.cache_dir / (self.MODEL_FILE + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.cache_dir / self.MODEL_FILE)
+
+        self._write_state({
+            'settings': self.settings,
+            'model': bool(arrays),
+            'fitted': sorted(fitted),
+            'keywords': keywords,
+        })
+
+    def update_keywords(self, keywords: Dict[str, List[str]]):
+        """
+        Replace the keywords saved with the loaded model, keeping the model.
+
+        Args:
+            keywords: Keywords by document digest
+        """
+        if self._state is None:
+            raise RuntimeError("No model has been loaded")
+        self._write_state({**self._state, 'keywords': keywords})
+
+    def _write_state(self, state: Dict[str, Any]):
+        """Atomically write the state file."""
+        tmp_path = self.cache_dir / (self.STATE_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.cache_dir / self.STATE_FILE)
+        self._state = state
@@ -0,0 +1,61 @@
+"""
+Frozen copy of ContentCleaner.clean as it was before it became a single
+pass over lines. The equivalence test and scripts/bench_cleaner.py compare
+the current implementation against it; do not change it.
+"""
+import re
+
+
+def baseline_clean(text: str) -> str:
+    """Clean and normalize text, exactly as the original implementation did."""
+    if not text:
+        return ""
+    
+    text = _fix_encoding(text)
+    text = _normalize_whitespace(text)
+    text = _fix_markdown(text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    
+    return text.strip()
+
+
+def _fix_encoding(text: str) -> str:
+    replacements = {
+        '\u2019': "'",
+        '\u2018': "'",
+        '\u201c': '"',
+        '\u201d': '"',
+        '\u2013': '-',
+        '\u2014': '--',
+        '\u2026': '...',
+        '\xa0': ' ',
+    }
+    
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    
+    return text
+
+
+def _normalize_whitespace(text: str) -> str:
+    text = text.replace('\t', '    ')
+    
+    lines = [line.rstrip() for line in text.split('\n')]
+    text = '\n'.join(lines)
+    
+    lines = []
+    for line in text.split('\n'):
+        leading_space = len(line) - len(line.lstrip())
+        rest = re.sub(r' {2,}', ' ', line.lstrip())
+        lines.append(' ' * leading_space + rest)
+    
+    return '\n'.join(lines)
+
+
+def _fix_markdown(text: str) -> str:
+    text = re.sub(r'^(#{1,6})([^ #])', r'\1 \2', text, flags=re.MULTILINE)
+    
+    text = re.sub(r'\n([#]{1,6} )', r'\n\n\1', text)
+    text = re.sub(r'^\n+', '', text)
+    
+    return text
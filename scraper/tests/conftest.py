@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: the scraper's modules import each other from the
+scraper directory, as they do when the agent is run from there.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,48 @@
+"""
+AuthorityScorer.evaluate() must stay fast on adversarial content.
+
+A backtracking search of PDFs for the abstract, introduction and
+methodology sections used to take quadratic time on content repeating
+one of them: 0.36s for "abstract " x 2,000 but 36s for x 20,000.
+The scan is linear now and long content is only scanned in windows.
+
+The tests compare timings with each other rather than with fixed limits
+so they hold on slow or loaded machines.
+"""
+import time
+
+import pytest
+
+from processors import AuthorityScorer
+
+
+ADVERSARIAL = ['abstract ', 'introduction ', 'abstract introduction ', '1.1 ',
+               'references\n']
+PDF = {'type': 'pdf'}
+
+
+def evaluate_time(scorer, word, size):
+    """Fastest of three evaluations of word repeated to about size characters."""
+    content = word * (size // len(word))
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        scorer.evaluate(content, PDF)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@pytest.mark.parametrize('word', ADVERSARIAL)
+def test_scan_time_scales_linearly_and_windows_cut_it(word):
+    whole_scorer = AuthorityScorer(head_chars=None)
+    small = evaluate_time(whole_scorer, word, 200_000)
+    whole = evaluate_time(whole_scorer, word, 2_000_000)
+    windowed = evaluate_time(AuthorityScorer(), word, 2_000_000)
+
+    # Ten times the content takes about ten times as long; a quadratic
+    # scan would take a hundred times as long
+    assert whole < 30 * small
+    # The default windows hold 6% of the content; scans measured 8-14
+    # times faster
+    assert windowed < whole / 3
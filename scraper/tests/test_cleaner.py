@@ -0,0 +1,34 @@
+"""
+ContentCleaner must clean text exactly like the original implementation.
+"""
+from hypothesis import given, settings, strategies as st
+
+from baseline_cleaner import baseline_clean
+from processors import ContentCleaner
+
+
+# Fragments that exercise headings, indentation, blank-line runs, the
+# translated characters and other whitespace
+FRAGMENTS = ['#', '##', '###', '#######', '# ', '#a', ' ', '  ', '   ', '\t', '\n', '\n\n',
+             '\n\n\n', 'a', 'word', 'two words', '\u2018', '\u2019', '\u201c', '\u201d',
+             '\u2013', '\u2014', '\u2026', '\xa0', '\r', '\x0b', '\x0c', '\x1c', '\x85',
+             '\u2009', '\u3000', '-', '*', '1.', '`', '>']
+
+texts = st.one_of(
+    st.lists(st.sampled_from(FRAGMENTS), max_size=60).map(''.join),
+    st.text(max_size=200),
+    st.lists(st.one_of(st.sampled_from(FRAGMENTS), st.text(max_size=5)), max_size=40).map(''.join),
+)
+
+
+@settings(max_examples=2000, deadline=None)
+@given(texts)
+def test_clean_matches_baseline(text):
+    assert ContentCleaner().clean(text) == baseline_clean(text)
+
+
+@settings(max_examples=500, deadline=None)
+@given(texts)
+def test_clean_lines_matches_clean(text):
+    cleaner = ContentCleaner()
+    assert '\n'.join(cleaner.clean_lines(text.split('\n'))) == cleaner.clean(text)
@@ -0,0 +1,44 @@
+"""
+A binary ledger file must load back the ledger it was written from.
+"""
+from ledger_file import LedgerFile, write_ledger_file
+from models import ContentChunk, KnowledgeLedger, ProcessedContent, Source, SourceType, Topic
+
+
+def make_source(source_id, content, content_path=None):
+    return Source(id=source_id, name=source_id, source_type=SourceType.ACADEMIC,
+                  authority_score=80, location=f'/docs/{source_id}.pdf', content=content,
+                  title='Title', metadata={'pages': 3}, references=['ref'],
+                  content_path=content_path)
+
+
+def test_spilled_source_loads_with_full_content(tmp_path):
+    full_text = 'first page\n\nsecond page\nmore text\n'
+    spill_path = tmp_path / 'doc.txt'
+    spill_path.write_text(full_text, encoding='utf-8')
+    spilled = make_source('SOURCE-002', full_text[:10], str(spill_path))
+    inline = make_source('SOURCE-001', 'short\ncontent\n')
+    cleaned_text = 'first page\n\nsecond page'
+    ledger = KnowledgeLedger(
+        sources=[spilled, inline],
+        processed_contents=[ProcessedContent(
+            source_id='SOURCE-002',
+            chunks=[ContentChunk(buffer=cleaned_text, start=12, end=23, heading='Second')],
+            cleaned_text=cleaned_text)],
+        topics=[Topic(name='pages', description='', keywords=['page'],
+                      source_ids=['SOURCE-002'], relevance_score=0.5)])
+
+    path = tmp_path / 'ledger.bin'
+    write_ledger_file(ledger, str(path))
+    spill_path.unlink()
+
+    with LedgerFile(str(path)) as ledger_file:
+        loaded = ledger_file.load()
+        assert ledger_file.source_by_id('SOURCE-002').content == full_text
+
+    assert [source.id for source in loaded.sources] == ['SOURCE-002', 'SOURCE-001']
+    assert loaded.sources[0].content == full_text
+    assert loaded.sources[0].content_path is None
+    assert loaded.sources[1].content == 'short\ncontent\n'
+    assert loaded.processed_contents[0].chunks[0].text == 'second page'
+    assert loaded.topics[0].source_ids == ['SOURCE-002']
@@ -0,0 +1,55 @@
+"""
+The source manifest must not keep entry files its index no longer lists.
+"""
+from manifest import SourceManifest
+from models import ContentChunk, ProcessedContent, Source, SourceType
+
+
+def record(manifest, location, text):
+    source = Source(id='SOURCE-001', name=location, source_type=SourceType.BLOG,
+                    authority_score=50, location=location, content=text)
+    manifest.record(source, ProcessedContent(
+        source_id=source.id, chunks=[ContentChunk(buffer=text, start=0, end=len(text))],
+        cleaned_text=text))
+
+
+def entry_files(manifest_dir):
+    return sorted(path.name for path in (manifest_dir / 'entries').iterdir())
+
+
+def test_round_trip(tmp_path):
+    manifest = SourceManifest(str(tmp_path), settings={'a': 1})
+    record(manifest, 'https://example.com/a', 'text of a')
+    manifest.save()
+
+    reloaded = SourceManifest(str(tmp_path), settings={'a': 1})
+    entry = reloaded.lookup('https://example.com/a', 'text of a')
+    processed = reloaded.restore_processed('https://example.com/a', entry, 'SOURCE-009')
+    assert processed.cleaned_text == 'text of a'
+    assert [chunk.text for chunk in processed.chunks] == ['text of a']
+
+
+def test_discarded_index_removes_entries(tmp_path):
+    manifest = SourceManifest(str(tmp_path), settings={'a': 1})
+    record(manifest, 'https://example.com/a', 'text of a')
+    manifest.save()
+    assert len(entry_files(tmp_path)) == 2
+
+    SourceManifest(str(tmp_path), settings={'a': 2})
+    assert entry_files(tmp_path) == []
+
+
+def test_save_removes_pruned_and_orphaned_entries(tmp_path):
+    manifest = SourceManifest(str(tmp_path))
+    record(manifest, 'https://example.com/a', 'text of a')
+    record(manifest, 'https://example.com/b', 'text of b')
+    manifest.save()
+    (tmp_path / 'entries' / 'orphan.txt').write_text('left by a crashed run')
+
+    manifest = SourceManifest(str(tmp_path))
+    manifest.prune(['https://example.com/b'])
+    manifest.save()
+    assert entry_files(tmp_path) == [
+        path.name for path in sorted((manifest._entry_file('https://example.com/b'),
+                                      manifest._text_file('https://example.com/b')))
+    ]
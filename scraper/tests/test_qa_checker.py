@@ -0,0 +1,102 @@
+"""
+Checking a ledger section by section must match checking it whole.
+
+check_sections() formats and lints sections one at a time, in a process
+pool with several workers, but headings, heading levels and the first
+list, rule, code and emphasis styles carry through the whole document.
+The written ledger must be the one fix_linting() makes of the whole
+document and the lint errors the ones lint_markdown() reports for it.
+
+The QA mode applies to formatting as well as linting: sections left out
+of the sample are written as they are, and unchanged sections are
+written as cached.
+"""
+import io
+
+import mdformat
+import pytest
+
+from generators import LedgerBuilder
+from models import KnowledgeLedger, Source, SourceType, Topic
+from processors import QAChecker, QACache
+
+
+CONTENTS = [
+    # A top-level heading that the next source heading skips levels after
+    'Intro text with _emphasis_ and __strong__ words.\n\n# Background\n\n* one\n* two',
+    # Styles differing from the ones the document settled on
+    '- a\n- b\n\n***\n\n```\ncode\n```\n\nMore *text*.',
+    '##### Deep heading\n\n+ plus item\n\n~~~\ntilde\n~~~\n\n    indented code',
+    'Setext heading\n==============\n\nA paragraph.\n\n#### Original Content',
+    '',
+]
+
+
+def make_ledger():
+    sources = [Source(id=f'SOURCE-{i:03d}', name=f'source {i}', source_type=SourceType.ACADEMIC,
+                      authority_score=80, location=f'/docs/{i}.pdf', content=content,
+                      title='Title', metadata={'pages': i}, references=[] if i % 2 else ['ref'])
+               for i, content in enumerate(CONTENTS, 1)]
+    topics = [Topic(name='topic', description='', keywords=['text'],
+                    source_ids=['SOURCE-001'], relevance_score=0.5)]
+    return KnowledgeLedger(sources=sources, processed_contents=[], topics=topics)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sections_are_fixed_and_linted_like_the_whole_document(workers):
+    builder = LedgerBuilder()
+    sections = list(builder.iter_sections(make_ledger()))
+    checker = QAChecker(workers=workers)
+    whole = '\n'.join(mdformat.text(section) for section in sections)
+
+    out = io.StringIO()
+    results = checker.check_sections(iter(sections), write=builder.section_writer(out))
+
+    assert out.getvalue() == checker.fix_linting(whole)
+    assert results['lint_errors'] == checker.lint_markdown(out.getvalue())
+    assert results['sections'] == results['sections_linted'] == len(sections)
+
+
+def test_duplicate_headings_are_reported_across_sections():
+    sections = list(LedgerBuilder().tier2_builder.iter_sections(make_ledger().sources[:2]))
+    checker = QAChecker(workers=2)
+
+    results = checker.check_sections(sections)
+
+    expected = checker.lint_markdown('\n'.join(sections))
+    assert any('MD024' in error for error in expected)
+    assert results['lint_errors'] == expected
+
+
+def unformatted_sections(count):
+    """Sections that formatting always changes."""
+    return [f'## Section {i}\n\n*  item {i}\n' for i in range(count)]
+
+
+def test_sample_mode_only_formats_the_sections_it_lints():
+    sections = unformatted_sections(40)
+    checker = QAChecker(mode='sample', sample_rate=0.5, workers=2)
+    written = []
+
+    results = checker.check_sections(iter(sections), write=written.append)
+
+    formatted = [output != section for output, section in zip(written, sections)]
+    assert 0 < sum(formatted) == results['sections_linted'] < len(sections)
+    for output, section, was_formatted in zip(written, sections, formatted):
+        assert output == (checker.format_markdown(section) if was_formatted else section)
+        assert checker.format_section(section) == output
+
+
+def test_changed_mode_writes_unchanged_sections_from_the_cache(tmp_path):
+    sections = unformatted_sections(6)
+    first = []
+    QAChecker(cache=QACache(str(tmp_path))).check_sections(iter(sections), write=first.append)
+
+    sections[2] = sections[2].replace('item', 'changed item')
+    written = []
+    results = QAChecker(mode='changed', cache=QACache(str(tmp_path))).check_sections(
+        iter(sections), write=written.append)
+
+    assert results['sections_linted'] == 1
+    assert written[2] == QAChecker().format_markdown(sections[2])
+    assert written[:2] + written[3:] == first[:2] + first[3:]
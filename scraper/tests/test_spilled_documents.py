@@ -0,0 +1,127 @@
+"""
+Processing a spilled PDF must not hold its text in memory.
+
+A PDF whose text outgrows the memory budget is spilled to disk and its
+cleaned text is written to a file next to it. The chunks are spans of that
+file, and boilerplate removal and topic extraction read them chunk by
+chunk, so the memory processing takes does not grow with the document.
+
+Scoring, reference extraction and near-duplicate detection read the whole
+spill file, not the preview kept in memory, so a spilled source is scored
+as if it had been held in memory whatever the budget.
+
+Near-duplicate detection and TF-IDF keep working sets of a fixed size, so
+the test compares a document with one five times longer instead of
+comparing either with the budget alone.
+"""
+import random
+import tracemalloc
+from pathlib import Path
+
+from knowledge_ledger_agent import KnowledgeLedgerAgent
+from models import SpilledText
+
+
+BUDGET = 50_000  # Characters; smaller than the 1 MB the command line allows
+WORDS = ('model data learning network training results method analysis system value '
+         'error sample feature layer input output signal memory budget page').split()
+
+
+REFERENCES = ('References\n'
+              '[1] A. Author. Training with little memory. https://doi.org/10.1000/memory')
+
+
+def pages(count, seed=0):
+    """Page texts of a long PDF, with a chapter heading every ten pages and references last."""
+    rng = random.Random(seed)
+    for page in range(count - 1):
+        lines = [f'# Chapter {page}'] if page % 10 == 0 else []
+        for _ in range(4):
+            lines.extend(' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(16))
+            lines.append('')
+        yield '\n'.join(lines)
+    yield REFERENCES
+
+
+PAGE_SIZE = len(next(pages(2)))
+
+
+def make_agent(cache_dir: Path, memory_budget=BUDGET, **options) -> KnowledgeLedgerAgent:
+    agent = KnowledgeLedgerAgent(cache_dir=str(cache_dir), memory_budget_mb=1 if memory_budget else None,
+                                 http_cache=False, qa_cache=False, **options)
+    agent.doc_collector.memory_budget = memory_budget
+    return agent
+
+
+def process(cache_dir: Path, size: int, memory_budget=BUDGET, **options):
+    """Process a PDF of about size characters and a short note."""
+    agent = make_agent(cache_dir, memory_budget, **options)
+    pdf = str(cache_dir / 'long.pdf')
+    count = size // PAGE_SIZE
+    metadata = {'path': pdf, 'type': 'pdf', 'pages': count}
+    note = {'content': 'Notes on training a model with little memory.', 'title': 'Notes',
+            'metadata': {'type': 'text'}}
+    agent._collect_all = lambda locations, progress, task: [
+        (pdf, agent.doc_collector._pdf_result(Path(pdf), metadata, pages(count))),
+        (str(cache_dir / 'notes.txt'), note),
+    ]
+    return agent.process(urls=[pdf])
+
+
+def peak_memory(cache_dir: Path, size: int) -> int:
+    tracemalloc.start()
+    try:
+        ledger = process(cache_dir, size)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert isinstance(ledger.processed_contents[0].chunks[0].buffer, SpilledText)
+    return peak
+
+
+def test_memory_does_not_grow_with_a_spilled_document(tmp_path):
+    process(tmp_path / 'warm-up', 2 * BUDGET)
+    small = peak_memory(tmp_path / 'small', 5 * BUDGET)
+    large = peak_memory(tmp_path / 'large', 25 * BUDGET)
+
+    # Twenty budgets more text take less than one budget more memory; with
+    # the text in memory they took about four hundred
+    assert large < small + BUDGET
+
+
+def test_spilled_document_is_chunked_like_one_in_memory(tmp_path):
+    in_memory = process(tmp_path / 'in-memory', 5 * BUDGET, memory_budget=None)
+    spilled = process(tmp_path / 'spilled', 5 * BUDGET, incremental=True)
+    restored = process(tmp_path / 'spilled', 5 * BUDGET, incremental=True)
+
+    assert not in_memory.sources[0].content_path
+    assert spilled.sources[0].content_path
+    for ledger in (spilled, restored):
+        source, expected = ledger.sources[0], in_memory.sources[0]
+        assert (source.source_type, source.authority_score, source.references) == \
+            (expected.source_type, expected.authority_score, expected.references)
+        assert 'https://doi.org/10.1000/memory' in source.references
+        chunks = ledger.processed_contents[0].chunks
+        assert all(isinstance(chunk.buffer, SpilledText) for chunk in chunks)
+        assert chunks == in_memory.processed_contents[0].chunks
+        assert [topic.keywords for topic in ledger.topics] == \
+            [topic.keywords for topic in in_memory.topics]
+
+
+def test_duplicates_are_found_on_the_whole_spilled_text(tmp_path):
+    agent = make_agent(tmp_path)
+    count = 10 * BUDGET // PAGE_SIZE
+    texts = {
+        'copy.pdf': list(pages(count)),
+        'same.pdf': list(pages(count)),
+        # The same preview, but different text after it
+        'other.pdf': list(pages(count))[:count // 2] + list(pages(count, seed=1))[count // 2:],
+    }
+    scored = []
+    for name, page_texts in texts.items():
+        path = tmp_path / name
+        data = agent.doc_collector._pdf_result(path, {'path': str(path), 'type': 'pdf'}, page_texts)
+        scored.append((str(path), data, None, None, 50, []))
+    assert scored[0][1]['content'] == scored[2][1]['content']
+
+    assert agent._find_duplicates(scored) == {0: [1]}
@@ -2,8 +2,9 @@
 Utility functions for the Knowledge Ledger Agent.
 """
 import re
-from typing import List
+from typing import Iterator, List, Optional, Tuple, Union
 from pathlib import Path
+from models import SpilledText
 
 
 def generate_source_id(index: int) -> str:
@@ -44,39 +45,177 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
-def extract_references(text: str) -> List[str]:
-    """Extract references/citations from text."""
-    references = []
+_URL = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+# The lookbehind checks that 10 starts a word, like \b10 would
+_DOI = re.compile(r'10(?<!\w10)\.\d{4,9}/[-._;()/:\w]+')
+_REFERENCES_HEADING = re.compile(r'(?i:references|bibliography|citations)[:\n]+')
+_DOI_URL = re.compile(r'https?://(?:dx\.)?doi\.org/(10\..+)', re.IGNORECASE)
+
+# Every reference token, found in one pass. The leading lookahead lists the
+# first character of every token so other positions are skipped quickly.
+_REFERENCE_TOKEN = re.compile(
+    r'(?=[\[h1RrBbCc])(?:(?P<citation>\[\d+\])|(?P<bracket>\[)'
+    r'|(?P<url>' + _URL.pattern + r')|(?P<doi>' + _DOI.pattern + r')'
+    r'|(?P<heading>' + _REFERENCES_HEADING.pattern + r'))'
+)
+
+
+def extract_references(text: Union[str, SpilledText]) -> List[str]:
+    """
+    Extract references/citations from text.
+    
+    Numbered citations ([1] up to the next [2]), the lines of the first
+    references section, URLs and DOIs are found in a single scan of the
+    text that reads every character a bounded number of times. References
+    are deduplicated on a normalized key, so the same URL or DOI written
+    differently is only listed once.
+    
+    A SpilledText is scanned block by block, so references anywhere in a
+    spilled document are found without reading it into memory.
+    
+    Args:
+        text: Source content
+        
+    Returns:
+        Numbered citations, section lines, URLs and DOIs, in that order
+    """
+    numbered = []
+    section_lines = None
+    urls = []
+    dois = []
+    citation_start = None  # Start of the numbered citation being read
+    
+    def read_section(heading_end: int) -> List[str]:
+        # Up to the first blank line
+        section_end = text.find('\n\n', heading_end)
+        return text[heading_end:section_end if section_end >= 0 else len(text)].split('\n')
     
-    # Look for common reference patterns
-    # Pattern 1: [1], [2], etc.
-    numbered_refs = re.findall(r'\[\d+\][^\[]*?(?=\[\d+\]|$)', text)
-    references.extend(numbered_refs)
+    def heading_within(block: str, offset: int, start: int, end: int) -> Optional[List[str]]:
+        # A heading inside a URL or DOI, which may be followed by a newline
+        heading = _REFERENCES_HEADING.search(block, start, end + 1)
+        if heading is None:
+            return None
+        return read_section(offset + _REFERENCES_HEADING.match(block, heading.start()).end())
     
-    # Pattern 2: References section
-    ref_section = re.search(r'(?:References|Bibliography|Citations)[:\n]+(.*?)(?:\n\n|$)', 
-                            text, re.IGNORECASE | re.DOTALL)
-    if ref_section:
-        # Split by newlines to get individual references
-        refs = [ref.strip() for ref in ref_section.group(1).split('\n') if ref.strip()]
-        references.extend(refs)
+    # Tokens never cross blocks; offsets into a block are made absolute for
+    # the citations and sections that may
+    for offset, block in _reference_blocks(text):
+        position = 0
+        while True:
+            token = _REFERENCE_TOKEN.search(block, position)
+            if token is None:
+                break
+            kind = token.lastgroup
+            start, end = token.span()
+            position = end
+            
+            if kind == 'citation' or kind == 'bracket':
+                # A numbered citation runs up to the next one; any other
+                # bracket in between voids it
+                if citation_start is not None and kind == 'citation':
+                    numbered.append(text[citation_start:offset + start])
+                citation_start = offset + start if kind == 'citation' else None
+            elif kind == 'heading':
+                if section_lines is None:
+                    section_lines = read_section(offset + end)
+            elif kind == 'url':
+                urls.append(block[start:end])
+                if section_lines is None:
+                    section_lines = heading_within(block, offset, start, end)
+            else:
+                dois.append('https://doi.org/' + _trim_reference(block[start:end]))
+                if section_lines is None:
+                    section_lines = heading_within(block, offset, start, end)
+                # DOI characters include those of a URL, which may go on past the DOI
+                url = _URL.search(block, start, end)
+                if url is not None:
+                    url = _URL.match(block, url.start())
+                    urls.append(url.group())
+                    if section_lines is None:
+                        section_lines = heading_within(block, offset, url.start(), url.end())
+                    position = url.end()
     
-    # Pattern 3: URLs as references
-    urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text)
-    references.extend(urls)
+    if citation_start is not None:
+        numbered.append(text[citation_start:])
     
     # Remove duplicates while preserving order
     seen = set()
     unique_refs = []
-    for ref in references:
+    for ref in numbered + (section_lines or []) + urls + dois:
         ref_clean = ref.strip()
-        if ref_clean and ref_clean not in seen:
-            seen.add(ref_clean)
+        if not ref_clean:
+            continue
+        key = _reference_key(ref_clean)
+        if key not in seen:
+            seen.add(key)
             unique_refs.append(ref_clean)
     
     return unique_refs
 
 
+def _reference_blocks(text: Union[str, SpilledText],
+                      block_size: int = 1024 * 1024) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into blocks that no reference token crosses.
+    
+    A block ends after whitespace and before a character other than a
+    colon or newline: URLs, DOIs and citations hold no whitespace, and a
+    references heading only runs on through colons and newlines.
+    
+    Yields:
+        (offset, block) tuples
+    """
+    if isinstance(text, str):
+        yield 0, text
+        return
+    
+    length = len(text)
+    offset = 0
+    carry = ''
+    for position in range(0, length, block_size):
+        piece = carry + text[position:position + block_size]
+        if position + block_size >= length:
+            yield offset, piece
+            return
+        # The carried text was already found to have nowhere to cut
+        lowest = max(1, len(carry))
+        cut = len(piece) - 1
+        while cut >= lowest and not (piece[cut - 1].isspace() and piece[cut] not in ':\n'):
+            cut -= 1
+        if cut >= lowest:
+            yield offset, piece[:cut]
+            offset += cut
+            piece = piece[cut:]
+        carry = piece
+
+
+def _trim_reference(ref: str) -> str:
+    """Remove sentence punctuation and an unbalanced closing parenthesis from the end of a URL or DOI."""
+    ref = ref.rstrip('.,;:')
+    while ref.endswith(')') and ref.count('(') < ref.count(')'):
+        ref = ref[:-1].rstrip('.,;:')
+    return ref
+
+
+def _reference_key(ref: str) -> str:
+    """Get the key two references are duplicates on."""
+    doi = _DOI_URL.match(ref)
+    if doi:
+        # DOIs are case-insensitive
+        return 'doi:' + _trim_reference(doi.group(1)).lower()
+    
+    if ref.startswith(('http://', 'https://')):
+        # Same page over http or https, with or without www. or a trailing slash
+        address = _trim_reference(ref).split('://', 1)[1]
+        split = min((i for i in (address.find(c) for c in '/?#') if i >= 0), default=len(address))
+        host = address[:split].lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        return 'url:' + host + address[split:].rstrip('/')
+    
+    return ' '.join(ref.split()).casefold()
+
+
 def format_markdown_table(headers: List[str], rows: List[List[str]]) -> str:
     """Format a markdown table."""
     lines = []
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark ContentCleaner.clean against the original implementation.
+
+Cleans the given text files, or a generated markdown-like document, with
+both the current cleaner and the frozen original (scraper/tests/
+baseline_cleaner.py), checks that the outputs are identical and reports
+throughput in MB/s.
+
+Usage: python3 scripts/bench_cleaner.py [--size-mb N] [--repeat N] [FILE ...]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).resolve().parent.parent / 'scraper'
+sys.path.insert(0, str(SCRAPER_DIR))
+sys.path.insert(0, str(SCRAPER_DIR / 'tests'))
+
+from baseline_cleaner import baseline_clean  # noqa: E402
+from processors import ContentCleaner  # noqa: E402
+
+
+WORDS = ['the', 'model', 'data', 'results', 'of', 'and', 'research', 'network',
+         'evaluation', 'method', 'it’s', '“quoted”', 'range–bound',
+         'aside—like', 'more…', 'non\xa0breaking']
+
+
+def generate(size: int, seed: int = 0) -> str:
+    """Generate a markdown-like document of about size characters."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.08:
+            line = '#' * rng.randint(1, 4) + rng.choice(['', ' ']) + ' '.join(rng.choices(WORDS, k=4))
+        elif kind < 0.2:
+            line = rng.choice(['', '   ', '\t']) + '- ' + ' '.join(rng.choices(WORDS, k=8))
+        elif kind < 0.3:
+            line = rng.choice(['', ' ', '\t\t'])
+        else:
+            line = ' '.join(rng.choices(WORDS, k=rng.randint(5, 30)))
+            if rng.random() < 0.2:
+                line = line.replace(' ', '  ', 3) + '   '
+        parts.append(line)
+        total += len(line) + 1
+    return '\n'.join(parts)
+
+
+def best_time(function, text: str, repeat: int):
+    """Run a function repeat times; return its output and fastest time."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return output, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('files', nargs='*', help='Text files to clean (default: a generated document)')
+    parser.add_argument('--size-mb', type=float, default=6, help='Size of the generated document (default: 6)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per input; the fastest counts (default: 3)')
+    args = parser.parse_args()
+
+    if args.files:
+        inputs = [(Path(path).name, Path(path).read_text(encoding='utf-8')) for path in args.files]
+    else:
+        inputs = [(f'generated {args.size_mb:g} MB', generate(int(args.size_mb * 1024 * 1024)))]
+
+    cleaner = ContentCleaner()
+    print(f"{'input':30} {'MB':>7} {'baseline MB/s':>14} {'current MB/s':>13} {'speedup':>8}  output")
+    for name, text in inputs:
+        megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+        expected, baseline_time = best_time(baseline_clean, text, args.repeat)
+        output, current_time = best_time(cleaner.clean, text, args.repeat)
+        print(f"{name[:30]:30} {megabytes:7.2f} {megabytes / baseline_time:14.1f} "
+              f"{megabytes / current_time:13.1f} {baseline_time / current_time:7.2f}x  "
+              f"{'identical' if output == expected else 'DIFFERENT'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml and BeautifulSoup HTML extraction backends.
+
+Runs URLCollector's extraction with html_backend='bs4' and 'lxml' over a
+directory of saved pages, without any network access, and reports the
+total time of each, per-page speedups and how many pages the lxml walk
+handed back to BeautifulSoup. Pages are read into memory first so only
+extraction is timed. scripts/check_html_extract.py checks that both
+backends give the same results.
+
+Usage: python3 scripts/bench_html_extract.py DIR_OR_FILE [...] [--limit N] [--largest N]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from collectors import URLCollector  # noqa: E402
+from collectors.html_extractor import extract_page  # noqa: E402
+
+
+class SavedPageCollector(URLCollector):
+    """URLCollector that reads pages from memory instead of downloading them."""
+
+    def __init__(self, pages: Dict[str, bytes], html_backend: str):
+        super().__init__(html_backend=html_backend)
+        self.pages = pages
+
+    def _fetch(self, url: str) -> bytes:
+        return self.pages[url]
+
+
+def load_pages(paths: List[str], limit: int = 0, largest: int = 0) -> Dict[str, bytes]:
+    """
+    Read saved pages, keyed by a URL made from their path.
+
+    Directories are searched recursively for .html and .htm files. With
+    largest, only that many of the largest pages are kept; with limit, only
+    the first that many in path order.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in ('.html', '.htm')))
+        else:
+            files.append(path)
+    if largest:
+        files = sorted(files, key=lambda p: p.stat().st_size, reverse=True)[:largest]
+    if limit:
+        files = files[:limit]
+    return {'https://saved.example' + p.resolve().as_posix(): p.read_bytes() for p in files}
+
+
+def time_pages(collector: URLCollector, urls: List[str]) -> Tuple[Dict[str, float], float]:
+    """Collect every page once; return per-page times and the total."""
+    times = {}
+    for url in urls:
+        start = time.perf_counter()
+        collector.collect(url)
+        times[url] = time.perf_counter() - start
+    return times, sum(times.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('paths', nargs='+', help='Saved pages or directories of saved pages')
+    parser.add_argument('--limit', type=int, default=0, help='Use at most this many pages')
+    parser.add_argument('--largest', type=int, default=0, help='Use only the N largest pages')
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths, args.limit, args.largest)
+    if not pages:
+        print("No pages found")
+        sys.exit(1)
+    urls = list(pages)
+    megabytes = sum(map(len, pages.values())) / (1024 * 1024)
+    fallbacks = sum(extract_page(pages[url], url) is None for url in urls)
+
+    bs4_times, bs4_total = time_pages(SavedPageCollector(pages, 'bs4'), urls)
+    lxml_times, lxml_total = time_pages(SavedPageCollector(pages, 'lxml'), urls)
+    speedups = [bs4_times[url] / lxml_times[url] for url in urls]
+    largest = max(urls, key=lambda url: len(pages[url]))
+
+    print(f"pages:            {len(urls)} ({megabytes:.1f} MB), "
+          f"{fallbacks} handed back to BeautifulSoup")
+    print(f"bs4:              {bs4_total:.2f} s ({megabytes / bs4_total:.1f} MB/s)")
+    print(f"lxml:             {lxml_total:.2f} s ({megabytes / lxml_total:.1f} MB/s)")
+    print(f"speedup:          {bs4_total / lxml_total:.1f}x total, "
+          f"{statistics.median(speedups):.1f}x median per page, {min(speedups):.1f}x minimum")
+    print(f"largest page:     {len(pages[largest]) / 1024:.0f} KB, "
+          f"{bs4_times[largest] * 1000:.0f} ms -> {lxml_times[largest] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark KnowledgeLedger lookups as the ledger grows.
+
+Builds ledgers of increasing size and times the indexed lookups
+(get_source_by_id, get_processed_content, get_topic_by_keyword,
+get_topics_for_source) against the linear scan get_source_by_id used
+before the indexes. Lookups use IDs spread across the whole ledger.
+
+Usage: python3 scripts/bench_ledger_lookups.py [--sizes 1000 10000 100000] [--rounds N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from models import KnowledgeLedger, ProcessedContent, Source, SourceType, Topic  # noqa: E402
+from utils import generate_source_id  # noqa: E402
+
+
+def build_ledger(size: int) -> KnowledgeLedger:
+    """Build a ledger of size sources, with a topic for every ten sources."""
+    ids = [generate_source_id(i + 1) for i in range(size)]
+    sources = [Source(id=source_id, name=source_id, source_type=SourceType.BLOG,
+                      authority_score=50, location=f'https://example.com/{i}', content='')
+               for i, source_id in enumerate(ids)]
+    processed = [ProcessedContent(source_id=source_id, chunks=[], cleaned_text='')
+                 for source_id in ids]
+    topics = [Topic(name=f'topic {i}', description='', keywords=[f'keyword-{i}', f'shared-{i % 7}'],
+                    source_ids=ids[i * 10:i * 10 + 10], relevance_score=0.5)
+              for i in range(max(1, size // 10))]
+    return KnowledgeLedger(sources=sources, processed_contents=processed, topics=topics)
+
+
+def linear_source_by_id(ledger: KnowledgeLedger, source_id: str):
+    """get_source_by_id as it was before the indexes: a scan over the sources."""
+    for source in ledger.sources:
+        if source.id == source_id:
+            return source
+    return None
+
+
+def per_call(function, keys, rounds: int) -> float:
+    """Mean time of one call, in microseconds."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            function(key)
+    return (time.perf_counter() - start) / (rounds * len(keys)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Ledger sizes in sources (default: 1000 10000 100000)')
+    parser.add_argument('--lookups', type=int, default=1000,
+                        help='Distinct IDs looked up per round (default: 1000)')
+    parser.add_argument('--rounds', type=int, default=100,
+                        help='Rounds of indexed lookups (default: 100)')
+    args = parser.parse_args()
+
+    print(f"{'sources':>8} {'index build ms':>15} {'source us':>10} {'content us':>11} "
+          f"{'keyword us':>11} {'topics us':>10} {'linear scan us':>15}")
+    for size in args.sizes:
+        ledger = build_ledger(size)
+        step = max(1, size // args.lookups)
+        ids = [generate_source_id(i + 1) for i in range(0, size, step)][:args.lookups]
+        keywords = [f'keyword-{i}' for i in range(0, len(ledger.topics), max(1, len(ledger.topics) // args.lookups))]
+
+        start = time.perf_counter()
+        ledger.get_source_by_id(ids[0])
+        ledger.get_processed_content(ids[0])
+        ledger.get_topic_by_keyword(keywords[0])
+        ledger.get_topics_for_source(ids[0])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        source_us = per_call(ledger.get_source_by_id, ids, args.rounds)
+        content_us = per_call(ledger.get_processed_content, ids, args.rounds)
+        keyword_us = per_call(ledger.get_topic_by_keyword, keywords, args.rounds)
+        topics_us = per_call(ledger.get_topics_for_source, ids, args.rounds)
+        # The scan is linear, so one round is plenty
+        linear_us = per_call(lambda key: linear_source_by_id(ledger, key), ids, 1)
+
+        for source_id in ids:
+            assert ledger.get_source_by_id(source_id) is linear_source_by_id(ledger, source_id)
+
+        print(f"{size:8} {build_ms:15.1f} {source_us:10.2f} {content_us:11.2f} "
+              f"{keyword_us:11.2f} {topics_us:10.2f} {linear_us:15.1f}")
+
+
+if __name__ == '__main__':
+    main()
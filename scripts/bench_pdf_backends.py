@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Compare the pdfium and pdfplumber PDF text backends.
+
+Extracts every page of the given PDFs with both engines and reports pages
+per second and how closely the pdfium text matches pdfplumber's, page by
+page. Whitespace is ignored when comparing: pdfplumber infers spaces from
+glyph positions and drops them on some PDFs where pdfium keeps them. Pages
+that pdfium hands to the pdfplumber fallback are counted separately.
+
+Usage: python3 scripts/bench_pdf_backends.py FILE.pdf [FILE.pdf ...]
+"""
+import argparse
+import difflib
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from collectors.pdf_backends import PDFReader, pdfium  # noqa: E402
+
+
+def extract(path: str, backend: str):
+    """Extract the text of every page, including empty ones, and time it."""
+    start = time.perf_counter()
+    with PDFReader(path, backend) as reader:
+        texts = [reader._page_text(index) or '' for index in range(reader.page_count)]
+        fallback_pages = reader.fallback_pages
+    return texts, time.perf_counter() - start, fallback_pages
+
+
+def squeeze(text: str) -> str:
+    """Remove all whitespace from a text."""
+    return ''.join(text.split())
+
+
+def similarity(a: str, b: str) -> float:
+    """Similarity of two page texts ignoring whitespace, from 0 to 1."""
+    return difflib.SequenceMatcher(None, squeeze(a), squeeze(b)).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('pdfs', nargs='+', help='PDF files to extract')
+    args = parser.parse_args()
+
+    if pdfium is None:
+        print("pypdfium2 is not installed; nothing to compare")
+        sys.exit(1)
+
+    totals = Counter()
+    print(f"{'file':40} {'pages':>6} {'pdfium p/s':>11} {'plumber p/s':>12} "
+          f"{'fallback':>9} {'identical':>10} {'similar':>8}")
+    for path in args.pdfs:
+        fast, fast_time, fallback = extract(path, 'pdfium')
+        slow, slow_time, _ = extract(path, 'pdfplumber')
+        identical = sum(squeeze(a) == squeeze(b) for a, b in zip(fast, slow))
+        similar = sum(similarity(a, b) for a, b in zip(fast, slow))
+        pages = len(fast)
+
+        print(f"{Path(path).name[:40]:40} {pages:6} {pages / fast_time:11.1f} "
+              f"{pages / slow_time:12.1f} {fallback:9} {identical:10} "
+              f"{similar / max(pages, 1):8.3f}")
+        totals.update(pages=pages, fast_time=fast_time, slow_time=slow_time,
+                      fallback=fallback, identical=identical, similar=similar)
+
+    pages = totals['pages']
+    if len(args.pdfs) > 1 and pages:
+        print(f"{'total':40} {pages:6} {pages / totals['fast_time']:11.1f} "
+              f"{pages / totals['slow_time']:12.1f} {totals['fallback']:9} "
+              f"{totals['identical']:10} {totals['similar'] / pages:8.3f}")
+    print("\nidentical: pages with the same text ignoring whitespace; "
+          "similar: mean similarity per page ignoring whitespace")
+
+
+if __name__ == '__main__':
+    main()
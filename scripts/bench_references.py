@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark utils.extract_references against the original implementation.
+
+Extracts references from the given PDFs or text files, or from generated
+academic papers and adversarial inputs, with both the current single-scan
+extract_references and the original three-regex version frozen below. It
+reports the time of each and checks that every reference the original
+found is still listed. The current version also lists bare DOIs and drops
+more duplicates (the same URL or DOI written differently), so it can list
+fewer references than the original while covering all of them.
+
+Usage: python3 scripts/bench_references.py [--size-mb 1 5 20] [--repeat N] [FILE ...]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from utils import _reference_key, extract_references  # noqa: E402
+
+
+def baseline_extract_references(text: str) -> List[str]:
+    """extract_references as it was before the single-scan rewrite."""
+    references = []
+
+    numbered_refs = re.findall(r'\[\d+\][^\[]*?(?=\[\d+\]|$)', text)
+    references.extend(numbered_refs)
+
+    ref_section = re.search(r'(?:References|Bibliography|Citations)[:\n]+(.*?)(?:\n\n|$)',
+                            text, re.IGNORECASE | re.DOTALL)
+    if ref_section:
+        refs = [ref.strip() for ref in ref_section.group(1).split('\n') if ref.strip()]
+        references.extend(refs)
+
+    urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text)
+    references.extend(urls)
+
+    seen = set()
+    unique_refs = []
+    for ref in references:
+        ref_clean = ref.strip()
+        if ref_clean and ref_clean not in seen:
+            seen.add(ref_clean)
+            unique_refs.append(ref_clean)
+
+    return unique_refs
+
+
+WORDS = ['the', 'model', 'data', 'results', 'of', 'and', 'research', 'network',
+         'evaluation', 'method', 'figure', 'table', 'we', 'show', 'training']
+
+
+def generate_paper(size: int, seed: int = 0) -> str:
+    """Generate an academic paper of about size characters with a references section."""
+    rng = random.Random(seed)
+    parts = ['Abstract', ' '.join(rng.choices(WORDS, k=120)), '', 'Introduction']
+    total = 0
+    body_size = size * 9 // 10
+    while total < body_size:
+        sentence = ' '.join(rng.choices(WORDS, k=rng.randint(8, 25)))
+        kind = rng.random()
+        if kind < 0.1:
+            sentence += f' [{rng.randint(1, 200)}]'
+        elif kind < 0.13:
+            sentence += f' (see https://example{rng.randint(1, 50)}.org/paper/{rng.randint(1, 500)})'
+        elif kind < 0.15:
+            sentence += f' doi:10.{rng.randint(1000, 9999)}/j.{rng.randint(1, 10 ** 6)}'
+        parts.append(sentence + '.')
+        if rng.random() < 0.1:
+            parts.append('')
+        total += len(sentence) + 2
+    parts += ['', 'References']
+    index = 0
+    while total < size:
+        index += 1
+        line = (f'[{index}] {" ".join(rng.choices(WORDS, k=10)).title()}. Journal of '
+                f'{rng.choice(WORDS).title()}, {rng.randint(1990, 2024)}. '
+                f'https://doi.org/10.{rng.randint(1000, 9999)}/{rng.randint(1, 10 ** 6)}')
+        parts.append(line)
+        total += len(line) + 1
+    return '\n'.join(parts)
+
+
+ADVERSARIAL = {
+    '"[1]" repeated': '[1]',
+    '"[1] " then "[x " repeated': None,
+    '"http://a/" repeated': 'http://a/',
+    '"10.1234/" repeated': '10.1234/',
+}
+
+
+def adversarial(name: str, size: int) -> str:
+    """Build an adversarial input of about size characters."""
+    unit = ADVERSARIAL[name]
+    if unit is None:
+        return '[1] ' + '[x ' * (size // 3)
+    return unit * (size // len(unit))
+
+
+def read_input(path: str) -> str:
+    """Read a text file, or the text of a PDF as the document collector extracts it."""
+    if path.lower().endswith('.pdf'):
+        from collectors import DocumentCollector
+        return DocumentCollector().collect(path)['content']
+    return Path(path).read_text(encoding='utf-8')
+
+
+def best_time(function, text: str, repeat: int):
+    """Run a function repeat times; return its output and fastest time."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return output, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('files', nargs='*',
+                        help='PDFs or text files (default: generated papers and adversarial inputs)')
+    parser.add_argument('--size-mb', type=float, nargs='+', default=[1, 5, 20],
+                        help='Sizes of the generated papers (default: 1 5 20)')
+    parser.add_argument('--adversarial-mb', type=float, default=5,
+                        help='Size of the adversarial inputs, 0 to skip them (default: 5)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per input; the fastest counts (default: 3)')
+    args = parser.parse_args()
+
+    if args.files:
+        inputs = [(Path(path).name, read_input(path)) for path in args.files]
+    else:
+        inputs = [(f'generated paper {size:g} MB', generate_paper(int(size * 1024 * 1024)))
+                  for size in args.size_mb]
+        if args.adversarial_mb:
+            size = int(args.adversarial_mb * 1024 * 1024)
+            inputs += [(name, adversarial(name, size)) for name in ADVERSARIAL]
+
+    print(f"{'input':30} {'MB':>7} {'baseline s':>11} {'current s':>10} {'speedup':>8} "
+          f"{'baseline refs':>14} {'current refs':>13} {'missing':>8}")
+    for name, text in inputs:
+        megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+        expected, baseline_time = best_time(baseline_extract_references, text, args.repeat)
+        output, current_time = best_time(extract_references, text, args.repeat)
+        keys = {_reference_key(ref) for ref in output}
+        missing = sum(_reference_key(ref) not in keys for ref in expected)
+        print(f"{name[:30]:30} {megabytes:7.2f} {baseline_time:11.3f} {current_time:10.3f} "
+              f"{baseline_time / current_time:7.2f}x {len(expected):14} {len(output):13} "
+              f"{missing:8}")
+    print("\nmissing: references the original found that the current version does not "
+          "list, not even in another form")
+
+
+if __name__ == '__main__':
+    main()
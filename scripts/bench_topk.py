@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark top-k TF-IDF keyword selection on the sparse matrix.
+
+Times _top_k_per_row against the per-row toarray + argsort it replaced on
+random CSR matrices. Results are checked against a reference sort (largest
+value first, ties by column). The dense argsort leaves the order of ties
+to numpy, so its results are compared by the values they select.
+The dense path is linear in the number of rows; when --dense-rows is
+smaller than --docs, its time is measured on that many rows and
+extrapolated.
+
+Usage: python3 scripts/bench_topk.py [--docs 10000] [--features 5000] [--nnz 150] [--k 15]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import csr_matrix, random as sparse_random
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from processors.topic_extractor import _top_k_per_row  # noqa: E402
+
+
+def dense_top_k(matrix: csr_matrix, k: int):
+    """Top-k columns per row as topic_extractor selected them before _top_k_per_row."""
+    top = []
+    for row in range(matrix.shape[0]):
+        vector = matrix[row].toarray().flatten()
+        indices = vector.argsort()[-k:][::-1]
+        top.append([i for i in indices if vector[i] > 0])
+    return top
+
+
+def reference_top_k(matrix: csr_matrix, k: int):
+    """Top-k columns per row by descending value, then ascending column."""
+    top = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        pairs = sorted((-value, column) for value, column in
+                       zip(matrix.data[start:end], matrix.indices[start:end]) if value > 0)
+        top.append([column for _, column in pairs[:k]])
+    return top
+
+
+def random_matrix(docs: int, features: int, nnz: int, seed: int) -> csr_matrix:
+    """Random TF-IDF-like matrix; values are rounded so rows contain ties."""
+    rng = np.random.default_rng(seed)
+    matrix = sparse_random(docs, features, density=min(1.0, nnz / features), format='csr',
+                           random_state=rng, data_rvs=lambda n: np.round(rng.random(n), 2))
+    matrix.sort_indices()
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--docs', type=int, nargs='+', default=[10000],
+                        help='Numbers of documents (rows) (default: 10000)')
+    parser.add_argument('--features', type=int, nargs='+', default=[500, 5000],
+                        help='Numbers of features (columns) (default: 500 5000)')
+    parser.add_argument('--nnz', type=int, default=150,
+                        help='Nonzero values per row (default: 150)')
+    parser.add_argument('--k', type=int, default=15, help='Keywords per document (default: 15)')
+    parser.add_argument('--dense-rows', type=int, default=10000,
+                        help='Rows the dense path is timed on (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    print(f"{'docs':>8} {'features':>9} {'dense s':>9} {'sparse s':>9} {'speedup':>8} "
+          f"{'matches':>8} {'dense matches':>14}")
+    for docs in args.docs:
+        for features in args.features:
+            matrix = random_matrix(docs, features, args.nnz, args.seed)
+
+            start = time.perf_counter()
+            sparse = _top_k_per_row(matrix, args.k)
+            sparse_time = time.perf_counter() - start
+
+            dense_rows = min(docs, args.dense_rows)
+            start = time.perf_counter()
+            dense = dense_top_k(matrix[:dense_rows], args.k)
+            dense_time = (time.perf_counter() - start) * docs / dense_rows
+
+            reference = reference_top_k(matrix, args.k)
+            matches = sum(list(a) == b for a, b in zip(sparse, reference))
+            dense_matches = sum(
+                list(matrix[r].toarray()[0, row]) == list(matrix[r].toarray()[0, reference[r]])
+                for r, row in enumerate(dense)
+            )
+
+            print(f"{docs:8} {features:9} {dense_time:9.2f} {sparse_time:9.2f} "
+                  f"{dense_time / sparse_time:8.1f} {matches:>4}/{docs:<4} "
+                  f"{dense_matches:>6}/{dense_rows:<6}")
+    print("\nmatches: rows equal to the reference sort; dense matches: rows of the dense "
+          "path selecting the same values as the reference, which may differ in which of "
+          "several tied columns they keep")
+
+
+if __name__ == '__main__':
+    main()
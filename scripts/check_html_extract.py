@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Check that the lxml and BeautifulSoup HTML extraction backends agree.
+
+Extracts saved pages, generated malformed documents, or both, with
+URLCollector's html_backend='bs4' and 'lxml' and compares the title,
+content and metadata. Prints the first difference of every page that
+differs and exits with status 1 if any did. Generated documents mix
+encodings, invalid bytes, unclosed and stray tags, comments, doctypes,
+ruby, templates, pre blocks and page chrome.
+
+Usage: python3 scripts/check_html_extract.py [DIR_OR_FILE ...] [--random N] [--seed N]
+"""
+import argparse
+import difflib
+import random
+import sys
+import warnings
+
+from bench_html_extract import SavedPageCollector, load_pages
+
+from bs4 import XMLParsedAsHTMLWarning
+from collectors.html_extractor import extract_page
+
+
+TAGS = ['p', 'li', 'ul', 'h1', 'h2', 'h3', 'h6', 'div', 'span', 'b', 'a', 'blockquote',
+        'article', 'main', 'section', 'pre', 'textarea', 'script', 'style', 'nav', 'footer',
+        'header', 'ruby', 'rt', 'rp', 'template', 'table', 'td', 'br', 'title']
+ATTRIBUTES = ['', ' role="main"', ' role=" main"', ' class="post-content"',
+              ' class="x article-content"', ' class="\tpost-content\n"', ' id="a"']
+TEXTS = ['word', 'two words', ' ', '  \n ', '\t', 'café', '—', '&amp;', '&nbsp;',
+         '&#x1F600;', '<', '>', ' ', 'x\ny', '中文', 'İ', '\x85']
+PROLOGS = [b'', b'<!DOCTYPE html>', b'\xef\xbb\xbf', b'<!-- c -->\n<!doctype html>',
+           b'<?xml version="1.0"?>']
+META = [
+    '<meta name="author" content="A. Author">',
+    '<meta name="description" content="About é">',
+    '<meta property="article:published_time" content="2024-01-01">',
+    '<meta property="og:title" content="OG title">',
+    '<meta charset="{charset}">',
+]
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252', 'utf-8']
+
+
+def random_fragment(rng: random.Random, depth: int = 0) -> str:
+    """Generate a run of text and nested, possibly unclosed, elements."""
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        kind = rng.random()
+        if kind < 0.35 or depth > 4:
+            parts.append(rng.choice(TEXTS))
+        elif kind < 0.8:
+            tag = rng.choice(TAGS)
+            inner = random_fragment(rng, depth + 1)
+            end = f'</{tag}>' if rng.random() < 0.85 else ''
+            parts.append(f'<{tag}{rng.choice(ATTRIBUTES)}>{inner}{end}')
+        elif kind < 0.9:
+            parts.append(f'</{rng.choice(TAGS)}>')
+        elif kind < 0.95:
+            parts.append(rng.choice(['<!-- comment -->', '<!-->', '<!--x', '<!doctype html>']))
+        else:
+            parts.append(rng.choice(META).format(charset=rng.choice(ENCODINGS)))
+    return ''.join(parts)
+
+
+def random_page(rng: random.Random) -> bytes:
+    """Generate a malformed HTML document in a random encoding."""
+    encoding = rng.choice(ENCODINGS)
+    head = ''.join(rng.sample(META, rng.randint(0, len(META)))).format(charset=encoding)
+    if rng.random() < 0.8:
+        head += f'<title>{rng.choice(TEXTS)}{rng.choice(TEXTS)}</title>'
+    html = f'<html><head>{head}</head><body>{random_fragment(rng)}</body></html>'
+    if rng.random() < 0.1:
+        html += random_fragment(rng)
+    body = html.encode(encoding, 'replace')
+    if rng.random() < 0.05:
+        body = body.replace(b'word', b'w\xff\xfed', 1)
+    return rng.choice(PROLOGS) + body
+
+
+def first_difference(expected: dict, output: dict) -> str:
+    """Describe the first field in which two extraction results differ."""
+    for field in ('title', 'metadata', 'content'):
+        if expected.get(field) != output.get(field):
+            if field != 'content':
+                return f"{field}: {expected.get(field)!r} != {output.get(field)!r}"
+            diff = difflib.unified_diff(expected['content'].split('\n'),
+                                        output['content'].split('\n'),
+                                        'bs4', 'lxml', n=1, lineterm='')
+            return 'content:\n' + '\n'.join(list(diff)[:20])
+    return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('paths', nargs='*', help='Saved pages or directories of saved pages')
+    parser.add_argument('--random', type=int, default=0,
+                        help='Also check this many generated documents (default: 2000 '
+                             'without paths, 0 with them)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--limit', type=int, default=0, help='Check at most this many saved pages')
+    args = parser.parse_args()
+    # Pages with an XML declaration are parsed as HTML on purpose
+    warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+
+    pages = load_pages(args.paths, args.limit) if args.paths else {}
+    count = args.random or (0 if args.paths else 2000)
+    rng = random.Random(args.seed)
+    for index in range(count):
+        pages[f'https://generated.example/{index}'] = random_page(rng)
+
+    bs4 = SavedPageCollector(pages, 'bs4')
+    lxml = SavedPageCollector(pages, 'lxml')
+    mismatches = 0
+    fallbacks = 0
+    for url, body in pages.items():
+        fallbacks += extract_page(body, url) is None
+        difference = first_difference(bs4.collect(url), lxml.collect(url))
+        if difference:
+            mismatches += 1
+            print(f"DIFFERENT {url}\n{difference}\n")
+
+    print(f"{len(pages)} pages, {mismatches} different, "
+          f"{fallbacks} handed back to BeautifulSoup by the lxml walk")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -68,6 +68,7 @@ python3 knowledge_ledger_agent.py $ARGS --output "$OUTPUT_FILE"
 # Copy latest ledger to knowledge/ for the content pipeline
 LATEST_LINK="$KNOWLEDGE_DIR/latest-ledger.md"
 cp "$OUTPUT_FILE" "$LATEST_LINK"
+cp "${OUTPUT_FILE%.md}.ledger" "$KNOWLEDGE_DIR/latest-ledger.ledger"
 
 echo ""
 echo "======================================="
@@ -75,6 +76,7 @@ echo " Ingestion complete!"
 echo "======================================="
 echo "  Ledger:  $OUTPUT_FILE"
 echo "  Latest:  $LATEST_LINK"
+echo "  Binary:  $KNOWLEDGE_DIR/latest-ledger.ledger"
 echo ""
 echo "Next: Run the content pipeline using Antigravity or Claude Code."
 echo ""